@@ -0,0 +1,186 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import runpy
+import subprocess
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+SCRIPTS_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts')
+sys.path.insert(0, SCRIPTS_DIRECTORY)
+
+from dtype_policy import peak_rss_mb
+from pipeline_stages import stage_records
+from synthetic_berdo import build_synthetic_data_tree
+
+
+# Pipeline scripts in the order they run
+PIPELINE_SCRIPTS = ['1-data_manipulation.py', '2-data_preprocessing.py', '3-property_type_thresholds.py']
+
+# Scales of the synthetic data, as copies of the real raw data
+DEFAULT_SCALES = [1, 10, 100]
+
+# Default results file
+DEFAULT_OUTPUT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'pipeline-results.json')
+
+# A stage regresses when it is this much slower or larger than the baseline...
+REGRESSION_TOLERANCE = 0.25
+# ...and it is not too short or small to time reliably
+MIN_REGRESSION_SECONDS = 0.05
+MIN_REGRESSION_MB = 10
+
+
+def run_pipeline(scripts_directory):
+    """
+    Runs scripts 1-3 in one process on the data tree next to `scripts_directory`.
+
+    Script 1 does not write its separated data, so the reported 2022/2023 frames are written
+    to the inputs of script 2 in between, as its commented-out export does.
+
+    Parameters:
+    scripts_directory (str): The working directory, with the data in '../data-files'.
+
+    Returns:
+    dict: The per-stage records, the wall time of each script and the process peak RSS.
+    """
+    os.chdir(scripts_directory)
+    script_seconds = {}
+    for script in PIPELINE_SCRIPTS:
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            script_globals = runpy.run_path(os.path.join(SCRIPTS_DIRECTORY, script), run_name='__main__')
+        script_seconds[script] = time.perf_counter() - start
+
+        if script == '1-data_manipulation.py':
+            script_globals['df_berdo_reported_2022'].to_csv('../data-files/2-berdo_reported_2022.csv', index=False)
+            script_globals['df_berdo_reported_2023'].to_csv('../data-files/2-berdo_reported_2023.csv', index=False)
+            del script_globals
+
+    return {'stages': stage_records(), 'script_seconds': script_seconds, 'peak_rss_mb': peak_rss_mb()}
+
+
+def benchmark_scale(scale, seed=0):
+    """
+    Benchmarks the pipeline on synthetic data of one scale in a fresh process.
+
+    Each scale runs in its own interpreter, so its peak memory is not inflated by earlier runs.
+
+    Parameters:
+    scale (int): Number of copies of the real raw data.
+    seed (int): Seed of the synthetic data.
+
+    Returns:
+    dict: The scale, raw and output row counts, per-stage records, script times and peak RSS.
+    """
+    with tempfile.TemporaryDirectory(prefix='berdo-bench-') as root:
+        start = time.perf_counter()
+        tree = build_synthetic_data_tree(root, scale, seed)
+        generate_seconds = time.perf_counter() - start
+
+        result_path = os.path.join(root, 'result.json')
+        subprocess.run([sys.executable, os.path.abspath(__file__), '--worker', tree['scripts'], result_path],
+                       check=True)
+        with open(result_path) as result_file:
+            result = json.load(result_file)
+
+        buildings = len(pd.read_csv(os.path.join(tree['data'], '2-sql-tables', '1-buildings-table.csv')))
+
+    return {'scale': scale, 'raw_rows': tree['raw_rows'], 'buildings': buildings,
+            'generate_seconds': generate_seconds, **result}
+
+
+def compare_to_baseline(results, baseline, tolerance=REGRESSION_TOLERANCE):
+    """
+    Flags stages that got slower or use more memory than in a baseline run.
+
+    Parameters:
+    results (dict): Results of this run, as written by the benchmark.
+    baseline (dict): Results of an earlier run.
+    tolerance (float): Allowed relative increase before a stage is flagged.
+
+    Returns:
+    list: One dict per regression with the scale, stage, metric, baseline and current value.
+    """
+    baseline_runs = {run['scale']: {stage['stage']: stage for stage in run['stages']} for run in baseline['runs']}
+    regressions = []
+    for run in results['runs']:
+        for stage in run['stages']:
+            baseline_stage = baseline_runs.get(run['scale'], {}).get(stage['stage'])
+            if baseline_stage is None:
+                continue
+            for metric, minimum in [('wall_s', MIN_REGRESSION_SECONDS), ('peak_rss_mb', MIN_REGRESSION_MB)]:
+                before, after = baseline_stage.get(metric), stage.get(metric)
+                if before is None or after is None or max(before, after) < minimum:
+                    continue
+                if after > before * (1 + tolerance):
+                    regressions.append({'scale': run['scale'], 'stage': stage['stage'], 'metric': metric,
+                                        'baseline': before, 'current': after, 'ratio': after / before})
+    return regressions
+
+
+def format_results(results):
+    """
+    Formats the per-stage timings and memory of all scales as a table.
+
+    Parameters:
+    results (dict): Results as written by the benchmark.
+
+    Returns:
+    str: The table.
+    """
+    rows = [{'scale': f"{run['scale']}x", 'stage': stage['stage'], 'wall_s': round(stage['wall_s'], 3),
+             'cpu_s': round(stage['cpu_s'], 3), 'rows_out': stage['rows_out'], 'peak_rss_mb': round(stage['peak_rss_mb'], 1), 'rss_growth_mb': round(stage['rss_growth_mb'], 1)}
+            for run in results['runs'] for stage in run['stages']]
+    return pd.DataFrame(rows).astype({'rows_out': 'Int64'}).to_string(index=False)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmarks pipeline scripts 1-3 on synthetic BERDO data.')
+    parser.add_argument('--scales', type=int, nargs='+', default=DEFAULT_SCALES,
+                        help='copies of the real raw data to benchmark, default 1 10 100')
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help='JSON file for the results')
+    parser.add_argument('--baseline', help='JSON results of an earlier run to flag regressions against')
+    parser.add_argument('--tolerance', type=float, default=REGRESSION_TOLERANCE,
+                        help='relative slow-down or memory growth flagged as a regression')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the synthetic data')
+    parser.add_argument('--worker', nargs=2, metavar=('SCRIPTS_DIRECTORY', 'RESULT_PATH'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    # Worker process of benchmark_scale
+    if args.worker:
+        worker_result = run_pipeline(args.worker[0])
+        with open(args.worker[1], 'w') as worker_file:
+            json.dump(worker_result, worker_file)
+        sys.exit(0)
+
+    results = {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'backend': os.environ.get('BERDO_PIPELINE_BACKEND', 'pandas'),
+        'runs': [benchmark_scale(scale, args.seed) for scale in args.scales],
+    }
+    with open(args.output, 'w') as output_file:
+        json.dump(results, output_file, indent=2)
+
+    print(format_results(results))
+    for run in results['runs']:
+        print(f"{run['scale']}x: {sum(run['raw_rows'].values())} raw rows, {run['buildings']} buildings, "
+              f"{sum(run['script_seconds'].values()):.1f} s, peak RSS {run['peak_rss_mb']:.1f} MB")
+    print(f'Results written to {args.output}')
+
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            regressions = compare_to_baseline(results, json.load(baseline_file), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression['scale']}x {regression['stage']} {regression['metric']}: "
+                  f"{regression['baseline']:.2f} -> {regression['current']:.2f} ({regression['ratio']:.2f}x)")
+        if regressions:
+            sys.exit(1)
+        print('No regressions against the baseline')
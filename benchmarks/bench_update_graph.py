@@ -0,0 +1,131 @@
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+from plotly.utils import PlotlyJSONEncoder
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
+
+from emissions_model import FUEL_TYPES, CEI_YEARS, PENALTY_YEARS, CO2_COST, build_factor_matrix, calculate_cei, \
+    calculate_penalty
+from factor_registry import get_factor_set, select_factors
+from figures import CEI_BAR_TRACES, build_cei_figure, build_cost_figure, patch_cei_figure, patch_cost_figure
+
+
+def legacy_update_graph(df, df_1, col_chosen, values):
+    """
+    Builds both figures the way update_graph did before the figure skeletons were introduced.
+
+    Every call computes each CEI value in Python, creates new figures with plotly express,
+    adds the 11 bar traces one at a time and reapplies the layout.
+
+    Parameters:
+    df (pandas.DataFrame): Thresholds of the threshold line, with a 'Year' column and one column per property type.
+    df_1 (pandas.DataFrame): Thresholds of the compliance years the cost penalty is compared against.
+    col_chosen (str): The property type to compare against.
+    values (list): GSF followed by the 11 fuel usages.
+
+    Returns:
+    tuple: The CEI figure and the cost penalty figure.
+    """
+    df_cei = pd.DataFrame({'X': CEI_YEARS})
+    for column, (name, fuel, conversion) in enumerate(FUEL_TYPES, start=1):
+        factor = dict(zip(CEI_YEARS, select_factors(get_factor_set(), [fuel], CEI_YEARS)[:, 0]))
+        df_cei[name] = [values[column] * conversion * factor[year] / values[0] for year in CEI_YEARS]
+    total_cei = df_cei[df_cei['X'].isin(PENALTY_YEARS)].drop(columns='X').sum(axis=1).reset_index(drop=True)
+    thresholds = df_1[col_chosen].reset_index(drop=True)
+    condition = total_cei > thresholds
+    cost_penalty = round(((total_cei - thresholds) * CO2_COST * values[0] * condition / 1000), 0)
+
+    fig1 = px.line(df, x='Year', y=col_chosen, template='YETI',
+                   title='<b>Building CEI vs. BERDO Threshold (kg CO2e/sf/yr)</b>')
+    fig1.update_traces(line=dict(width=3, color='#000000'),
+                       hovertemplate='<b>Year:</b> %{x}<br><b>Threshold CEI:</b> %{y}</b>')
+    fig2 = px.bar(x=PENALTY_YEARS, y=cost_penalty, template='YETI', title='<b>Building Cost Penalty ($)')
+    fig2.update_traces(hovertemplate='<b>Year:</b> %{x}<br><b>Cost Penalty:</b> %{y}')
+    for name, color in CEI_BAR_TRACES:
+        fig1.add_trace(go.Bar(x=df_cei['X'], y=[round(val, 2) for val in df_cei[name]], name=name,
+                              marker={'color': color}, hovertemplate='<b>Year:</b> %{x}<br><b>CEI:</b> %{y}'))
+    fig1.update_layout(barmode='stack', title={'font': {'size': 12, 'family': 'Helvetica'}},
+                       yaxis_title='CEI (kg CO2e/sf/yr)', yaxis=dict(tickformat='.2f'))
+    fig2.update_layout(barmode='stack', title={'font': {'size': 12, 'family': 'Helvetica'}}, xaxis_title='Year',
+                       yaxis_title='Alternative Compliance Payment ($)', yaxis=dict(tickprefix="$"))
+    return fig1, fig2
+
+
+def patched_update_graph(df, df_1, col_chosen, values, factor_matrix, penalty_year_rows):
+    """
+    Computes the figure updates the way update_graph does with the prebuilt figure skeletons.
+
+    Parameters:
+    df (pandas.DataFrame): Thresholds of the threshold line, with a 'Year' column and one column per property type.
+    df_1 (pandas.DataFrame): Thresholds of the compliance years the cost penalty is compared against.
+    col_chosen (str): The property type to compare against.
+    values (list): GSF followed by the 11 fuel usages.
+    factor_matrix (numpy.ndarray): The compiled (year x fuel) emissions factors.
+    penalty_year_rows (list): Rows of factor_matrix that fall in the BERDO compliance years.
+
+    Returns:
+    tuple: The CEI figure patch and the cost penalty figure patch.
+    """
+    cei = calculate_cei(values[1:], values[0], factor_matrix)
+    total_cei = cei[penalty_year_rows].sum(axis=1)
+    cost_penalty = calculate_penalty(total_cei, df_1[col_chosen].to_numpy()[:len(PENALTY_YEARS)], values[0])
+    return patch_cei_figure(df[col_chosen], cei), patch_cost_figure(cost_penalty)
+
+
+def time_callback(function, repeat):
+    """
+    Times a figure-producing function including the JSON serialization Dash performs on its output.
+
+    Parameters:
+    function (callable): Function returning the callback's figure outputs.
+    repeat (int): Number of timed calls.
+
+    Returns:
+    dict: Median and mean latency in milliseconds and the serialized payload size in bytes.
+    """
+    timings = []
+    payload = ''
+    for _ in range(repeat):
+        start = time.perf_counter()
+        payload = json.dumps(list(function()), cls=PlotlyJSONEncoder)
+        timings.append((time.perf_counter() - start) * 1000)
+    return {'median_ms': float(np.median(timings)), 'mean_ms': float(np.mean(timings)), 'payload_bytes': len(payload)}
+
+
+if __name__ == '__main__':
+    from dash_bootstrap_templates import load_figure_template
+
+    load_figure_template('YETI')
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+
+    # The BERDO thresholds as the threshold line, and their compliance years as the penalty comparison
+    df_thresholds = pd.read_csv(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data-files',
+                                             '1-thresholds-berdo.csv'), encoding='utf-8-sig')
+    df_comparison = df_thresholds[df_thresholds['Year'].astype(str).isin(PENALTY_YEARS)].reset_index(drop=True)
+    property_type = 'Office'
+    building_values = [250000, 4500000, 120000, 0, 15000, 0, 0, 2000, 0, 0, 0, 0]
+
+    factor_matrix = build_factor_matrix(get_factor_set(), CEI_YEARS)
+    penalty_year_rows = [CEI_YEARS.index(year) for year in PENALTY_YEARS]
+
+    # Skeletons are built once at app start-up and are not part of the per-request cost
+    build_cei_figure(df_thresholds['Year'], CEI_YEARS)
+    build_cost_figure(PENALTY_YEARS)
+
+    results = {
+        'legacy': time_callback(lambda: legacy_update_graph(df_thresholds, df_comparison, property_type, building_values), repeat),
+        'patched': time_callback(lambda: patched_update_graph(df_thresholds, df_comparison, property_type,
+                                                              building_values, factor_matrix, penalty_year_rows), repeat),
+    }
+    for name, result in results.items():
+        print(f"{name:>8}: median {result['median_ms']:.2f} ms, mean {result['mean_ms']:.2f} ms, "
+              f"payload {result['payload_bytes']} bytes")
+    print(f"speed-up: {results['legacy']['median_ms'] / results['patched']['median_ms']:.1f}x, "
+          f"payload reduction: {results['legacy']['payload_bytes'] / results['patched']['payload_bytes']:.1f}x")
@@ -0,0 +1,425 @@
+import argparse
+import ast
+import contextlib
+import importlib.util
+import io
+import os
+import random
+import re
+import runpy
+import shutil
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from synthetic_berdo import build_synthetic_data_tree
+
+REPOSITORY_DIRECTORY = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+
+# Pipeline scripts in the order they run
+PIPELINE_SCRIPTS = ['1-data_manipulation.py', '2-data_preprocessing.py', '3-property_type_thresholds.py']
+
+# Pipeline outputs (relative to data-files) and the columns that identify their rows
+OUTPUT_KEYS = {
+    '2-berdo_reported_2022.csv': ['BERDO ID'],
+    '2-berdo_reported_2023.csv': ['BERDO ID'],
+    '1-preprocessed-emissions-data/1-berdo-emissions-data.csv': ['BERDO ID'],
+    '1-preprocessed-emissions-data/2-berdo-campus-emissions-data.csv': ['BERDO ID', 'Data Year'],
+    '1-preprocessed-emissions-data/3-validation-violations.csv': ['rule_id', 'Data Year', 'BERDO ID'],
+    '2-sql-tables/1-buildings-table.csv': ['reporting_id'],
+    '2-sql-tables/2-energy-usage-table.csv': ['building_id', 'year', 'energy_type'],
+    '2-sql-tables/3-emissions-factors-table.csv': ['year', 'energy_type'],
+    '2-sql-tables/4-emissions-thresholds-table.csv': ['building_id', 'year'],
+    '2-sql-tables/5-calculated-emissions-table.csv': ['usage_id', 'factor_id'],
+}
+
+# Default tolerances of numeric columns
+RELATIVE_TOLERANCE = 1e-9
+ABSOLUTE_TOLERANCE = 1e-9
+
+# Words used to generate random addresses and property types for the function comparisons and property tests
+ADDRESS_WORDS = ['main', 'WASHINGTON', "o'neil's", 'and', 'AND', 'park', 'Boylston', 'blue hill', "d'angelo's", 'é']
+ADDRESS_SUFFIXES = ['ave', 'Ave.', 'AVENUE', 'av', 'av.', 'st', 'St.', 'street', 'STREET', 'hwy', 'Highway', 'rd',
+                    'Rd.', 'road', 'blvd', 'Blvd.', 'bl', 'boulevard', 'dr', 'Dr.', 'drive', 'parkway', 'pk', '']
+PROPERTY_TYPES = ['Office', 'Multifamily Housing', 'Retail Store', 'K-12 School', 'Hospital (General Medical & Surgical)',
+                  'Other', 'Parking', 'parking', 'Laboratory', 'Self-Storage Facility']
+
+
+def export_scripts(reference, destination):
+    """
+    Writes the scripts of a git revision, or of the working tree, to a directory.
+
+    Parameters:
+    reference (str): A git revision, or None for the working tree.
+    destination (str): The directory that receives the 'scripts' directory.
+    """
+    if reference is None:
+        shutil.copytree(os.path.join(REPOSITORY_DIRECTORY, 'scripts'), os.path.join(destination, 'scripts'),
+                        ignore=shutil.ignore_patterns('__pycache__', 'cache'))
+        return
+    archive = subprocess.run(['git', '-C', REPOSITORY_DIRECTORY, 'archive', reference, 'scripts'],
+                             check=True, capture_output=True).stdout
+    subprocess.run(['tar', '-x', '-C', destination], input=archive, check=True)
+
+
+def prepare_implementation(root, reference, scale, seed):
+    """
+    Builds a self-contained tree with the scripts of one implementation and the shared input data.
+
+    Modules like factor_registry find their reference files relative to the scripts, so every
+    implementation gets its own copy of the data-files directory.
+
+    Parameters:
+    root (str): An empty directory for the tree.
+    reference (str): A git revision, or None for the working tree.
+    scale (int): Copies of the real raw data, see synthetic_berdo.build_synthetic_data_tree.
+    seed (int): Seed of the synthetic data.
+
+    Returns:
+    dict: The 'scripts' and 'data' directories of the tree.
+    """
+    os.makedirs(root)
+    export_scripts(reference, root)
+    return build_synthetic_data_tree(root, scale, seed)
+
+
+def run_implementation(tree, environment=None):
+    """
+    Runs scripts 1-3 of a tree from prepare_implementation in a fresh process.
+
+    Parameters:
+    tree (dict): A tree from prepare_implementation.
+    environment (dict, optional): Extra environment variables, e.g. a pipeline backend.
+    """
+    subprocess.run([sys.executable, os.path.abspath(__file__), '--run-pipeline', tree['scripts']],
+                   check=True, env={**os.environ, **(environment or {})})
+
+
+def _run_pipeline_worker(scripts_directory):
+    # Runs the scripts of one tree with its own modules first on the import path
+    scripts_directory = os.path.abspath(scripts_directory)
+    sys.path.insert(0, scripts_directory)
+    os.chdir(scripts_directory)
+    for script in PIPELINE_SCRIPTS:
+        with contextlib.redirect_stdout(io.StringIO()):
+            script_globals = runpy.run_path(script, run_name='__main__')
+        # Script 1 does not write its separated data, so write it like its commented-out export
+        if script == '1-data_manipulation.py':
+            script_globals['df_berdo_reported_2022'].to_csv('../data-files/2-berdo_reported_2022.csv', index=False)
+            script_globals['df_berdo_reported_2023'].to_csv('../data-files/2-berdo_reported_2023.csv', index=False)
+
+
+def _canonical(df, keys):
+    # Rows sorted by the key columns and then all other columns; numbers sort as numbers, the rest as text
+    columns = [column for column in keys if column in df.columns] + [column for column in df.columns
+                                                                      if column not in keys]
+    sort_frame = pd.DataFrame({
+        index: df[column] if pd.api.types.is_numeric_dtype(df[column]) else df[column].astype(str)
+        for index, column in enumerate(columns)
+    })
+    order = sort_frame.sort_values(list(sort_frame.columns), kind='mergesort').index
+    return df.loc[order].reset_index(drop=True)
+
+
+def compare_frames(df_reference, df_candidate, keys=(), rtol=RELATIVE_TOLERANCE, atol=ABSOLUTE_TOLERANCE):
+    """
+    Compares two frames independent of row order, with tolerances for numeric columns.
+
+    Both frames are put in a canonical row order first. Columns that are numeric in both frames
+    match when they are close (NaN matches NaN); other columns are compared as text.
+
+    Parameters:
+    df_reference (pandas.DataFrame): Output of the reference implementation.
+    df_candidate (pandas.DataFrame): Output of the candidate implementation.
+    keys (list): Columns that identify a row, sorted on first.
+    rtol (float): Relative tolerance of numeric columns.
+    atol (float): Absolute tolerance of numeric columns.
+
+    Returns:
+    dict: 'equal', the row counts, missing and extra columns, whether the row order was already
+          the same, and per differing column the number of mismatches and the largest difference.
+    """
+    result = {
+        'reference_rows': len(df_reference), 'candidate_rows': len(df_candidate),
+        'missing_columns': [column for column in df_reference.columns if column not in df_candidate.columns],
+        'extra_columns': [column for column in df_candidate.columns if column not in df_reference.columns],
+        'same_row_order': None, 'column_differences': {},
+    }
+    if len(df_reference) != len(df_candidate):
+        result['equal'] = False
+        return result
+
+    keys = list(keys)
+    shared_columns = [column for column in df_reference.columns if column in df_candidate.columns]
+    reference = _canonical(df_reference[shared_columns], keys)
+    candidate = _canonical(df_candidate[shared_columns], keys)
+    result['same_row_order'] = bool(df_reference[shared_columns].reset_index(drop=True).astype(str)
+                                    .equals(df_candidate[shared_columns].reset_index(drop=True).astype(str)))
+
+    for column in shared_columns:
+        if pd.api.types.is_numeric_dtype(reference[column]) and pd.api.types.is_numeric_dtype(candidate[column]):
+            reference_values = reference[column].to_numpy(dtype=float)
+            candidate_values = candidate[column].to_numpy(dtype=float)
+            matches = np.isclose(reference_values, candidate_values, rtol=rtol, atol=atol, equal_nan=True)
+            difference = np.abs(reference_values - candidate_values)[~matches]
+            largest = float(np.nanmax(difference)) if len(difference) and not np.all(np.isnan(difference)) else None
+        else:
+            matches = (reference[column].fillna('').astype(str).to_numpy()
+                       == candidate[column].fillna('').astype(str).to_numpy())
+            largest = None
+        if not matches.all():
+            result['column_differences'][column] = {'mismatches': int((~matches).sum()), 'largest_difference': largest}
+
+    result['equal'] = not (result['missing_columns'] or result['extra_columns'] or result['column_differences'])
+    return result
+
+
+def compare_outputs(reference_data, candidate_data, rtol=RELATIVE_TOLERANCE, atol=ABSOLUTE_TOLERANCE):
+    """
+    Compares every pipeline output of two data-files directories.
+
+    Parameters:
+    reference_data (str): data-files directory of the reference run.
+    candidate_data (str): data-files directory of the candidate run.
+    rtol (float): Relative tolerance of numeric columns.
+    atol (float): Absolute tolerance of numeric columns.
+
+    Returns:
+    dict: Output file -> comparison from compare_frames, plus whether the files are byte-identical.
+          Outputs only the candidate writes, e.g. against a revision from before they were added,
+          are marked as 'new' and do not count as differences.
+    """
+    comparisons = {}
+    for file_name, keys in OUTPUT_KEYS.items():
+        reference_path = os.path.join(reference_data, file_name)
+        candidate_path = os.path.join(candidate_data, file_name)
+        if not os.path.exists(reference_path) and os.path.exists(candidate_path):
+            comparisons[file_name] = {'equal': True, 'identical': False, 'new': True}
+            continue
+        if not os.path.exists(reference_path) or not os.path.exists(candidate_path):
+            comparisons[file_name] = {'equal': False, 'identical': False,
+                                      'missing_file': 'reference' if not os.path.exists(reference_path)
+                                      else 'candidate'}
+            continue
+        with open(reference_path, 'rb') as reference_file, open(candidate_path, 'rb') as candidate_file:
+            identical = reference_file.read() == candidate_file.read()
+        if identical:
+            comparisons[file_name] = {'equal': True, 'identical': True}
+            continue
+        comparison = compare_frames(pd.read_csv(reference_path, low_memory=False),
+                                    pd.read_csv(candidate_path, low_memory=False), keys, rtol, atol)
+        comparisons[file_name] = {**comparison, 'identical': False}
+    return comparisons
+
+
+def load_script_functions(path, names):
+    """
+    Loads function definitions from a pipeline script without running its module-level code.
+
+    Parameters:
+    path (str): A pipeline script, e.g. 2-data_preprocessing.py.
+    names (list): The functions to load.
+
+    Returns:
+    dict: Function name -> function.
+    """
+    with open(path) as script_file:
+        tree = ast.parse(script_file.read(), filename=path)
+    # Keep the imports the functions rely on, skipping the pipeline's own modules
+    nodes = [node for node in tree.body if isinstance(node, ast.FunctionDef) and node.name in names]
+    nodes += [node for node in tree.body if isinstance(node, ast.Import)]
+    namespace = {'pd': pd, 're': re, 'np': np}
+    exec(compile(ast.Module(body=nodes, type_ignores=[]), path, 'exec'), namespace)
+    return {name: namespace[name] for name in names}
+
+
+def load_module(path, name):
+    """
+    Imports a module of one implementation under its own name.
+
+    Parameters:
+    path (str): The module file.
+    name (str): A unique module name.
+
+    Returns:
+    module: The imported module.
+    """
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def load_address_standardizer(scripts_directory, name):
+    """
+    Loads standardize_address_extended of one implementation.
+
+    The function lives in addresses.py, or in script 1 in revisions from before addresses.py.
+
+    Parameters:
+    scripts_directory (str): scripts directory of the implementation.
+    name (str): A unique module name for addresses.py.
+
+    Returns:
+    callable: The implementation's standardize_address_extended.
+    """
+    path = os.path.join(scripts_directory, 'addresses.py')
+    if os.path.exists(path):
+        return load_module(path, name).standardize_address_extended
+    return load_script_functions(os.path.join(scripts_directory, '1-data_manipulation.py'),
+                                 ['standardize_address_extended'])['standardize_address_extended']
+
+
+def random_address(generator):
+    """
+    Generates a random Boston-style building address with varied case, spacing and street types.
+
+    Parameters:
+    generator (random.Random): The random generator.
+
+    Returns:
+    str: The address.
+    """
+    words = [str(generator.randint(1, 999))]
+    if generator.random() < 0.3:
+        words[0] += generator.choice(['-' + str(generator.randint(1, 999)), 'st', 'ND', 'th', 'A'])
+    words += generator.sample(ADDRESS_WORDS, generator.randint(1, 3)) + [generator.choice(ADDRESS_SUFFIXES)]
+    separator = generator.choice([' ', '  '])
+    return generator.choice(['', ' ']) + separator.join(words) + generator.choice(['', ' ', '.'])
+
+
+def random_property_types(generator):
+    """
+    Generates a random 'All Property Types' cell, including the empty and numeric cells of the raw data.
+
+    Parameters:
+    generator (random.Random): The random generator.
+
+    Returns:
+    str: The cell.
+    """
+    types = generator.sample(PROPERTY_TYPES, generator.randint(1, 3))
+    cell = generator.choice([',', ', ', ' , ']).join(types)
+    return generator.choice([cell, cell, ',', 'nan', ' ' + cell + ' ', str(generator.randint(0, 9))])
+
+
+def random_property_type_row(generator):
+    """
+    Generates a random row with a 'Largest Property Type' and 'All Property Types', either possibly missing.
+
+    Parameters:
+    generator (random.Random): The random generator.
+
+    Returns:
+    pandas.Series: The row.
+    """
+    return pd.Series({
+        'Largest Property Type': generator.choice([np.nan, '', 0, generator.choice(PROPERTY_TYPES)]),
+        'All Property Types': generator.choice([np.nan, random_property_types(generator)]),
+    })
+
+
+def _check(name, generator, examples, make_input, check):
+    # Runs a comparison over random inputs and keeps the first counterexamples
+    failures = []
+    for _ in range(examples):
+        value = make_input(generator)
+        try:
+            passed = check(value)
+        except Exception as error:
+            passed, value = False, (value, repr(error))
+        if not passed:
+            failures.append(value)
+    return {'property': name, 'examples': examples, 'failures': len(failures), 'counterexamples': failures[:3]}
+
+
+def check_reference_functions(reference_scripts, candidate_scripts, examples=500, seed=0):
+    """
+    Compares the address and property type cleaning functions with the reference on random inputs.
+
+    The invariants of the candidate's own functions (idempotent addresses, emissions formulas
+    that agree, penalties only above the threshold) are tests in tests/test_properties.py.
+
+    Parameters:
+    reference_scripts (str): scripts directory of the reference implementation.
+    candidate_scripts (str): scripts directory of the candidate implementation.
+    examples (int): Random inputs per function.
+    seed (int): Seed of the random inputs.
+
+    Returns:
+    list: One dict per function with the number of examples and failures and a few counterexamples.
+    """
+    generator = random.Random(seed)
+    function_names = ['clean_cell', 'clean_largest_property_type']
+    reference_cleaning = load_script_functions(os.path.join(reference_scripts, '2-data_preprocessing.py'),
+                                               function_names)
+    candidate_cleaning = load_script_functions(os.path.join(candidate_scripts, '2-data_preprocessing.py'),
+                                               function_names)
+    reference_standardize = load_address_standardizer(reference_scripts, 'reference_addresses')
+    candidate_standardize = load_address_standardizer(candidate_scripts, 'candidate_addresses')
+
+    return [
+        _check('standardize_address_extended matches the reference', generator, examples, random_address,
+               lambda address: candidate_standardize(address) == reference_standardize(address)),
+        _check('clean_cell matches the reference', generator, examples, random_property_types,
+               lambda cell: candidate_cleaning['clean_cell'](cell) == reference_cleaning['clean_cell'](cell)),
+        _check('clean_largest_property_type matches the reference', generator, examples, random_property_type_row,
+               lambda row: candidate_cleaning['clean_largest_property_type'](row)
+               == reference_cleaning['clean_largest_property_type'](row)),
+    ]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Checks that a candidate pipeline produces the reference outputs.')
+    parser.add_argument('--reference', default='HEAD', help='git revision of the reference scripts, default HEAD')
+    parser.add_argument('--candidate', help='git revision of the candidate scripts, default the working tree')
+    parser.add_argument('--candidate-env', nargs='*', default=[], metavar='KEY=VALUE',
+                        help='environment of the candidate run, e.g. BERDO_PIPELINE_BACKEND=duckdb')
+    parser.add_argument('--scale', type=int, default=1, help='copies of the real raw data, default 1')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the synthetic data and the function checks')
+    parser.add_argument('--rtol', type=float, default=RELATIVE_TOLERANCE, help='relative tolerance of numbers')
+    parser.add_argument('--atol', type=float, default=ABSOLUTE_TOLERANCE, help='absolute tolerance of numbers')
+    parser.add_argument('--examples', type=int, default=500, help='random inputs per function check')
+    parser.add_argument('--functions-only', action='store_true', help='skip running the pipelines')
+    parser.add_argument('--run-pipeline', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    # Worker process of run_implementation
+    if args.run_pipeline:
+        _run_pipeline_worker(args.run_pipeline)
+        sys.exit(0)
+
+    equivalent = True
+    with tempfile.TemporaryDirectory(prefix='berdo-equivalence-') as root:
+        reference_tree = prepare_implementation(os.path.join(root, 'reference'), args.reference, args.scale,
+                                                args.seed)
+        candidate_tree = prepare_implementation(os.path.join(root, 'candidate'), args.candidate, args.scale,
+                                                args.seed)
+
+        if not args.functions_only:
+            run_implementation(reference_tree)
+            run_implementation(candidate_tree, dict(pair.split('=', 1) for pair in args.candidate_env))
+            for file_name, comparison in compare_outputs(reference_tree['data'], candidate_tree['data'],
+                                                         args.rtol, args.atol).items():
+                equivalent &= comparison['equal']
+                status = 'new' if comparison.get('new') else 'identical' if comparison['identical'] \
+                    else 'equal' if comparison['equal'] else 'DIFFERENT'
+                print(f'{status:>10}  {file_name}')
+                if not comparison['equal']:
+                    details = {key: value for key, value in comparison.items() if key not in ('equal', 'identical')}
+                    print(f'            {details}')
+
+        for result in check_reference_functions(os.path.join(root, 'reference', 'scripts'),
+                                                os.path.join(root, 'candidate', 'scripts'), args.examples, args.seed):
+            equivalent &= result['failures'] == 0
+            status = 'passed' if result['failures'] == 0 else 'FAILED'
+            print(f"{status:>10}  {result['property']} ({result['failures']}/{result['examples']} failures)")
+            for counterexample in result['counterexamples']:
+                print(f'            {counterexample!r}')
+
+    print('Candidate is equivalent to the reference' if equivalent else 'Candidate differs from the reference')
+    sys.exit(0 if equivalent else 1)
@@ -0,0 +1,121 @@
+import csv
+import os
+import re
+import shutil
+from collections import Counter
+
+import numpy as np
+
+
+DATA_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data-files')
+
+# Raw BERDO files the synthetic data is scaled from, read and written with their original encoding
+RAW_FILES = ['0-berdo-raw-data-2022.csv', '0-berdo-raw-data-2023.csv']
+RAW_ENCODING = 'ISO-8859-1'
+
+# Reference files the pipeline reads besides the raw data
+STATIC_FILES = ['1-corrections.csv', '1-emissions-factors.csv', '1-property-types.csv', '1-thresholds-berdo.csv']
+
+# Output directories of the pipeline scripts
+OUTPUT_DIRECTORIES = ['1-preprocessed-emissions-data', '2-sql-tables']
+
+# Every further copy of the raw data gets its own BERDO ID range after the real BERDO IDs. The ranges
+# start with a 9, so they also sort after the real BERDO IDs as text and the corrections manifest,
+# keyed on the real BERDO IDs, only applies to the first copy
+BERDO_ID_BASE = 9000000000
+BERDO_ID_OFFSET = 1000000
+
+# Numeric columns whose values are varied between copies, identified by a header substring. Site EUI is left as is:
+# floor area and usage are scaled by the same factor, so it still equals usage / GFA, as script 2 validates
+VARIED_COLUMNS = ['Gross Floor Area', 'Usage (kBtu)', 'Usage Intensity']
+
+
+def _offset_ids(value, copy):
+    # Shifts every id in a cell, so campus cells listing several BERDO IDs stay consistent
+    if not copy:
+        return value
+    offset = BERDO_ID_BASE + copy * BERDO_ID_OFFSET
+    return re.sub(r'\d+', lambda match: str(int(match.group()) + offset), value)
+
+
+def _vary_number(value, factor):
+    try:
+        return f'{float(value) * factor:.1f}'
+    except ValueError:
+        return value
+
+
+def write_synthetic_raw_file(source_path, output_path, scale, seed=0):
+    """
+    Writes a BERDO-shaped raw file made of `scale` copies of a real raw file.
+
+    The header is copied verbatim, so the column layout, the multi-line headers and the
+    encoding quirks the pipeline works around are the same as in the real file. The first copy
+    is the real data; every further copy shifts the BERDO IDs into its own range and scales
+    floor area and usage by a random factor per building. The corrections manifest only fixes the
+    duplicate BERDO IDs of the real data, so further copies leave out the rows of duplicated BERDO IDs.
+
+    Parameters:
+    source_path (str): A raw BERDO file, e.g. 0-berdo-raw-data-2023.csv.
+    output_path (str): The synthetic file to write.
+    scale (int): Number of copies of the source rows.
+    seed (int): Seed of the random usage variation.
+
+    Returns:
+    int: The number of data rows written.
+    """
+    with open(source_path, encoding=RAW_ENCODING, newline='') as source:
+        rows = list(csv.reader(source))
+    header, data = rows[0], rows[1:]
+
+    id_columns = [index for index, name in enumerate(header) if 'BERDO ID' in name or 'Campus ID' in name]
+    id_counts = Counter(row[0].strip() for row in data)
+    unique_data = [row for row in data if id_counts[row[0].strip()] == 1]
+    varied_columns = [index for index, name in enumerate(header) if any(part in name for part in VARIED_COLUMNS)]
+    generator = np.random.default_rng(seed)
+
+    with open(output_path, 'w', encoding=RAW_ENCODING, newline='') as output:
+        writer = csv.writer(output)
+        writer.writerow(header)
+        for copy in range(scale):
+            copy_data = unique_data if copy else data
+            factors = generator.lognormal(0, 0.2, size=len(copy_data))
+            for row, factor in zip(copy_data, factors):
+                row = list(row)
+                for index in id_columns:
+                    row[index] = _offset_ids(row[index], copy)
+                if copy:
+                    for index in varied_columns:
+                        row[index] = _vary_number(row[index], factor)
+                writer.writerow(row)
+    return len(data) + (scale - 1) * len(unique_data)
+
+
+def build_synthetic_data_tree(root, scale, seed=0):
+    """
+    Builds a data-files tree with synthetic raw BERDO data that the pipeline scripts can run on.
+
+    The scripts read '../data-files/...' relative to their working directory, so they are run
+    from the returned scripts directory.
+
+    Parameters:
+    root (str): An empty directory for the tree.
+    scale (int): Number of copies of the real raw data.
+    seed (int): Seed of the random usage variation.
+
+    Returns:
+    dict: The 'scripts' working directory, the 'data' directory and the 'raw_rows' per raw file.
+    """
+    data_directory = os.path.join(root, 'data-files')
+    scripts_directory = os.path.join(root, 'scripts')
+    for directory in [scripts_directory] + [os.path.join(data_directory, name) for name in OUTPUT_DIRECTORIES]:
+        os.makedirs(directory, exist_ok=True)
+
+    for file_name in STATIC_FILES:
+        shutil.copy(os.path.join(DATA_DIRECTORY, file_name), os.path.join(data_directory, file_name))
+
+    raw_rows = {}
+    for file_name in RAW_FILES:
+        raw_rows[file_name] = write_synthetic_raw_file(os.path.join(DATA_DIRECTORY, file_name),
+                                                       os.path.join(data_directory, file_name), scale, seed)
+    return {'scripts': scripts_directory, 'data': data_directory, 'raw_rows': raw_rows}
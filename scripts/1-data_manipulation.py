@@ -1,83 +1,32 @@
-import pandas as pd
-import re
+import os
 
+import pandas as pd
 
-def fix_encoding(text):
-    if isinstance(text, str):
-        return text.encode('ISO-8859-1').decode('utf-8')
-    return text
+from addresses import standardize_address_extended
+from corrections import apply_corrections, load_corrections
+from delta_ingest import (add_pending_ids, berdo_keys, changed_berdo_ids, hash_berdo_rows, is_delta_mode,
+                          link_corrected_ids, load_row_hashes, merge_delta_rows, read_persisted_output,
+                          save_row_hashes)
+from dtype_policy import apply_dtype_policy, print_memory_report
+from pipeline_stages import start_stage, end_stage, report_stages
+from raw_ingest import read_raw_berdo_file
 
 
-def standardize_address_extended(address):
+def split_reported_datasets(df):
     """
-    Standardizes various components of an address string to a consistent format.
-
-    This function takes an address string and replaces certain address components
-    with their standardized abbreviations. It handles common street types such as
-    "Avenue", "Street", "Highway", "Road", "Boulevard", "Drive", and "Parkway",
-    converting them to their respective abbreviations like "Ave", "St", "Hwy",
-    "Rd", "Blvd", "Dr", and "Pkwy". The function ignores case and matches both
-    with and without trailing periods.
-
-    Parameters:
-    address (str): The address string to be standardized.
-
-    Returns:
-    str: The standardized address string with the appropriate components replaced.
-    """
-    # Extend the patterns to include more address components
-    patterns_extended = {
-        r'\bAve\b\.?': 'Ave',      # Matches "Ave" and "Ave." with "Ave"
-        r'\bAvenue\b': 'Ave',      # Matches "Avenue" with "Ave"
-        r'\bAv\b\.?': 'Ave',       # Matches "Av" and "Av." with "Ave"
-        r'\bStreet\b': 'St',       # Matches "Street" with "St"
-        r'\bSt\b\.?': 'St',        # Matches "St" and "St." with "St"
-        r'\bHighway\b': 'Hwy',     # Matches "Highway" with "Hwy"
-        r'\bHwy\b\.?': 'Hwy',      # Matches "Hwy" and "Hwy." with "Hwy"
-        r'\bRoad\b': 'Rd',         # Matches "Road" with "Rd"
-        r'\bRd\b\.?': 'Rd',        # Matches "Rd" and "Rd." with "Rd"
-        r'\bBoulevard\b': 'Blvd',  # Matches "Boulevard" with "Blvd"
-        r'\bBlvd\b\.?': 'Blvd',    # Matches "Blvd" and "Blvd." with "Blvd"
-        r'\bBl\b\.?': 'Blvd',      # Matches "Bl" and "Bl." with "Blvd"
-        r'\bDrive\b': 'Dr',        # Matches "Drive" with "Dr"
-        r'\bDr\b\.?': 'Dr',        # Matches "Dr" and "Dr." with "Dr"
-        r'\bParkway\b': 'Pkwy',    # Matches "Parkway" with "Pkwy"
-    }
-
-    # Ensure the address is title-cased
-    address = address.title()
-
-    # Do not capitalize "and" if it is a standalone word
-    address = re.sub(r'\bAnd\b', 'and', address)
-
-    # Do not capitalize an 's' following an apostrophe
-    address = re.sub(r"\'S\b", "'s", address)
-
-    # Iterate over the patterns and apply the replacements
-    for pattern, replacement in patterns_extended.items():
-        address = re.sub(pattern, replacement, address, flags=re.IGNORECASE)
-
-    # Fix the capitalization issue for ordinal numbers
-    address = re.sub(r'(\d+)([A-Za-z]+)', lambda x: x.group(1) + x.group(2).lower(), address)
-
-    return address
-
-
-def filter_empty_datasets(grouping):
-    """
-        Filters a DataFrame group to check if it contains data in "Total Site Energy Usage (kBtu)" column.
+        Splits a DataFrame sorted by BERDO ID into the BERDO IDs with and without data in the
+        "Total Site Energy Usage (kBtu)" column.
 
         Parameters:
-        group (DataFrame): A DataFrame group by BERDO ID.
+        df (DataFrame): BERDO data sorted by BERDO ID.
 
         Returns:
-        DataFrame: The same group if it meets the criteria (contains data in desired column),
-                   otherwise returns None.
+        tuple: (rows of BERDO IDs that contain data in the desired column, rows of the other BERDO IDs)
         """
-    if grouping['Total Site Energy Usage (kBtu)'].dropna().empty:
-        return None
-    else:
-        return grouping
+    # Rows without a BERDO ID belong to neither group
+    df = df[df['BERDO ID'].notna()]
+    reported = df['Total Site Energy Usage (kBtu)'].notna().groupby(df['BERDO ID']).transform('any')
+    return df[reported], df[~reported]
 
 
 def check_for_duplicates(df, column_name):
@@ -103,14 +52,33 @@ def check_for_duplicates(df, column_name):
 # File paths to BERDO Data 2021-2023
 file_path_2022 = '../data-files/0-berdo-raw-data-2022.csv'
 file_path_2023 = '../data-files/0-berdo-raw-data-2023.csv'
-
-# Load file paths and create dataframes
-df_2022 = pd.read_csv(file_path_2022, encoding='ISO-8859-1', skipinitialspace=True)
-df_2023 = pd.read_csv(file_path_2023, encoding='ISO-8859-1', skipinitialspace=True)
-
-# Clean columns of leading characters
-df_2022.columns = df_2022.columns.str.strip().str.replace('\n', '').str.replace('\r', '')
-df_2023.columns = df_2023.columns.str.strip().str.replace('\n', '').str.replace('\r', '')
+# File path to the manual fixes of the BERDO data
+file_path_corrections = '../data-files/1-corrections.csv'
+# File paths to the separated BERDO data, written here in delta mode
+file_path_reported_2022 = '../data-files/2-berdo_reported_2022.csv'
+file_path_reported_2023 = '../data-files/2-berdo_reported_2023.csv'
+
+# Load file paths and create dataframes, repairing the encoding and normalizing the headers while reading
+start_stage('ingest')
+df_2022 = read_raw_berdo_file(file_path_2022)
+df_2023 = read_raw_berdo_file(file_path_2023)
+df_corrections = load_corrections(file_path_corrections)
+
+# In delta mode, keep only the BERDO IDs whose raw rows or corrections changed since the previous run;
+# the first run, or a run without separated data to merge into, processes everything
+delta_mode = is_delta_mode()
+delta_ids = None
+if delta_mode:
+    df_row_hashes = pd.concat([hash_berdo_rows(df_2022, 2022), hash_berdo_rows(df_2023, 2023),
+                               hash_berdo_rows(df_corrections, 'corrections', key_column='berdo_id')], axis=0)
+    df_previous_hashes = load_row_hashes()
+    if (df_previous_hashes is not None and os.path.exists(file_path_reported_2022)
+            and os.path.exists(file_path_reported_2023)):
+        delta_ids = link_corrected_ids(changed_berdo_ids(df_row_hashes, df_previous_hashes), df_corrections)
+        df_2022 = df_2022[berdo_keys(df_2022['BERDO ID']).isin(delta_ids)]
+        df_2023 = df_2023[berdo_keys(df_2023['BERDO ID']).isin(delta_ids)]
+        df_corrections = df_corrections[df_corrections['berdo_id'].isin(delta_ids)]
+    print(f"Delta ingest: {'all' if delta_ids is None else len(delta_ids)} changed BERDO IDs")
 
 # Columns to remove from data
 columns_to_drop_2023 = ['Building Address City', 'Parcel Address City', 'Reported Enclosed Parking Area (Sq Ft)',
@@ -118,25 +86,23 @@ columns_to_drop_2023 = ['Building Address City', 'Parcel Address City', 'Reporte
                         'Community Choice Electricity Participation',
                         'Renewable Energy Purchased through a Power Purchase Agreement (PPA)',
                         'Renewable Energy Certificate (REC) Purchase', 'Backup Generator', 'Battery Storage',
-                        'Electric Vehicle (EV) Charging', 'Notes']
+                        'Electric Vehicle (EV) Charging', 'Notes', 'Water Usage Intensity (Gallons/ft2)']
 
 columns_to_drop_2022 = ['Building Address City', 'Parcel Address City', 'Reported Enclosed Parking Area (Sq Ft)',
                         'Energy Star Score', 'Compliance Status', 'BERDO Reporting Status',
                         'Community Choice Electricity Participation',
                         'Renewable Energy Purchased through a Power Purchase Agreement (PPA)',
                         'Renewable Energy Certificate (REC) Purchase', 'Backup Generator', 'Battery Storage',
-                        'Electric Vehicle (EV) Charging', 'Notes']
+                        'Electric Vehicle (EV) Charging', 'Notes', 'Water Usage Intensity (Gallons/ft2)']
 
 # Two DataFrames with 2022 and 2023 data without unnecessary columns
 df_with_drop_2023 = df_2023.drop(columns_to_drop_2023, axis=1)
 df_with_drop_2022 = df_2022.drop(columns_to_drop_2022, axis=1)
 
-# Remove column for water data that is unable to be removed due to decoding
-column_index = 25
-df_with_drop_2022 = df_with_drop_2022.drop(df_with_drop_2022.columns[column_index], axis=1)
-df_with_drop_2023 = df_with_drop_2023.drop(df_with_drop_2023.columns[column_index], axis=1)
+end_stage(rows_out=len(df_with_drop_2022) + len(df_with_drop_2023))
 
 # Fill empty cells in Building Address column with an empty string
+start_stage('address normalization', rows_in=len(df_with_drop_2022) + len(df_with_drop_2023))
 df_with_drop_2022['Building Address'] = df_with_drop_2022['Building Address'].fillna('')
 df_with_drop_2023['Building Address'] = df_with_drop_2023['Building Address'].fillna('')
 
@@ -164,28 +130,18 @@ df_clean_2022.loc[:, 'Building Address'] = df_clean_2022['Building Address'].app
 # Apply the extended standardization function to the Parcel Address column
 df_clean_2023.loc[:, 'Parcel Address'] = df_clean_2023['Parcel Address'].apply(standardize_address_extended)
 df_clean_2022.loc[:, 'Parcel Address'] = df_clean_2022['Parcel Address'].apply(standardize_address_extended)
+end_stage(rows_out=len(df_clean_2022) + len(df_clean_2023))
 
-
-# Ensure that BERDO IDs are in ascending order by sorting then groupby BERDO ID
-df_grouped_2023 = df_clean_2023.sort_values(by='BERDO ID', ascending=True).groupby('BERDO ID')
+# Ensure that BERDO IDs are in ascending order by sorting; the sorts are stable, so rows of one BERDO ID keep their
+# raw order whatever other rows the files hold, which is the order delta runs merge them in
+start_stage('reported split', rows_in=len(df_clean_2022) + len(df_clean_2023))
+df_sorted_2023 = df_clean_2023.sort_values(by='BERDO ID', ascending=True, kind='stable')
 # 2022 data does NOT need to be grouped because it does not require aggregation at this time
-df_clean_2022 = df_clean_2022.sort_values(by='BERDO ID', ascending=True)
-
-# Initialize an empty list to store both the filtered data with and without reported energy usage
-berdo_reported_list_2023 = []
-berdo_not_reported_list_2023 = []
+df_clean_2022 = df_clean_2022.sort_values(by='BERDO ID', ascending=True, kind='stable')
 
-# Iterate over Site Energy Usage column to determine if property was reported on in 2023
-for name, group in df_grouped_2023:
-    filtered_group = filter_empty_datasets(group)
-    if filtered_group is not None:
-        berdo_reported_list_2023.append(filtered_group)
-    else:
-        berdo_not_reported_list_2023.append(group)
-
-# Creat DataFrame for the two lists created for BERDO data that was or was not reported in 2023
-df_berdo_reported_2023 = pd.concat(berdo_reported_list_2023)
-df_berdo_not_reported_2023 = pd.concat(berdo_not_reported_list_2023)
+# Split the BERDO data on whether each property was reported on in 2023
+df_berdo_reported_2023, df_berdo_not_reported_2023 = split_reported_datasets(df_sorted_2023)
+df_berdo_reported_2023 = df_berdo_reported_2023.copy()
 
 # Add a Data Year column to df_berdo_reported and make it 2023
 df_berdo_reported_2023['Data Year'] = 2022
@@ -197,79 +153,32 @@ df_berdo_2022 = df_berdo_not_reported_2023[['BERDO ID']].merge(df_clean_2022, ho
 merged_ids = df_berdo_2022['BERDO ID'].unique()
 df_berdo_never_reported_1 = df_berdo_not_reported_2023[~df_berdo_not_reported_2023['BERDO ID'].isin(merged_ids)]
 
-# Group 2022 data so that it can be iterated over for separation
-df_grouped_2022 = df_berdo_2022.sort_values(by='BERDO ID', ascending=True).groupby('BERDO ID')
-
-# Initialize an empty list to store both the filtered data with and without reported energy usage
-berdo_reported_list_2022 = []
-berdo_not_reported_list_2022 = []
+# Sort 2022 data by BERDO ID for separation
+df_sorted_2022 = df_berdo_2022.sort_values(by='BERDO ID', ascending=True, kind='stable')
 
-# Iterate over Site Energy Usage column to determine if property was reported on in 2023
-for name, group in df_grouped_2022:
-    filtered_group = filter_empty_datasets(group)
-    if filtered_group is not None:
-        berdo_reported_list_2022.append(filtered_group)
-    else:
-        berdo_not_reported_list_2022.append(group)
-
-# Creat DataFrame for the two lists created for BERDO data that was or was not reported in 2022
-df_berdo_reported_2022 = pd.concat(berdo_reported_list_2022)
-df_berdo_not_reported_2022 = pd.concat(berdo_not_reported_list_2022)
+# Split the BERDO data on whether each property was reported on in 2022
+df_berdo_reported_2022, df_berdo_not_reported_2022 = split_reported_datasets(df_sorted_2022)
+df_berdo_reported_2022 = df_berdo_reported_2022.copy()
 
 # Add a Data Year column to df_berdo_reported and make it 2021
 df_berdo_reported_2022['Data Year'] = 2021
 
 # Concatenate the data that was reported in neither 2022 nor 2023
 df_berdo_never_reported = pd.concat([df_berdo_never_reported_1, df_berdo_not_reported_2022], axis=0)
-df_berdo_never_reported = df_berdo_never_reported.sort_values(by='BERDO ID', ascending=True)
-
-# Add indexes to the reported BERDO data so that they can be sorted to remove duplicate values
-df_berdo_reported_2022['_id'] = df_berdo_reported_2022.index
-df_berdo_reported_2023['_id'] = df_berdo_reported_2023.index
-
-# # Get rid of all duplicate BERDO IDs in the 2023 datasets
-# Gets rid of duplicate condition 500 Walk Hill St
-df_berdo_reported_2023 = df_berdo_reported_2023[df_berdo_reported_2023['_id'] != 2506]
-
-# Corrects the BERDO ID for Tudor Place & adds necessary data
-df_berdo_reported_2023.loc[df_berdo_reported_2023['_id'] == 5958, 'BERDO ID'] = 106338
-df_berdo_reported_2023.loc[df_berdo_reported_2023['_id'] == 5958, 'Property Owner Name'] = 'TUDOR PLACE CONDO TRUST'
-
-# Add property owner name to BERDO ID 105780 and delete the unneeded row
-df_berdo_reported_2023.loc[df_berdo_reported_2023['_id'] == 5948, 'Property Owner Name'] = 'SIMMONS UNIVERSITY'
-df_berdo_reported_2023 = df_berdo_reported_2023[df_berdo_reported_2023['_id'] != 2733]
+df_berdo_never_reported = df_berdo_never_reported.sort_values(by='BERDO ID', ascending=True, kind='stable')
 
-# Add blank columns to 154 Ruskindale Rd and delete incomplete column
-ruskindale_new_values = {
-    'Property Owner Name': 'CITY OF BOSTON',
-    'Tax Parcel ID': 1803703000,
-    'Building Address': '154-164 Ruskindale Rd',
-    'Parcel Address': '154 156 ruskindale rd',
-    'Parcel Address Zip Code': 2136
-}
+end_stage(rows_out=len(df_berdo_reported_2022) + len(df_berdo_reported_2023) + len(df_berdo_never_reported))
 
-df_berdo_reported_2023.loc[df_berdo_reported_2023['_id'] == 5948, ['Property Owner Name', 'Tax Parcel ID',
-                                                                   'Building Address', 'Parcel Address',
-                                                                   'Parcel Address Zip Code']]\
-                                                                    = ruskindale_new_values.values()
+# Apply the manual fixes of the corrections manifest, keyed on BERDO ID and Data Year
+start_stage('corrections', rows_in=len(df_berdo_reported_2022) + len(df_berdo_reported_2023))
+df_berdo_reported_2023, df_corrections_report_2023 = apply_corrections(df_berdo_reported_2023, df_corrections)
+df_berdo_reported_2022, df_corrections_report_2022 = apply_corrections(df_berdo_reported_2022, df_corrections)
 
-df_berdo_reported_2023 = df_berdo_reported_2023[df_berdo_reported_2023['_id'] != 638]
-
-# Drop column for 150 Mass Ave that appears to be a single building in a campus
-df_berdo_reported_2023 = df_berdo_reported_2023[df_berdo_reported_2023['_id'] != 5917]
-
-# # Get rid of all duplicate BERDO IDs in the 2022 datasets
-# Get rid of duplicates for 1910-1920 Centre St
-df_berdo_reported_2022 = df_berdo_reported_2022[df_berdo_reported_2022['_id'] != 1901]
-
-# Get rid of duplicates for 52-68 Highland Park
-df_berdo_reported_2022 = df_berdo_reported_2022[df_berdo_reported_2022['_id'] != 2312]
-
-# Get rid of duplicates for 3033-3039 Washington St
-df_berdo_reported_2023 = df_berdo_reported_2023[df_berdo_reported_2023['_id'] != 830]
-
-# Add GFA for BERDO ID 104612
-df_berdo_reported_2023.loc[df_berdo_reported_2023['_id'] == 2708, 'Reported Gross Floor Area (Sq Ft)'] = 13440
+# Report the rules that were applied and warn about rules that no longer match any row
+df_corrections_report = pd.concat([df_corrections_report_2023, df_corrections_report_2022], axis=0)
+print(df_corrections_report[['rule_id', 'action', 'matched_rows']].to_string(index=False))
+for rule_id in df_corrections_report.loc[df_corrections_report['matched_rows'] == 0, 'rule_id']:
+    print(f'Warning: correction rule {rule_id} did not match any rows')
 
 # Check number of reported and non-reported data so that the total matches the total number of properties
 print(df_clean_2023['BERDO ID'].nunique())
@@ -282,14 +191,38 @@ print(df_berdo_never_reported['BERDO ID'].nunique())
 print(df_berdo_never_reported.shape)
 
 
-# Remove unique identifiers used for filtering duplicates
-df_berdo_reported_2022.drop(['_id', 'Unnamed: 40'], axis=1, inplace=True)
-df_berdo_reported_2023.drop('_id', axis=1, inplace=True)
-
-# Replace Site EUI column in 2023 data with a propertly encoded one
-column_index_EUI = 10
-df_berdo_reported_2023['Site EUI (Energy Use Intensity kBtu/ft2)'] = df_berdo_reported_2023.iloc[:, column_index_EUI]
-df_berdo_reported_2023.drop(df_berdo_reported_2023.columns[column_index_EUI], axis=1, inplace=True)
+# Remove the unnamed trailing column of the 2022 data
+df_berdo_reported_2022.drop('Unnamed: 40', axis=1, inplace=True)
+
+# Keep the Site EUI column last in the 2023 data, where the separated data has always had it
+df_berdo_reported_2023['Site EUI (Energy Use Intensity kBtu/ft2)'] = (
+    df_berdo_reported_2023.pop('Site EUI (Energy Use Intensity kBtu/ft2)'))
+
+# Convert the separated BERDO data to the compact dtypes of the dtype policy
+df_berdo_reported_2022 = apply_dtype_policy(df_berdo_reported_2022)
+df_berdo_reported_2023 = apply_dtype_policy(df_berdo_reported_2023)
+df_berdo_never_reported = apply_dtype_policy(df_berdo_never_reported)
+
+# In delta mode, merge the changed BERDO IDs into the separated data of the previous run, write it and
+# store the row hashes; script 2 picks up the changed BERDO IDs
+if delta_mode:
+    if delta_ids is not None:
+        df_berdo_reported_2022 = apply_dtype_policy(merge_delta_rows(
+            read_persisted_output(file_path_reported_2022, df_berdo_reported_2022), df_berdo_reported_2022,
+            delta_ids, ['BERDO ID']))
+        df_berdo_reported_2023 = apply_dtype_policy(merge_delta_rows(
+            read_persisted_output(file_path_reported_2023, df_berdo_reported_2023), df_berdo_reported_2023,
+            delta_ids, ['BERDO ID']))
+    df_berdo_reported_2022.to_csv(file_path_reported_2022, index=False)
+    df_berdo_reported_2023.to_csv(file_path_reported_2023, index=False)
+    save_row_hashes(df_row_hashes)
+    add_pending_ids(delta_ids)
+
+end_stage(rows_out=len(df_berdo_reported_2022) + len(df_berdo_reported_2023))
+report_stages()
+
+print_memory_report({'reported 2022': df_berdo_reported_2022, 'reported 2023': df_berdo_reported_2023,
+                     'never reported': df_berdo_never_reported})
 
 # # Add leading zero to zip codes
 # df_berdo_reported_2022['Building Address Zip Code'] = df_berdo_reported_2022['Building Address Zip Code'].astype(int)
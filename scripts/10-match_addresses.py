@@ -0,0 +1,34 @@
+import os
+import time
+
+from entity_resolution import MAX_BLOCK_SIZE, build_blocking_index, build_match_records, match_records, \
+    oversized_blocks, summarize_matches
+from raw_ingest import read_raw_berdo_file
+
+
+if __name__ == '__main__':
+    # File paths to the raw BERDO data of both years
+    file_paths = {2022: '../data-files/0-berdo-raw-data-2022.csv', 2023: '../data-files/0-berdo-raw-data-2023.csv'}
+    file_path_match_table = '../data-files/8-entity-resolution/1-address-match-table.csv'
+
+    # Raw data with repaired encoding and normalized headers, like the ingest of script 1
+    frames = {year: read_raw_berdo_file(file_path) for year, file_path in file_paths.items()}
+
+    # Link records across years and within each year through the blocking index
+    start = time.perf_counter()
+    df_matches = match_records(frames)
+    seconds = time.perf_counter() - start
+
+    os.makedirs('../data-files/8-entity-resolution', exist_ok=True)
+    df_matches.to_csv(file_path_match_table, index=False)
+
+    blocks = build_blocking_index(build_match_records(frames))
+    split_blocks = sorted({key.split(' #')[0] for key in blocks if ' #' in key})
+    print(f'{sum(len(df) for df in frames.values())} records, {len(blocks)} blocks, '
+          f'largest block {max(len(positions) for positions in blocks.values())} records')
+    if split_blocks:
+        print(f'Address blocks over {MAX_BLOCK_SIZE} records split by house number: {", ".join(split_blocks)}')
+    for key, size in oversized_blocks(blocks).items():
+        print(f'Warning: block {key} has {size} records and was not compared')
+    print(f'{len(df_matches)} pairs in {seconds:.1f} s')
+    print(summarize_matches(df_matches).to_string(index=False))
@@ -0,0 +1,35 @@
+import os
+
+import pandas as pd
+
+from emissions_reconciliation import build_reconciliation_frame, reconcile_emissions, summarize_reconciliation
+
+
+if __name__ == '__main__':
+    # File paths to the separated BERDO data with the city's emissions, and the preprocessed data with the computed ones
+    file_path_2022 = '../data-files/2-berdo_reported_2022.csv'
+    file_path_2023 = '../data-files/2-berdo_reported_2023.csv'
+    file_path_emissions_data = '../data-files/1-preprocessed-emissions-data/1-berdo-emissions-data.csv'
+    file_path_campus_data = '../data-files/1-preprocessed-emissions-data/2-berdo-campus-emissions-data.csv'
+    file_path_property_thresholds = '../data-files/1-thresholds-berdo.csv'
+
+    df_reported = pd.concat([pd.read_csv(file_path_2022), pd.read_csv(file_path_2023)], axis=0)
+    df_computed = pd.concat([pd.read_csv(file_path_emissions_data), pd.read_csv(file_path_campus_data)], axis=0)
+    df_property_thresholds = pd.read_csv(file_path_property_thresholds)
+
+    # Residuals, ratios and outlier flags of every building and reporting year
+    df_reconciliation = reconcile_emissions(build_reconciliation_frame(df_reported, df_computed),
+                                            df_property_thresholds)
+
+    # Totals per reporting year, and per cluster of data year, fuel mix and property type
+    df_year_summary = summarize_reconciliation(df_reconciliation, ['Data Year'])
+    df_cluster_summary = summarize_reconciliation(df_reconciliation, ['Data Year', 'fuel_mix', 'property_type'])
+
+    os.makedirs('../data-files/9-reconciliation', exist_ok=True)
+    df_reconciliation.to_csv('../data-files/9-reconciliation/1-building-reconciliation.csv', index=False)
+    df_cluster_summary.to_csv('../data-files/9-reconciliation/2-cluster-summary.csv', index=False)
+    df_year_summary.to_csv('../data-files/9-reconciliation/3-year-summary.csv', index=False)
+
+    print(df_reconciliation['status'].value_counts())
+    print(df_year_summary.to_string(index=False))
+    print(df_cluster_summary.sort_values('outliers', ascending=False).head(10).to_string(index=False))
@@ -0,0 +1,53 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from corrections import apply_corrections, load_corrections
+from emissions_model import THRESHOLD_YEARS, build_pipeline_factor_matrix, build_usage_matrix
+from factor_registry import get_factor_set
+from raw_ingest import read_raw_berdo_file
+from usage_history import (append_history, fit_usage_trends, prepare_history_rows, project_trend_emissions,
+                           read_building_history, read_history)
+
+
+if __name__ == '__main__':
+    # Raw BERDO files and the data year each one reports on
+    raw_files = {2021: '../data-files/0-berdo-raw-data-2022.csv', 2022: '../data-files/0-berdo-raw-data-2023.csv'}
+    file_path_corrections = '../data-files/1-corrections.csv'
+    store_directory = '../data-files/10-usage-history/store'
+
+    # Append the reported usage of every data year, with the manual fixes applied, to the store
+    df_corrections = load_corrections(file_path_corrections)
+    for data_year, file_path in raw_files.items():
+        df_raw = read_raw_berdo_file(file_path).assign(**{'Data Year': data_year})
+        df_raw, _ = apply_corrections(df_raw, df_corrections)
+        print(append_history(store_directory, prepare_history_rows(df_raw, data_year)))
+
+    # All data years of every building, and the history of one building
+    df_history = read_history(store_directory)
+    print(read_building_history(store_directory, [df_history['BERDO ID'].iloc[0]]))
+
+    # Yearly site EUI change of every building, applied to its last reported usage through 2050
+    df_trends = fit_usage_trends(df_history)
+    df_last = df_history.drop_duplicates('BERDO ID', keep='last').merge(df_trends, on='BERDO ID')
+    usage = build_usage_matrix(df_last)
+    factor_matrix = build_pipeline_factor_matrix(get_factor_set(), THRESHOLD_YEARS)
+    flat_emissions = project_trend_emissions(usage, factor_matrix, np.zeros(len(df_last)), df_last['Data Year'],
+                                             THRESHOLD_YEARS)
+    trend_emissions = project_trend_emissions(usage, factor_matrix, df_last['projected_change'], df_last['Data Year'],
+                                              THRESHOLD_YEARS)
+
+    df_projection = pd.DataFrame({
+        'BERDO ID': np.repeat(df_last['BERDO ID'].to_numpy(), len(THRESHOLD_YEARS)),
+        'year': np.tile(THRESHOLD_YEARS, len(df_last)),
+        'flat_mt_co2e': flat_emissions.ravel(),
+        'trend_mt_co2e': trend_emissions.ravel(),
+    })
+
+    os.makedirs('../data-files/10-usage-history', exist_ok=True)
+    df_trends.to_csv('../data-files/10-usage-history/1-usage-trends.csv', index=False)
+    df_projection.to_csv('../data-files/10-usage-history/2-trend-projection.csv', index=False)
+
+    print(df_trends['observed_years'].value_counts())
+    print(df_projection.groupby('year')[['flat_mt_co2e', 'trend_mt_co2e']].sum().loc[[2025, 2030, 2040, 2050]])
@@ -1,6 +1,16 @@
+import os
+
 import pandas as pd
 import re
 
+from data_validation import (berdo_validation_rules, check_validation, format_validation_summary,
+                             summarize_violations, validate_frame)
+from delta_ingest import (berdo_keys, clear_pending_ids, is_delta_mode, merge_delta_rows, read_pending_ids,
+                          read_persisted_output)
+from dtype_policy import apply_dtype_policy, print_memory_report
+from factor_registry import get_factor_set, factor_set_frame
+from pipeline_stages import start_stage, end_stage, report_stages
+
 
 def clean_cell(cell):
     """
@@ -90,37 +100,62 @@ def clean_largest_property_type(row):
     return row['Largest Property Type']
 
 
-# File paths to separated BERDO data and emissions factors for all fuel types each year through 2050
+# File paths to separated BERDO data
 file_path_2022 = '../data-files/2-berdo_reported_2022.csv'
 file_path_2023 = '../data-files/2-berdo_reported_2023.csv'
-file_path_emissions = '../data-files/1-emissions-factors.csv'
 file_path_property_types = '../data-files/1-property-types.csv'
+# File paths to the preprocessed BERDO data
+file_path_buildings = '../data-files/1-preprocessed-emissions-data/1-berdo-emissions-data.csv'
+file_path_campuses = '../data-files/1-preprocessed-emissions-data/2-berdo-campus-emissions-data.csv'
+file_path_violations = '../data-files/1-preprocessed-emissions-data/3-validation-violations.csv'
 
 # DataFrames for BERDO data and emissions factors
+start_stage('load reported data')
 df_berdo_reported_2022 = pd.read_csv(file_path_2022)
 df_berdo_reported_2023 = pd.read_csv(file_path_2023)
-df_berdo_emissions_factors = pd.read_csv(file_path_emissions)
+
+# In delta mode, keep only the BERDO IDs script 1 changed since this script last ran
+delta_ids = read_pending_ids() if is_delta_mode() else None
+if delta_ids is not None:
+    df_berdo_reported_2022 = df_berdo_reported_2022[berdo_keys(df_berdo_reported_2022['BERDO ID']).isin(delta_ids)]
+    df_berdo_reported_2023 = df_berdo_reported_2023[berdo_keys(df_berdo_reported_2023['BERDO ID']).isin(delta_ids)]
+    print(f'Delta ingest: {len(delta_ids)} changed BERDO IDs')
+# Emissions factors for all fuel types each year through 2050 from the registered ordinance factor set
+df_berdo_emissions_factors = factor_set_frame(get_factor_set())
+# Load in BERDO property types mapping
+df_property_types = pd.read_csv(file_path_property_types)
 
 # Concatenated DataFrame for all BERDO Data
 df_berdo_data = pd.concat([df_berdo_reported_2022, df_berdo_reported_2023], axis=0)
 
 # Merged DataFrame including emissions factors data
 df_berdo = pd.merge(df_berdo_data, df_berdo_emissions_factors, on=['Data Year'], how='left')
+end_stage(rows_out=len(df_berdo))
 
 # Remove unneeded columns
 df_berdo = df_berdo.drop(['Estimated Total GHG Emissions (kgCO2e)'], axis=1)
 
 # Convert Property Type columns to strings
+start_stage('property type cleaning', rows_in=len(df_berdo))
 df_berdo['Largest Property Type'] = df_berdo['Largest Property Type'].astype(str)
 df_berdo['All Property Types'] = df_berdo['All Property Types'].astype(str)
 # Clean Property Type columns of all whitespace and replace columns with just a comma with a zero
 df_berdo['Largest Property Type'] = df_berdo['Largest Property Type'].apply(lambda x: clean_cell(x))
 df_berdo['All Property Types'] = df_berdo['All Property Types'].apply(lambda x: clean_cell(x))
+end_stage(rows_out=len(df_berdo))
+
+# Validate the reported data against the declared rules while missing values are still missing
+start_stage('validation', rows_in=len(df_berdo))
+validation_rules = berdo_validation_rules(df_property_types['Largest Property Type'])
+df_violations = validate_frame(df_berdo, validation_rules)
 
 # Fill in all NaN's with 0's
 df_berdo.fillna(0, inplace=True)
 
+end_stage(rows_out=len(df_berdo))
+
 # Add columns for emissions by fuel source for each Data Year/BERDO ID
+start_stage('fuel emissions', rows_in=len(df_berdo))
 df_berdo['Electricity Emissions (MT CO2e)'] = (
     (df_berdo['Electricity Usage (kBtu)'] - df_berdo['Renewable System Electricity Usage Onsite (kBtu)']) / 1000
 ) * df_berdo['Electricity Emissions'] / 1000
@@ -167,18 +202,24 @@ GHG_emissions_columns = ['Electricity Emissions (MT CO2e)', 'Natural Gas Emissio
 df_berdo['Total GHG Emissions (MT CO2e)'] = df_berdo[GHG_emissions_columns].sum(axis=1)
 df_berdo['Total GHG Emissions (MT CO2e)'] = df_berdo['Total GHG Emissions (MT CO2e)'].round().astype(int)
 
+end_stage(rows_out=len(df_berdo))
+
 # Remove rows with no value for Largest Property Type and replace it with All Property Types column
-df_berdo['Largest Property Type'] = df_berdo.apply(clean_largest_property_type, axis=1)
+start_stage('largest property type', rows_in=len(df_berdo))
+df_berdo['Largest Property Type'] = df_berdo.apply(clean_largest_property_type, axis=1, result_type='reduce')
 
 # # If All Property Types is now the same as Largest Property Type, then zero out the All Property Types
 # df_berdo['All Property Types'] = df_berdo.apply(
 #     lambda row: 0 if row['Largest Property Type'] == row['All Property Types'] else row['All Property Types'],
 #     axis=1)
 
+end_stage(rows_out=len(df_berdo))
+
 # Filter out rows that have more than one BERDO ID in the BERDO ID column to move campus projects to another DataFrame
-df_berdo_buildings = df_berdo[df_berdo['BERDO ID'].apply(is_integer)].copy()
+start_stage('campus split and export', rows_in=len(df_berdo))
+df_berdo_buildings = df_berdo[df_berdo['BERDO ID'].apply(is_integer).astype(bool)].copy()
 df_berdo_buildings['BERDO ID'] = df_berdo_buildings['BERDO ID'].astype(int)
-df_berdo_campuses = df_berdo[~df_berdo['BERDO ID'].apply(is_integer)].copy()
+df_berdo_campuses = df_berdo[~df_berdo['BERDO ID'].apply(is_integer).astype(bool)].copy()
 
 # Add leading zero to zip codes
 df_berdo['Building Address Zip Code'] = df_berdo['Building Address Zip Code'].astype(int)
@@ -187,25 +228,50 @@ df_berdo['Building Address Zip Code'] = df_berdo['Building Address Zip Code'].ap
 df_berdo['Parcel Address Zip Code'] = df_berdo['Parcel Address Zip Code'].apply(add_leading_zero)
 
 # Sort BERDO buildings by BERDO ID
-df_berdo_buildings = df_berdo_buildings.sort_values(by='BERDO ID', ascending=True)
+df_berdo_buildings = df_berdo_buildings.sort_values(by='BERDO ID', ascending=True, kind='stable')
 
 # # Check all property types used in the raw data to map to BERDO threshold categories
 # property_types = df_berdo_buildings['Largest Property Type'].unique()
 # df_property_types = pd.DataFrame(property_types, columns=['Property Type'])
 # df_property_types.to_csv('../data-files/1-preprocessed-emissions-data/0-property-types.csv')
 
-# Load in BERDO property types mapping
-df_property_types = pd.read_csv(file_path_property_types)
-
 # Merge BERDO property types to the Largest Property Type column of df_berdo_buildings
 df_berdo_buildings_merged = df_berdo_buildings.merge(df_property_types, on='Largest Property Type', how='left')
 # df_berdo_buildings_merged = df_berdo_buildings_merged.drop(['Unnamed: 2'], axis=1)
 
+# In delta mode, merge the changed BERDO IDs into the preprocessed data of the previous run
+if delta_ids is not None:
+    df_berdo_campuses = merge_delta_rows(read_persisted_output(file_path_campuses, df_berdo_campuses),
+                                         df_berdo_campuses, delta_ids, ['Data Year', 'BERDO ID'])
+    df_berdo_buildings_merged = merge_delta_rows(read_persisted_output(file_path_buildings, df_berdo_buildings_merged),
+                                                 df_berdo_buildings_merged, delta_ids, ['BERDO ID'])
+
+# Write the violations table and stop before exporting if any rule has more violations than it allows
+if delta_ids is not None and os.path.exists(file_path_violations):
+    df_violations = merge_delta_rows(read_persisted_output(file_path_violations, df_violations), df_violations,
+                                     delta_ids, ['rule_id', 'Data Year', 'BERDO ID'])
+df_violations.to_csv(file_path_violations, index=False)
+df_validation_summary = summarize_violations(df_violations, len(df_berdo_buildings_merged) + len(df_berdo_campuses),
+                                             validation_rules)
+print(format_validation_summary(df_validation_summary))
+check_validation(df_validation_summary)
+
+# Convert the preprocessed data to the compact dtypes of the dtype policy
+df_berdo_campuses = apply_dtype_policy(df_berdo_campuses)
+df_berdo_buildings_merged = apply_dtype_policy(df_berdo_buildings_merged)
+
 # Send data to CSV for further processing
-df_berdo_campuses.to_csv('../data-files/1-preprocessed-emissions-data/2-berdo-campus-emissions-data.csv', index=False)
-df_berdo_buildings_merged.to_csv('../data-files/1-preprocessed-emissions-data/1-berdo-emissions-data.csv', index=False)
+df_berdo_campuses.to_csv(file_path_campuses, index=False)
+df_berdo_buildings_merged.to_csv(file_path_buildings, index=False)
+if is_delta_mode():
+    clear_pending_ids()
+
+end_stage(rows_out=len(df_berdo_buildings_merged) + len(df_berdo_campuses))
+report_stages()
 
 print(df_berdo_buildings_merged.shape)
 
+print_memory_report({'buildings': df_berdo_buildings_merged, 'campuses': df_berdo_campuses})
+
 
 
@@ -1,5 +1,11 @@
 import pandas as pd
 
+from dtype_policy import apply_dtype_policy, print_memory_report
+from factor_registry import get_factor_set, factor_set_frame
+from pipeline_backend import get_pipeline_backend, connect_duckdb, write_usage_tables_duckdb
+from pipeline_stages import start_stage, end_stage, report_stages
+from sparse_usage import build_sparse_usage, write_dense_energy_usage, write_dense_calculated_emissions
+
 
 def transform_energy_usage(df, start_year=2025, end_year=2050):
     """
@@ -152,33 +158,40 @@ columns_energy_usage_table = ['BERDO ID', 'Natural Gas Usage (kBtu)', 'Electrici
                               'Fuel Oil 5 and 6 Usage (kBtu)', 'Propane Usage (kBtu)', 'Diesel Usage (kBtu)',
                               'Kerosene Usage (kBtu)']
 
+# Engine used to build the year-expanded energy usage and calculated emissions tables
+pipeline_backend = get_pipeline_backend()
+
 # File path to preprocessed emissions data
 file_path_emissions_data = '../data-files/1-preprocessed-emissions-data/1-berdo-emissions-data.csv'
 # File path to yearly BERDO thresholds by property type
 file_path_property_thresholds = '../data-files/1-thresholds-berdo.csv'
-# File path to emissions factors
-file_path_emissions_factors = '../data-files/1-emissions-factors.csv'
 
-# DataFrame for preprocessed BERDO data
-df_berdo_thresholds = pd.read_csv(file_path_emissions_data)
+start_stage('load preprocessed data')
+# DataFrame for preprocessed BERDO data, with the compact dtypes of the dtype policy
+df_berdo_thresholds = apply_dtype_policy(pd.read_csv(file_path_emissions_data))
 # DataFrame for yearly BERDO thresholds by property type
 df_property_thresholds = pd.read_csv(file_path_property_thresholds)
-# DataFrame for emissions factors
-df_emissions_factors = pd.read_csv(file_path_emissions_factors)
+# DataFrame for emissions factors from the registered ordinance factor set
+df_emissions_factors = factor_set_frame(get_factor_set())
+end_stage(rows_out=len(df_berdo_thresholds))
 
-# Melt df_property_thresholds
-df_property_thresholds_melted = df_property_thresholds.melt(
-    id_vars=['Year'], var_name='BERDO Property Type', value_name='Threshold')
+start_stage('threshold pivot', rows_in=len(df_berdo_thresholds))
+# Widen df_property_thresholds to one row per property type with the years as columns
+df_property_thresholds_wide = df_property_thresholds.set_index('Year').T.astype(float).sort_index(axis=1)
 
-# Merge on 'Largest Property Type'
-df_merged = df_berdo_thresholds.merge(df_property_thresholds_melted, on='BERDO Property Type', how='left')
+# Merge the yearly thresholds on 'BERDO Property Type', one row per building like a pivot over columns_final
+df_pivot = (df_berdo_thresholds[columns_final].dropna().drop_duplicates()
+            .merge(df_property_thresholds_wide, left_on='BERDO Property Type', right_index=True, how='inner'))
 
-# Pivot the DataFrame to have years as columns
-df_pivot = df_merged.pivot_table(index=columns_final, columns='Year', values='Threshold').reset_index()
+# Drop buildings and years without any threshold and sort the buildings like the pivot
+df_pivot = df_pivot.dropna(how='all', subset=df_pivot.columns[51:]).dropna(how='all', axis=1)
+df_pivot = df_pivot.sort_values(columns_final).reset_index(drop=True)
 
 # Add the Threshold columns
 df_pivot.columns = (columns_final + [f'Threshold {year}' for year in df_pivot.columns[51:]])
+end_stage(rows_out=len(df_pivot))
 
+start_stage('dimension tables', rows_in=len(df_pivot))
 # Create DataFrame for 'buildings' PostgreSQL table and reset index
 df_buildings_table = df_pivot[columns_building_table].copy()
 df_buildings_table.reset_index(drop=True, inplace=True)
@@ -200,6 +213,7 @@ df_buildings_table.rename(columns={
 }, inplace=True)
 
 # Send buildings table data to CSV for SQL upload
+df_buildings_table = apply_dtype_policy(df_buildings_table)
 df_buildings_table.to_csv('../data-files/2-sql-tables/1-buildings-table.csv', index=False)
 
 # Create DataFrame for 'energy_usage' PostgreSQL table and reset index
@@ -222,13 +236,6 @@ df_energy_usage_table = df_energy_usage_table.rename(columns={
     'District Steam Usage (kBtu)': 'district_steam'
 })
 
-# Apply the transformation function to the energy_usage DataFrame
-df_transformed_energy_usage_table = transform_energy_usage(df_energy_usage_table)
-df_transformed_energy_usage_table['usage'] = df_transformed_energy_usage_table['usage'].astype(int)
-
-# Send energy_usage table data to CSV for SQL upload
-df_transformed_energy_usage_table.to_csv('../data-files/2-sql-tables/2-energy-usage-table.csv', index=False)
-
 # Fix naming of energy types to have same format as energy_usage table
 df_emissions_factors = df_emissions_factors.rename(columns={
     'Electricity Emissions': 'electricity',
@@ -255,36 +262,44 @@ df_transformed_emissions_factors = df_transformed_emissions_factors[df_transform
 print(df_transformed_emissions_factors.head())
 
 # Send transformed emissions factor DataFrame to CSV to be uploaded to PostgreSQL
+df_transformed_emissions_factors = apply_dtype_policy(df_transformed_emissions_factors)
 df_transformed_emissions_factors.to_csv('../data-files/2-sql-tables/3-emissions-factors-table.csv', index=False)
 
 # Transform BERDO DataFrame (df_pivot) to melt the yearly emissions thresholds
-df_transformed_emissions_thresholds = transform_emissions_thresholds(df_pivot)
+df_transformed_emissions_thresholds = apply_dtype_policy(transform_emissions_thresholds(df_pivot))
 
 # Send transformed emissions threshold DataFrame to CSV to be uploaded to PostgreSQL
 df_transformed_emissions_thresholds.to_csv('../data-files/2-sql-tables/4-emissions-thresholds-table.csv', index=False)
-
-
-# Add unique identifiers to each dataframe
-df_transformed_energy_usage_table['usage_id'] = range(1, len(df_transformed_energy_usage_table) + 1)
-df_transformed_emissions_factors['factor_id'] = range(1, len(df_transformed_emissions_factors) + 1)
-
-# Merge the dataframes on 'year' and 'energy_type', ensuring to keep the unique identifiers
-df_energy_and_factors = pd.merge(
-    df_transformed_energy_usage_table,
-    df_transformed_emissions_factors,
-    on=['year', 'energy_type'],
-    how='inner'
-)
-
-# Calculate emissions_mt_co2e
-df_energy_and_factors['emissions_mt_co2e'] = ((df_energy_and_factors['usage'] / 1000) *
-                                              (df_energy_and_factors['emissions_kgco2e_per_unit'] / 1000))
-
-# Select the necessary columns for the final dataframe, including the foreign keys
-df_calculated_emissions_table = df_energy_and_factors[['usage_id', 'factor_id', 'emissions_mt_co2e']]
-
-df_calculated_emissions_table.to_csv('../data-files/2-sql-tables/5-calculated-emissions-table.csv', index=False)
-
-print(df_calculated_emissions_table.head())
-print(df_calculated_emissions_table.shape)
-print(df_transformed_energy_usage_table.shape)
+end_stage(rows_out=len(df_buildings_table) + len(df_transformed_emissions_factors)
+          + len(df_transformed_emissions_thresholds))
+
+
+# Expand energy usage over 2025-2050 and join it with the emissions factors on the configured backend
+if pipeline_backend == 'duckdb':
+    start_stage('energy usage and calculated emissions (duckdb)', rows_in=len(df_energy_usage_table))
+    energy_usage_rows, calculated_emissions_rows = write_usage_tables_duckdb(
+        connect_duckdb(), df_energy_usage_table, df_transformed_emissions_factors,
+        '../data-files/2-sql-tables/2-energy-usage-table.csv',
+        '../data-files/2-sql-tables/5-calculated-emissions-table.csv')
+else:
+    # Keep only the non-zero usage entries; the tables are only made dense when written out
+    start_stage('energy usage projection', rows_in=len(df_energy_usage_table))
+    sparse_energy_usage = build_sparse_usage(df_energy_usage_table)
+    energy_usage_rows = write_dense_energy_usage(sparse_energy_usage,
+                                                 '../data-files/2-sql-tables/2-energy-usage-table.csv')
+    end_stage(rows_out=energy_usage_rows)
+
+    start_stage('calculated emissions', rows_in=len(sparse_energy_usage['usage']))
+    calculated_emissions_rows = write_dense_calculated_emissions(
+        sparse_energy_usage, df_transformed_emissions_factors,
+        '../data-files/2-sql-tables/5-calculated-emissions-table.csv')
+end_stage(rows_out=calculated_emissions_rows)
+report_stages()
+
+print(calculated_emissions_rows)
+print(energy_usage_rows)
+
+print_memory_report({'berdo thresholds': df_berdo_thresholds, 'pivot': df_pivot, 'buildings table': df_buildings_table,
+                     'energy usage table': df_energy_usage_table,
+                     'emissions factors table': df_transformed_emissions_factors,
+                     'emissions thresholds table': df_transformed_emissions_thresholds})
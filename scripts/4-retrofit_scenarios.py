@@ -0,0 +1,40 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from emissions_model import THRESHOLD_YEARS, build_usage_matrix, build_pipeline_factor_matrix, build_threshold_matrix
+from factor_registry import get_factor_set
+from scenarios import electrification_scenario_grid, make_scenario, run_scenarios
+
+
+if __name__ == '__main__':
+    # File paths to preprocessed BERDO data and yearly BERDO thresholds by property type
+    file_path_emissions_data = '../data-files/1-preprocessed-emissions-data/1-berdo-emissions-data.csv'
+    file_path_property_thresholds = '../data-files/1-thresholds-berdo.csv'
+
+    df_berdo = pd.read_csv(file_path_emissions_data)
+    df_property_thresholds = pd.read_csv(file_path_property_thresholds)
+
+    # Dense arrays of reported usage, emissions factors and allowed emissions for 2025-2050
+    usage = build_usage_matrix(df_berdo)
+    factor_matrix = build_pipeline_factor_matrix(get_factor_set(), THRESHOLD_YEARS)
+    allowance = build_threshold_matrix(df_berdo, df_property_thresholds, THRESHOLD_YEARS)
+
+    # Business as usual plus every combination of gas electrification share, year and efficiency rate
+    scenarios = [make_scenario('business as usual')] + electrification_scenario_grid(
+        shares=np.linspace(0.1, 1.0, 10), years=range(2026, 2051, 2), efficiency_rates=[0, 0.005, 0.01, 0.02])
+
+    df_scenario_summary, building_penalty = run_scenarios(scenarios, usage, factor_matrix, allowance,
+                                                          THRESHOLD_YEARS)
+
+    # Total 2025-2050 penalty of each building under each scenario
+    df_building_penalty = pd.DataFrame(building_penalty.T, columns=[scenario['name'] for scenario in scenarios])
+    df_building_penalty.insert(0, 'BERDO ID', df_berdo['BERDO ID'].to_numpy())
+
+    os.makedirs('../data-files/3-scenarios', exist_ok=True)
+    df_scenario_summary.to_csv('../data-files/3-scenarios/1-scenario-summary.csv', index=False)
+    df_building_penalty.to_csv('../data-files/3-scenarios/2-building-scenario-penalty.csv', index=False)
+
+    print(df_scenario_summary.groupby('scenario')['penalty'].sum().sort_values().head())
+    print(df_building_penalty.shape)
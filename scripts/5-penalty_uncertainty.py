@@ -0,0 +1,34 @@
+import os
+
+import pandas as pd
+
+from emissions_model import THRESHOLD_YEARS, build_usage_matrix, build_pipeline_factor_matrix, build_threshold_matrix
+from factor_registry import get_factor_set
+from monte_carlo import run_monte_carlo, summarize_penalty_ranges
+
+
+if __name__ == '__main__':
+    # File paths to preprocessed BERDO data and yearly BERDO thresholds by property type
+    file_path_emissions_data = '../data-files/1-preprocessed-emissions-data/1-berdo-emissions-data.csv'
+    file_path_property_thresholds = '../data-files/1-thresholds-berdo.csv'
+
+    df_berdo = pd.read_csv(file_path_emissions_data)
+    df_property_thresholds = pd.read_csv(file_path_property_thresholds)
+
+    # Dense arrays of reported usage, projected emissions factors and allowed emissions for 2025-2050
+    usage = build_usage_matrix(df_berdo)
+    factor_matrix = build_pipeline_factor_matrix(get_factor_set(), THRESHOLD_YEARS)
+    allowance = build_threshold_matrix(df_berdo, df_property_thresholds, THRESHOLD_YEARS)
+
+    # Sample grid factor trajectories and usage noise, reproducible from the seed
+    building_quantiles, portfolio_penalty = run_monte_carlo(usage, factor_matrix, allowance, draws=10000, seed=2050)
+
+    # P10/P50/P90 penalty for each building and for the portfolio
+    df_building_ranges, df_portfolio_ranges = summarize_penalty_ranges(building_quantiles, portfolio_penalty,
+                                                                       df_berdo['BERDO ID'], THRESHOLD_YEARS)
+
+    os.makedirs('../data-files/4-uncertainty', exist_ok=True)
+    df_building_ranges.to_csv('../data-files/4-uncertainty/1-building-penalty-ranges.csv', index=False)
+    df_portfolio_ranges.to_csv('../data-files/4-uncertainty/2-portfolio-penalty-ranges.csv', index=False)
+
+    print(df_portfolio_ranges.tail())
@@ -0,0 +1,31 @@
+import os
+
+import pandas as pd
+
+from compliance_optimizer import optimize_portfolio
+from emissions_model import THRESHOLD_YEARS, build_usage_matrix, build_pipeline_factor_matrix, build_threshold_matrix
+from factor_registry import get_factor_set
+
+
+if __name__ == '__main__':
+    # File paths to preprocessed BERDO data and yearly BERDO thresholds by property type
+    file_path_emissions_data = '../data-files/1-preprocessed-emissions-data/1-berdo-emissions-data.csv'
+    file_path_property_thresholds = '../data-files/1-thresholds-berdo.csv'
+
+    df_berdo = pd.read_csv(file_path_emissions_data)
+    df_property_thresholds = pd.read_csv(file_path_property_thresholds)
+
+    # Dense arrays of reported usage, emissions factors and allowed emissions for 2025-2050
+    usage = build_usage_matrix(df_berdo)
+    factor_matrix = build_pipeline_factor_matrix(get_factor_set(), THRESHOLD_YEARS)
+    allowance = build_threshold_matrix(df_berdo, df_property_thresholds, THRESHOLD_YEARS)
+    gfa = df_berdo['Reported Gross Floor Area (Sq Ft)'].fillna(0).to_numpy(dtype=float)
+
+    # Least-cost year to adopt each measure versus paying alternative compliance every year
+    df_plans = optimize_portfolio(usage, gfa, allowance, factor_matrix, THRESHOLD_YEARS)
+    df_plans.insert(0, 'BERDO ID', df_berdo['BERDO ID'].to_numpy())
+
+    os.makedirs('../data-files/5-compliance', exist_ok=True)
+    df_plans.to_csv('../data-files/5-compliance/1-least-cost-plans.csv', index=False)
+
+    print(df_plans[['plan_cost', 'pay_only_cost', 'savings']].sum())
@@ -0,0 +1,29 @@
+import os
+
+import pandas as pd
+
+from emissions_model import THRESHOLD_YEARS, build_usage_matrix, build_pipeline_factor_matrix, build_threshold_matrix
+from factor_registry import get_factor_set
+from sensitivity import penalty_sensitivity
+
+
+if __name__ == '__main__':
+    # File paths to preprocessed BERDO data and yearly BERDO thresholds by property type
+    file_path_emissions_data = '../data-files/1-preprocessed-emissions-data/1-berdo-emissions-data.csv'
+    file_path_property_thresholds = '../data-files/1-thresholds-berdo.csv'
+
+    df_berdo = pd.read_csv(file_path_emissions_data)
+    df_property_thresholds = pd.read_csv(file_path_property_thresholds)
+
+    # Dense arrays of reported usage, emissions factors and allowed emissions for 2025-2050
+    usage = build_usage_matrix(df_berdo)
+    factor_matrix = build_pipeline_factor_matrix(get_factor_set(), THRESHOLD_YEARS)
+    allowance = build_threshold_matrix(df_berdo, df_property_thresholds, THRESHOLD_YEARS)
+
+    # Tornado chart data of the portfolio's total 2025-2050 penalty for a 10% change of each input
+    df_tornado = penalty_sensitivity(usage, factor_matrix, allowance, THRESHOLD_YEARS, relative_step=0.1)
+
+    os.makedirs('../data-files/6-sensitivity', exist_ok=True)
+    df_tornado.to_csv('../data-files/6-sensitivity/1-portfolio-tornado.csv', index=False)
+
+    print(df_tornado.head(10))
@@ -0,0 +1,12 @@
+from query_layer import build_query_database, connect_query_database, buildings_over_threshold, \
+    top_emitters_by_zip, penalty_by_owner
+
+
+if __name__ == '__main__':
+    # Load the SQL tables written by script 3 into an indexed DuckDB database
+    database_path = build_query_database()
+
+    con = connect_query_database(database_path)
+    print(buildings_over_threshold(con, 2030).num_rows)
+    print(top_emitters_by_zip(con, 2030, limit=3).slice(0, 6))
+    print(penalty_by_owner(con).slice(0, 10))
@@ -0,0 +1,32 @@
+import os
+
+import pandas as pd
+
+from emissions_model import THRESHOLD_YEARS, build_usage_matrix, build_pipeline_factor_matrix, build_threshold_matrix
+from factor_registry import get_factor_set
+from rollups import build_rollup_cube, load_rollup_cube, top_rollup_members
+
+
+if __name__ == '__main__':
+    # File paths to preprocessed BERDO data and yearly BERDO thresholds by property type
+    file_path_emissions_data = '../data-files/1-preprocessed-emissions-data/1-berdo-emissions-data.csv'
+    file_path_property_thresholds = '../data-files/1-thresholds-berdo.csv'
+    file_path_rollup_cube = '../data-files/7-rollups/1-rollup-cube.csv'
+
+    df_berdo = pd.read_csv(file_path_emissions_data)
+    df_property_thresholds = pd.read_csv(file_path_property_thresholds)
+
+    # Dense arrays of reported usage, emissions factors and allowed emissions for 2025-2050
+    usage = build_usage_matrix(df_berdo)
+    factor_matrix = build_pipeline_factor_matrix(get_factor_set(), THRESHOLD_YEARS)
+    allowance = build_threshold_matrix(df_berdo, df_property_thresholds, THRESHOLD_YEARS)
+
+    # Owner, zip code and property type totals for every year
+    df_cube = build_rollup_cube(df_berdo, usage, factor_matrix, allowance, THRESHOLD_YEARS)
+
+    os.makedirs('../data-files/7-rollups', exist_ok=True)
+    df_cube.to_csv(file_path_rollup_cube, index=False)
+
+    cube = load_rollup_cube(file_path_rollup_cube)
+    print(top_rollup_members(cube, 'owner', 2030))
+    print(df_cube.shape)
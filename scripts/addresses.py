@@ -0,0 +1,56 @@
+import re
+
+
+def standardize_address_extended(address):
+    """
+    Standardizes various components of an address string to a consistent format.
+
+    This function takes an address string and replaces certain address components
+    with their standardized abbreviations. It handles common street types such as
+    "Avenue", "Street", "Highway", "Road", "Boulevard", "Drive", and "Parkway",
+    converting them to their respective abbreviations like "Ave", "St", "Hwy",
+    "Rd", "Blvd", "Dr", and "Pkwy". The function ignores case and matches both
+    with and without trailing periods.
+
+    Parameters:
+    address (str): The address string to be standardized.
+
+    Returns:
+    str: The standardized address string with the appropriate components replaced.
+    """
+    # Extend the patterns to include more address components
+    patterns_extended = {
+        r'\bAve\b\.?': 'Ave',      # Matches "Ave" and "Ave." with "Ave"
+        r'\bAvenue\b': 'Ave',      # Matches "Avenue" with "Ave"
+        r'\bAv\b\.?': 'Ave',       # Matches "Av" and "Av." with "Ave"
+        r'\bStreet\b': 'St',       # Matches "Street" with "St"
+        r'\bSt\b\.?': 'St',        # Matches "St" and "St." with "St"
+        r'\bHighway\b': 'Hwy',     # Matches "Highway" with "Hwy"
+        r'\bHwy\b\.?': 'Hwy',      # Matches "Hwy" and "Hwy." with "Hwy"
+        r'\bRoad\b': 'Rd',         # Matches "Road" with "Rd"
+        r'\bRd\b\.?': 'Rd',        # Matches "Rd" and "Rd." with "Rd"
+        r'\bBoulevard\b': 'Blvd',  # Matches "Boulevard" with "Blvd"
+        r'\bBlvd\b\.?': 'Blvd',    # Matches "Blvd" and "Blvd." with "Blvd"
+        r'\bBl\b\.?': 'Blvd',      # Matches "Bl" and "Bl." with "Blvd"
+        r'\bDrive\b': 'Dr',        # Matches "Drive" with "Dr"
+        r'\bDr\b\.?': 'Dr',        # Matches "Dr" and "Dr." with "Dr"
+        r'\bParkway\b': 'Pkwy',    # Matches "Parkway" with "Pkwy"
+    }
+
+    # Ensure the address is title-cased
+    address = address.title()
+
+    # Do not capitalize "and" if it is a standalone word
+    address = re.sub(r'\bAnd\b', 'and', address)
+
+    # Do not capitalize an 's' following an apostrophe
+    address = re.sub(r"\'S\b", "'s", address)
+
+    # Iterate over the patterns and apply the replacements
+    for pattern, replacement in patterns_extended.items():
+        address = re.sub(pattern, replacement, address, flags=re.IGNORECASE)
+
+    # Fix the capitalization issue for ordinal numbers
+    address = re.sub(r'(\d+)([A-Za-z]+)', lambda x: x.group(1) + x.group(2).lower(), address)
+
+    return address
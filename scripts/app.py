@@ -1,44 +1,58 @@
-from dash import Dash, html, dash_table, dcc, callback, Output, Input, State
+from dash import Dash, html, dash_table, dcc, callback, Output, Input, State, no_update, DiskcacheManager
 from dash_bootstrap_templates import load_figure_template
 import dash_bootstrap_components as dbc
-import plotly.graph_objects as go
+import diskcache
+import os
 import pandas as pd
-import plotly.express as px
+
+from emissions_model import CEI_YEARS, PENALTY_YEARS, build_factor_matrix, calculate_cei, calculate_penalty
+from factor_registry import DEFAULT_FACTOR_SET, get_factor_set, load_factor_csv
+from figures import build_cei_figure, build_cost_figure, patch_cei_figure, patch_cost_figure
+from callback_metrics import init_metrics, use_metrics_cache, instrument_callback, callback_phase
+from building_index import load_building_index, search_buildings, get_building_inputs
+from bulk_upload import BULK_TABLE_COLUMNS, use_results_cache, parse_upload, score_buildings, store_results, \
+    get_results, get_results_page
 
 
 load_figure_template('YETI')
 
+# Incorporate data
+df = pd.read_csv('Thresholds_1.csv')
+df_1 = pd.read_csv('Thresholds_comparison.csv')
 
-GHG_Dict = {
-    'Electricity': {
-        '2021': 81, '2022': 79, '2023': 77, '2024': 75, '2025': 73, '2026': 71, '2027': 69, '2028': 67,
-        '2029': 65, '2030': 62, '2031': 60, '2032': 58, '2033': 56, '2034': 54, '2035': 52, '2036': 50,
-        '2037': 48, '2038': 46, '2039': 44, '2040': 42, '2041': 40, '2042': 37, '2043': 35, '2044': 33,
-        '2045': 31, '2046': 29, '2047': 27, '2048': 25, '2049': 23, '2050': 21,
-    },
-    'Natural Gas': 53.11, 'Fuel Oil (No. 1)': 73.5, 'Fuel Oil (No. 2)': 74.21, 'Fuel Oil (No. 4)': 75.29,
-    'Diesel Oil': 74.21, 'District Steam': 66.4, 'District Hot Water': 66.4, 'Electric Driven Chiller': 52.7,
-    'Absorption Chiller (Natural Gas)': 73.89, 'Engine-Driven Chiller (Natural Gas)': 49.31
-}
+# Index the preprocessed BERDO buildings once for lookups by BERDO ID, address or owner
+building_index = load_building_index('../data-files/1-preprocessed-emissions-data/1-berdo-emissions-data.csv')
 
-# Cost of Metric Ton CO2 Above Threshold
-CO2_COST = 243
+# Compile the emissions factors once for every year shown in the app, from the factor set named by BERDO_FACTOR_SET
+# or read from the CSV file it points to
+factor_set_name = os.environ.get('BERDO_FACTOR_SET', DEFAULT_FACTOR_SET)
+if factor_set_name.endswith('.csv'):
+    factor_set = load_factor_csv(factor_set_name, os.path.splitext(os.path.basename(factor_set_name))[0], '1')
+else:
+    factor_set = get_factor_set(factor_set_name)
+cei_factor_matrix = build_factor_matrix(factor_set, CEI_YEARS)
+penalty_year_rows = [CEI_YEARS.index(year) for year in PENALTY_YEARS]
+penalty_factor_matrix = cei_factor_matrix[penalty_year_rows]
 
+# Rows per page of the portfolio results table
+BULK_PAGE_SIZE = 25
 
-# Conversions to mmBtu for Different Fuel Types
-kWh_to_MMBTU = 0.003412
-THERM_to_MMBTU = 0.1
-FO1_Gal_to_MMBTU = 0.135
-FO2_Gal_to_MMBTU = 0.14
-FO4_Gal_to_MMBTU = 0.146
-DIESEL_Gal_to_MMBTU = 0.1387
+# Build the static figure skeletons once; callbacks only patch their y-arrays
+cei_figure = build_cei_figure(df['Year'], CEI_YEARS)
+cost_figure = build_cost_figure(PENALTY_YEARS)
 
-# Incorporate data
-df = pd.read_csv('Thresholds_1.csv')
-df_1 = pd.read_csv('Thresholds_comparison.csv')
+# Long-running callbacks run as background jobs in local processes, sharing state through a disk cache
+cache = diskcache.Cache('./cache')
+background_callback_manager = DiskcacheManager(cache)
+use_results_cache(cache)
 
 # Initialize the app - incorporate CSS
-app = Dash(__name__, external_stylesheets=[dbc.themes.YETI])
+app = Dash(__name__, external_stylesheets=[dbc.themes.YETI], background_callback_manager=background_callback_manager)
+
+# Record callback latency and response size, served on /metrics; set BERDO_SLOW_CALL_MS to log slow calls
+slow_call_ms = os.environ.get('BERDO_SLOW_CALL_MS')
+init_metrics(app.server, slow_call_ms=float(slow_call_ms) if slow_call_ms else None)
+use_metrics_cache(cache)
 
 # Formatting Colors
 colors = {
@@ -67,6 +81,13 @@ app.layout = dbc.Container([
     dbc.Row([
         # Column Width 4
         dbc.Col([
+            # Building Lookup Component
+            html.Div(className='row',
+                     children=[
+                        dcc.Dropdown(id='building-search', options=[], placeholder='Search BERDO ID, address or owner')
+                              ]
+                     ),
+            html.Div(id='building-search-note', style={'font-family': 'Helvetica', 'fontSize': 12}),
             # Dropdown Component
             html.Div(className='row',
                      children=[
@@ -152,12 +173,60 @@ app.layout = dbc.Container([
         dbc.Col([
             # First Graph
             html.Div(style={'display': 'flex'},
-                     children=[dcc.Graph(figure={}, id='berdo-cei-graph-final', style={'flex': 1})]),
+                     children=[dcc.Graph(figure=cei_figure, id='berdo-cei-graph-final', style={'flex': 1})]),
 
             # Second Graph
             html.Div(style={'display': 'flex'},
-                     children=[dcc.Graph(figure={}, id='berdo-cost-graph-final', style={'flex': 1})])
+                     children=[dcc.Graph(figure=cost_figure, id='berdo-cost-graph-final', style={'flex': 1})])
         ], width=9)
+        ]),
+
+    # Portfolio Upload Row
+    dbc.Row([
+        dbc.Col([
+            dcc.Upload(id='bulk-upload',
+                       children=html.Div(['Drag and Drop or ', html.A('Select a Portfolio CSV')]),
+                       style={'height': '60px',
+                              'lineHeight': '60px',
+                              'borderWidth': '1px',
+                              'borderStyle': 'dashed',
+                              'borderRadius': '5px',
+                              'textAlign': 'center',
+                              'marginTop': '15px',
+                              'font-family': 'Helvetica'}),
+            html.Div([
+                dbc.Progress(id='bulk-progress', value=0, max=100, style={'flex': 1, 'marginTop': '18px'}),
+                dbc.Button('Cancel', id='bulk-cancel-button', n_clicks=0, disabled=True,
+                           color='light', style={'marginTop': '10px', 'marginLeft': '10px'})
+            ], style={'display': 'flex'}),
+            html.Div(id='bulk-upload-status', style={'marginTop': '10px', 'font-family': 'Helvetica'}),
+            # Only the server-side key of the scored upload is kept in the browser
+            dcc.Store(id='bulk-upload-key'),
+            dash_table.DataTable(
+                id='bulk-results-table',
+                columns=[{'name': i, 'id': i} for i in BULK_TABLE_COLUMNS],
+                page_current=0,
+                page_size=BULK_PAGE_SIZE,
+                page_action='custom',
+                sort_action='custom',
+                sort_mode='multi',
+                sort_by=[],
+                style_table={'overflowX': 'auto',
+                             'padding': '10px'},
+                style_cell={'text-align': 'center',
+                            'font-family': 'Helvetica',
+                            'white-space': 'normal',
+                            'height': 'auto'},
+                style_header={'backgroundColor': '#979696',
+                              'fontWeight': 'bold'
+                              }
+            ),
+            dbc.Button('Download Penalty Projection', id='bulk-download-button', n_clicks=0,
+                       color='light', style={'marginTop': '15px',
+                                             'marginBottom': '15px',
+                                             'boxShadow': '0px 5px 15px -3px rgba(0, 0, 0, 0.2), 0px 4px 6px -2px rgba(0, 0, 0, 0.1)'}),
+            dcc.Download(id='bulk-download')
+        ], width=12)
         ])
     ], fluid=True
 )
@@ -182,6 +251,7 @@ app.layout = dbc.Container([
     State('value10', 'value'),
     State('value11', 'value')
 )
+@instrument_callback('update_graph')
 def update_graph(col_chosen, n_clicks, *input_values):
     values = []  # This list will store the user-defined inputs
 
@@ -190,762 +260,40 @@ def update_graph(col_chosen, n_clicks, *input_values):
         values = [float(v) if v.replace('.', '', 1).isdigit() else 0.0 for v in input_values]
 
     if not values:
-        return px.bar(title='<b>Building CEI vs. BERDO Threshold (kg CO2e/sf/yr)</b>'), \
-               px.bar(title='<b>Building Cost Penalty ($)</b>'), \
-               html.Div("Click Calculate to load graphics.")
-
-
-
-
-    # Create a DataFrame of CEI per Fuel Type
-    df_cei = pd.DataFrame({
-        'X': ['2021', '2022', '2023', '2024', '2025', '2026', '2027', '2028',
-              '2029', '2030', '2031', '2032', '2033', '2034', '2035', '2036',
-              '2037', '2038', '2039', '2040', '2041', '2042', '2043', '2044',
-              '2045', '2046', '2047', '2048', '2049', '2050'],
-        'Electricity': [values[1] * kWh_to_MMBTU * GHG_Dict['Electricity']['2021'] / values[0],
-                        values[1] * kWh_to_MMBTU * GHG_Dict['Electricity']['2022'] / values[0],
-                        values[1] * kWh_to_MMBTU * GHG_Dict['Electricity']['2023'] / values[0],
-                        values[1] * kWh_to_MMBTU * GHG_Dict['Electricity']['2024'] / values[0],
-                        values[1] * kWh_to_MMBTU * GHG_Dict['Electricity']['2025'] / values[0],
-                        values[1] * kWh_to_MMBTU * GHG_Dict['Electricity']['2026'] / values[0],
-                        values[1] * kWh_to_MMBTU * GHG_Dict['Electricity']['2027'] / values[0],
-                        values[1] * kWh_to_MMBTU * GHG_Dict['Electricity']['2028'] / values[0],
-                        values[1] * kWh_to_MMBTU * GHG_Dict['Electricity']['2029'] / values[0],
-                        values[1] * kWh_to_MMBTU * GHG_Dict['Electricity']['2030'] / values[0],
-                        values[1] * kWh_to_MMBTU * GHG_Dict['Electricity']['2031'] / values[0],
-                        values[1] * kWh_to_MMBTU * GHG_Dict['Electricity']['2032'] / values[0],
-                        values[1] * kWh_to_MMBTU * GHG_Dict['Electricity']['2033'] / values[0],
-                        values[1] * kWh_to_MMBTU * GHG_Dict['Electricity']['2034'] / values[0],
-                        values[1] * kWh_to_MMBTU * GHG_Dict['Electricity']['2035'] / values[0],
-                        values[1] * kWh_to_MMBTU * GHG_Dict['Electricity']['2036'] / values[0],
-                        values[1] * kWh_to_MMBTU * GHG_Dict['Electricity']['2037'] / values[0],
-                        values[1] * kWh_to_MMBTU * GHG_Dict['Electricity']['2038'] / values[0],
-                        values[1] * kWh_to_MMBTU * GHG_Dict['Electricity']['2039'] / values[0],
-                        values[1] * kWh_to_MMBTU * GHG_Dict['Electricity']['2040'] / values[0],
-                        values[1] * kWh_to_MMBTU * GHG_Dict['Electricity']['2041'] / values[0],
-                        values[1] * kWh_to_MMBTU * GHG_Dict['Electricity']['2042'] / values[0],
-                        values[1] * kWh_to_MMBTU * GHG_Dict['Electricity']['2043'] / values[0],
-                        values[1] * kWh_to_MMBTU * GHG_Dict['Electricity']['2044'] / values[0],
-                        values[1] * kWh_to_MMBTU * GHG_Dict['Electricity']['2045'] / values[0],
-                        values[1] * kWh_to_MMBTU * GHG_Dict['Electricity']['2046'] / values[0],
-                        values[1] * kWh_to_MMBTU * GHG_Dict['Electricity']['2047'] / values[0],
-                        values[1] * kWh_to_MMBTU * GHG_Dict['Electricity']['2048'] / values[0],
-                        values[1] * kWh_to_MMBTU * GHG_Dict['Electricity']['2049'] / values[0],
-                        values[1] * kWh_to_MMBTU * GHG_Dict['Electricity']['2050'] / values[0]],
-        'Natural Gas': [values[2] * THERM_to_MMBTU * GHG_Dict['Natural Gas'] / values[0],
-                        values[2] * THERM_to_MMBTU * GHG_Dict['Natural Gas'] / values[0],
-                        values[2] * THERM_to_MMBTU * GHG_Dict['Natural Gas'] / values[0],
-                        values[2] * THERM_to_MMBTU * GHG_Dict['Natural Gas'] / values[0],
-                        values[2] * THERM_to_MMBTU * GHG_Dict['Natural Gas'] / values[0],
-                        values[2] * THERM_to_MMBTU * GHG_Dict['Natural Gas'] / values[0],
-                        values[2] * THERM_to_MMBTU * GHG_Dict['Natural Gas'] / values[0],
-                        values[2] * THERM_to_MMBTU * GHG_Dict['Natural Gas'] / values[0],
-                        values[2] * THERM_to_MMBTU * GHG_Dict['Natural Gas'] / values[0],
-                        values[2] * THERM_to_MMBTU * GHG_Dict['Natural Gas'] / values[0],
-                        values[2] * THERM_to_MMBTU * GHG_Dict['Natural Gas'] / values[0],
-                        values[2] * THERM_to_MMBTU * GHG_Dict['Natural Gas'] / values[0],
-                        values[2] * THERM_to_MMBTU * GHG_Dict['Natural Gas'] / values[0],
-                        values[2] * THERM_to_MMBTU * GHG_Dict['Natural Gas'] / values[0],
-                        values[2] * THERM_to_MMBTU * GHG_Dict['Natural Gas'] / values[0],
-                        values[2] * THERM_to_MMBTU * GHG_Dict['Natural Gas'] / values[0],
-                        values[2] * THERM_to_MMBTU * GHG_Dict['Natural Gas'] / values[0],
-                        values[2] * THERM_to_MMBTU * GHG_Dict['Natural Gas'] / values[0],
-                        values[2] * THERM_to_MMBTU * GHG_Dict['Natural Gas'] / values[0],
-                        values[2] * THERM_to_MMBTU * GHG_Dict['Natural Gas'] / values[0],
-                        values[2] * THERM_to_MMBTU * GHG_Dict['Natural Gas'] / values[0],
-                        values[2] * THERM_to_MMBTU * GHG_Dict['Natural Gas'] / values[0],
-                        values[2] * THERM_to_MMBTU * GHG_Dict['Natural Gas'] / values[0],
-                        values[2] * THERM_to_MMBTU * GHG_Dict['Natural Gas'] / values[0],
-                        values[2] * THERM_to_MMBTU * GHG_Dict['Natural Gas'] / values[0],
-                        values[2] * THERM_to_MMBTU * GHG_Dict['Natural Gas'] / values[0],
-                        values[2] * THERM_to_MMBTU * GHG_Dict['Natural Gas'] / values[0],
-                        values[2] * THERM_to_MMBTU * GHG_Dict['Natural Gas'] / values[0],
-                        values[2] * THERM_to_MMBTU * GHG_Dict['Natural Gas'] / values[0],
-                        values[2] * THERM_to_MMBTU * GHG_Dict['Natural Gas'] / values[0]],
-        'Fuel Oil #1': [values[3] * FO1_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 1)'] / values[0],
-                        values[3] * FO1_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 1)'] / values[0],
-                        values[3] * FO1_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 1)'] / values[0],
-                        values[3] * FO1_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 1)'] / values[0],
-                        values[3] * FO1_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 1)'] / values[0],
-                        values[3] * FO1_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 1)'] / values[0],
-                        values[3] * FO1_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 1)'] / values[0],
-                        values[3] * FO1_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 1)'] / values[0],
-                        values[3] * FO1_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 1)'] / values[0],
-                        values[3] * FO1_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 1)'] / values[0],
-                        values[3] * FO1_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 1)'] / values[0],
-                        values[3] * FO1_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 1)'] / values[0],
-                        values[3] * FO1_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 1)'] / values[0],
-                        values[3] * FO1_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 1)'] / values[0],
-                        values[3] * FO1_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 1)'] / values[0],
-                        values[3] * FO1_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 1)'] / values[0],
-                        values[3] * FO1_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 1)'] / values[0],
-                        values[3] * FO1_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 1)'] / values[0],
-                        values[3] * FO1_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 1)'] / values[0],
-                        values[3] * FO1_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 1)'] / values[0],
-                        values[3] * FO1_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 1)'] / values[0],
-                        values[3] * FO1_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 1)'] / values[0],
-                        values[3] * FO1_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 1)'] / values[0],
-                        values[3] * FO1_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 1)'] / values[0],
-                        values[3] * FO1_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 1)'] / values[0],
-                        values[3] * FO1_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 1)'] / values[0],
-                        values[3] * FO1_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 1)'] / values[0],
-                        values[3] * FO1_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 1)'] / values[0],
-                        values[3] * FO1_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 1)'] / values[0],
-                        values[3] * FO1_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 1)'] / values[0]],
-        'Fuel Oil #2': [values[4] * FO2_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 2)'] / values[0],
-                        values[4] * FO2_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 2)'] / values[0],
-                        values[4] * FO2_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 2)'] / values[0],
-                        values[4] * FO2_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 2)'] / values[0],
-                        values[4] * FO2_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 2)'] / values[0],
-                        values[4] * FO2_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 2)'] / values[0],
-                        values[4] * FO2_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 2)'] / values[0],
-                        values[4] * FO2_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 2)'] / values[0],
-                        values[4] * FO2_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 2)'] / values[0],
-                        values[4] * FO2_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 2)'] / values[0],
-                        values[4] * FO2_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 2)'] / values[0],
-                        values[4] * FO2_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 2)'] / values[0],
-                        values[4] * FO2_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 2)'] / values[0],
-                        values[4] * FO2_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 2)'] / values[0],
-                        values[4] * FO2_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 2)'] / values[0],
-                        values[4] * FO2_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 2)'] / values[0],
-                        values[4] * FO2_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 2)'] / values[0],
-                        values[4] * FO2_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 2)'] / values[0],
-                        values[4] * FO2_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 2)'] / values[0],
-                        values[4] * FO2_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 2)'] / values[0],
-                        values[4] * FO2_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 2)'] / values[0],
-                        values[4] * FO2_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 2)'] / values[0],
-                        values[4] * FO2_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 2)'] / values[0],
-                        values[4] * FO2_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 2)'] / values[0],
-                        values[4] * FO2_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 2)'] / values[0],
-                        values[4] * FO2_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 2)'] / values[0],
-                        values[4] * FO2_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 2)'] / values[0],
-                        values[4] * FO2_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 2)'] / values[0],
-                        values[4] * FO2_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 2)'] / values[0],
-                        values[4] * FO2_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 2)'] / values[0]],
-        'Fuel Oil #4': [values[5] * FO4_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 4)'] / values[0],
-                        values[5] * FO4_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 4)'] / values[0],
-                        values[5] * FO4_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 4)'] / values[0],
-                        values[5] * FO4_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 4)'] / values[0],
-                        values[5] * FO4_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 4)'] / values[0],
-                        values[5] * FO4_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 4)'] / values[0],
-                        values[5] * FO4_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 4)'] / values[0],
-                        values[5] * FO4_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 4)'] / values[0],
-                        values[5] * FO4_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 4)'] / values[0],
-                        values[5] * FO4_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 4)'] / values[0],
-                        values[5] * FO4_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 4)'] / values[0],
-                        values[5] * FO4_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 4)'] / values[0],
-                        values[5] * FO4_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 4)'] / values[0],
-                        values[5] * FO4_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 4)'] / values[0],
-                        values[5] * FO4_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 4)'] / values[0],
-                        values[5] * FO4_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 4)'] / values[0],
-                        values[5] * FO4_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 4)'] / values[0],
-                        values[5] * FO4_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 4)'] / values[0],
-                        values[5] * FO4_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 4)'] / values[0],
-                        values[5] * FO4_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 4)'] / values[0],
-                        values[5] * FO4_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 4)'] / values[0],
-                        values[5] * FO4_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 4)'] / values[0],
-                        values[5] * FO4_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 4)'] / values[0],
-                        values[5] * FO4_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 4)'] / values[0],
-                        values[5] * FO4_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 4)'] / values[0],
-                        values[5] * FO4_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 4)'] / values[0],
-                        values[5] * FO4_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 4)'] / values[0],
-                        values[5] * FO4_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 4)'] / values[0],
-                        values[5] * FO4_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 4)'] / values[0],
-                        values[5] * FO4_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 4)'] / values[0]],
-        'Diesel': [values[6] * DIESEL_Gal_to_MMBTU * GHG_Dict['Diesel Oil'] / values[0],
-                   values[6] * DIESEL_Gal_to_MMBTU * GHG_Dict['Diesel Oil'] / values[0],
-                   values[6] * DIESEL_Gal_to_MMBTU * GHG_Dict['Diesel Oil'] / values[0],
-                   values[6] * DIESEL_Gal_to_MMBTU * GHG_Dict['Diesel Oil'] / values[0],
-                   values[6] * DIESEL_Gal_to_MMBTU * GHG_Dict['Diesel Oil'] / values[0],
-                   values[6] * DIESEL_Gal_to_MMBTU * GHG_Dict['Diesel Oil'] / values[0],
-                   values[6] * DIESEL_Gal_to_MMBTU * GHG_Dict['Diesel Oil'] / values[0],
-                   values[6] * DIESEL_Gal_to_MMBTU * GHG_Dict['Diesel Oil'] / values[0],
-                   values[6] * DIESEL_Gal_to_MMBTU * GHG_Dict['Diesel Oil'] / values[0],
-                   values[6] * DIESEL_Gal_to_MMBTU * GHG_Dict['Diesel Oil'] / values[0],
-                   values[6] * DIESEL_Gal_to_MMBTU * GHG_Dict['Diesel Oil'] / values[0],
-                   values[6] * DIESEL_Gal_to_MMBTU * GHG_Dict['Diesel Oil'] / values[0],
-                   values[6] * DIESEL_Gal_to_MMBTU * GHG_Dict['Diesel Oil'] / values[0],
-                   values[6] * DIESEL_Gal_to_MMBTU * GHG_Dict['Diesel Oil'] / values[0],
-                   values[6] * DIESEL_Gal_to_MMBTU * GHG_Dict['Diesel Oil'] / values[0],
-                   values[6] * DIESEL_Gal_to_MMBTU * GHG_Dict['Diesel Oil'] / values[0],
-                   values[6] * DIESEL_Gal_to_MMBTU * GHG_Dict['Diesel Oil'] / values[0],
-                   values[6] * DIESEL_Gal_to_MMBTU * GHG_Dict['Diesel Oil'] / values[0],
-                   values[6] * DIESEL_Gal_to_MMBTU * GHG_Dict['Diesel Oil'] / values[0],
-                   values[6] * DIESEL_Gal_to_MMBTU * GHG_Dict['Diesel Oil'] / values[0],
-                   values[6] * DIESEL_Gal_to_MMBTU * GHG_Dict['Diesel Oil'] / values[0],
-                   values[6] * DIESEL_Gal_to_MMBTU * GHG_Dict['Diesel Oil'] / values[0],
-                   values[6] * DIESEL_Gal_to_MMBTU * GHG_Dict['Diesel Oil'] / values[0],
-                   values[6] * DIESEL_Gal_to_MMBTU * GHG_Dict['Diesel Oil'] / values[0],
-                   values[6] * DIESEL_Gal_to_MMBTU * GHG_Dict['Diesel Oil'] / values[0],
-                   values[6] * DIESEL_Gal_to_MMBTU * GHG_Dict['Diesel Oil'] / values[0],
-                   values[6] * DIESEL_Gal_to_MMBTU * GHG_Dict['Diesel Oil'] / values[0],
-                   values[6] * DIESEL_Gal_to_MMBTU * GHG_Dict['Diesel Oil'] / values[0],
-                   values[6] * DIESEL_Gal_to_MMBTU * GHG_Dict['Diesel Oil'] / values[0],
-                   values[6] * DIESEL_Gal_to_MMBTU * GHG_Dict['Diesel Oil'] / values[0]],
-        'District Steam': [values[7] * GHG_Dict['District Steam'] / values[0],
-                           values[7] * GHG_Dict['District Steam'] / values[0],
-                           values[7] * GHG_Dict['District Steam'] / values[0],
-                           values[7] * GHG_Dict['District Steam'] / values[0],
-                           values[7] * GHG_Dict['District Steam'] / values[0],
-                           values[7] * GHG_Dict['District Steam'] / values[0],
-                           values[7] * GHG_Dict['District Steam'] / values[0],
-                           values[7] * GHG_Dict['District Steam'] / values[0],
-                           values[7] * GHG_Dict['District Steam'] / values[0],
-                           values[7] * GHG_Dict['District Steam'] / values[0],
-                           values[7] * GHG_Dict['District Steam'] / values[0],
-                           values[7] * GHG_Dict['District Steam'] / values[0],
-                           values[7] * GHG_Dict['District Steam'] / values[0],
-                           values[7] * GHG_Dict['District Steam'] / values[0],
-                           values[7] * GHG_Dict['District Steam'] / values[0],
-                           values[7] * GHG_Dict['District Steam'] / values[0],
-                           values[7] * GHG_Dict['District Steam'] / values[0],
-                           values[7] * GHG_Dict['District Steam'] / values[0],
-                           values[7] * GHG_Dict['District Steam'] / values[0],
-                           values[7] * GHG_Dict['District Steam'] / values[0],
-                           values[7] * GHG_Dict['District Steam'] / values[0],
-                           values[7] * GHG_Dict['District Steam'] / values[0],
-                           values[7] * GHG_Dict['District Steam'] / values[0],
-                           values[7] * GHG_Dict['District Steam'] / values[0],
-                           values[7] * GHG_Dict['District Steam'] / values[0],
-                           values[7] * GHG_Dict['District Steam'] / values[0],
-                           values[7] * GHG_Dict['District Steam'] / values[0],
-                           values[7] * GHG_Dict['District Steam'] / values[0],
-                           values[7] * GHG_Dict['District Steam'] / values[0],
-                           values[7] * GHG_Dict['District Steam'] / values[0]],
-        'District Hot Water': [values[8] * GHG_Dict['District Hot Water'] / values[0],
-                               values[8] * GHG_Dict['District Hot Water'] / values[0],
-                               values[8] * GHG_Dict['District Hot Water'] / values[0],
-                               values[8] * GHG_Dict['District Hot Water'] / values[0],
-                               values[8] * GHG_Dict['District Hot Water'] / values[0],
-                               values[8] * GHG_Dict['District Hot Water'] / values[0],
-                               values[8] * GHG_Dict['District Hot Water'] / values[0],
-                               values[8] * GHG_Dict['District Hot Water'] / values[0],
-                               values[8] * GHG_Dict['District Hot Water'] / values[0],
-                               values[8] * GHG_Dict['District Hot Water'] / values[0],
-                               values[8] * GHG_Dict['District Hot Water'] / values[0],
-                               values[8] * GHG_Dict['District Hot Water'] / values[0],
-                               values[8] * GHG_Dict['District Hot Water'] / values[0],
-                               values[8] * GHG_Dict['District Hot Water'] / values[0],
-                               values[8] * GHG_Dict['District Hot Water'] / values[0],
-                               values[8] * GHG_Dict['District Hot Water'] / values[0],
-                               values[8] * GHG_Dict['District Hot Water'] / values[0],
-                               values[8] * GHG_Dict['District Hot Water'] / values[0],
-                               values[8] * GHG_Dict['District Hot Water'] / values[0],
-                               values[8] * GHG_Dict['District Hot Water'] / values[0],
-                               values[8] * GHG_Dict['District Hot Water'] / values[0],
-                               values[8] * GHG_Dict['District Hot Water'] / values[0],
-                               values[8] * GHG_Dict['District Hot Water'] / values[0],
-                               values[8] * GHG_Dict['District Hot Water'] / values[0],
-                               values[8] * GHG_Dict['District Hot Water'] / values[0],
-                               values[8] * GHG_Dict['District Hot Water'] / values[0],
-                               values[8] * GHG_Dict['District Hot Water'] / values[0],
-                               values[8] * GHG_Dict['District Hot Water'] / values[0],
-                               values[8] * GHG_Dict['District Hot Water'] / values[0],
-                               values[8] * GHG_Dict['District Hot Water'] / values[0]],
-        'Elec-Driven Chiller': [values[9] * GHG_Dict['Electric Driven Chiller'] / values[0],
-                                values[9] * GHG_Dict['Electric Driven Chiller'] / values[0],
-                                values[9] * GHG_Dict['Electric Driven Chiller'] / values[0],
-                                values[9] * GHG_Dict['Electric Driven Chiller'] / values[0],
-                                values[9] * GHG_Dict['Electric Driven Chiller'] / values[0],
-                                values[9] * GHG_Dict['Electric Driven Chiller'] / values[0],
-                                values[9] * GHG_Dict['Electric Driven Chiller'] / values[0],
-                                values[9] * GHG_Dict['Electric Driven Chiller'] / values[0],
-                                values[9] * GHG_Dict['Electric Driven Chiller'] / values[0],
-                                values[9] * GHG_Dict['Electric Driven Chiller'] / values[0],
-                                values[9] * GHG_Dict['Electric Driven Chiller'] / values[0],
-                                values[9] * GHG_Dict['Electric Driven Chiller'] / values[0],
-                                values[9] * GHG_Dict['Electric Driven Chiller'] / values[0],
-                                values[9] * GHG_Dict['Electric Driven Chiller'] / values[0],
-                                values[9] * GHG_Dict['Electric Driven Chiller'] / values[0],
-                                values[9] * GHG_Dict['Electric Driven Chiller'] / values[0],
-                                values[9] * GHG_Dict['Electric Driven Chiller'] / values[0],
-                                values[9] * GHG_Dict['Electric Driven Chiller'] / values[0],
-                                values[9] * GHG_Dict['Electric Driven Chiller'] / values[0],
-                                values[9] * GHG_Dict['Electric Driven Chiller'] / values[0],
-                                values[9] * GHG_Dict['Electric Driven Chiller'] / values[0],
-                                values[9] * GHG_Dict['Electric Driven Chiller'] / values[0],
-                                values[9] * GHG_Dict['Electric Driven Chiller'] / values[0],
-                                values[9] * GHG_Dict['Electric Driven Chiller'] / values[0],
-                                values[9] * GHG_Dict['Electric Driven Chiller'] / values[0],
-                                values[9] * GHG_Dict['Electric Driven Chiller'] / values[0],
-                                values[9] * GHG_Dict['Electric Driven Chiller'] / values[0],
-                                values[9] * GHG_Dict['Electric Driven Chiller'] / values[0],
-                                values[9] * GHG_Dict['Electric Driven Chiller'] / values[0],
-                                values[9] * GHG_Dict['Electric Driven Chiller'] / values[0]],
-        'Gas Absorption Chiller': [values[10] * GHG_Dict['Absorption Chiller (Natural Gas)'] / values[0],
-                                   values[10] * GHG_Dict['Absorption Chiller (Natural Gas)'] / values[0],
-                                   values[10] * GHG_Dict['Absorption Chiller (Natural Gas)'] / values[0],
-                                   values[10] * GHG_Dict['Absorption Chiller (Natural Gas)'] / values[0],
-                                   values[10] * GHG_Dict['Absorption Chiller (Natural Gas)'] / values[0],
-                                   values[10] * GHG_Dict['Absorption Chiller (Natural Gas)'] / values[0],
-                                   values[10] * GHG_Dict['Absorption Chiller (Natural Gas)'] / values[0],
-                                   values[10] * GHG_Dict['Absorption Chiller (Natural Gas)'] / values[0],
-                                   values[10] * GHG_Dict['Absorption Chiller (Natural Gas)'] / values[0],
-                                   values[10] * GHG_Dict['Absorption Chiller (Natural Gas)'] / values[0],
-                                   values[10] * GHG_Dict['Absorption Chiller (Natural Gas)'] / values[0],
-                                   values[10] * GHG_Dict['Absorption Chiller (Natural Gas)'] / values[0],
-                                   values[10] * GHG_Dict['Absorption Chiller (Natural Gas)'] / values[0],
-                                   values[10] * GHG_Dict['Absorption Chiller (Natural Gas)'] / values[0],
-                                   values[10] * GHG_Dict['Absorption Chiller (Natural Gas)'] / values[0],
-                                   values[10] * GHG_Dict['Absorption Chiller (Natural Gas)'] / values[0],
-                                   values[10] * GHG_Dict['Absorption Chiller (Natural Gas)'] / values[0],
-                                   values[10] * GHG_Dict['Absorption Chiller (Natural Gas)'] / values[0],
-                                   values[10] * GHG_Dict['Absorption Chiller (Natural Gas)'] / values[0],
-                                   values[10] * GHG_Dict['Absorption Chiller (Natural Gas)'] / values[0],
-                                   values[10] * GHG_Dict['Absorption Chiller (Natural Gas)'] / values[0],
-                                   values[10] * GHG_Dict['Absorption Chiller (Natural Gas)'] / values[0],
-                                   values[10] * GHG_Dict['Absorption Chiller (Natural Gas)'] / values[0],
-                                   values[10] * GHG_Dict['Absorption Chiller (Natural Gas)'] / values[0],
-                                   values[10] * GHG_Dict['Absorption Chiller (Natural Gas)'] / values[0],
-                                   values[10] * GHG_Dict['Absorption Chiller (Natural Gas)'] / values[0],
-                                   values[10] * GHG_Dict['Absorption Chiller (Natural Gas)'] / values[0],
-                                   values[10] * GHG_Dict['Absorption Chiller (Natural Gas)'] / values[0],
-                                   values[10] * GHG_Dict['Absorption Chiller (Natural Gas)'] / values[0],
-                                   values[10] * GHG_Dict['Absorption Chiller (Natural Gas)'] / values[0]],
-        'Engine-Driven Chiller': [values[11] * GHG_Dict['Engine-Driven Chiller (Natural Gas)'] / values[0],
-                                  values[11] * GHG_Dict['Engine-Driven Chiller (Natural Gas)'] / values[0],
-                                  values[11] * GHG_Dict['Engine-Driven Chiller (Natural Gas)'] / values[0],
-                                  values[11] * GHG_Dict['Engine-Driven Chiller (Natural Gas)'] / values[0],
-                                  values[11] * GHG_Dict['Engine-Driven Chiller (Natural Gas)'] / values[0],
-                                  values[11] * GHG_Dict['Engine-Driven Chiller (Natural Gas)'] / values[0],
-                                  values[11] * GHG_Dict['Engine-Driven Chiller (Natural Gas)'] / values[0],
-                                  values[11] * GHG_Dict['Engine-Driven Chiller (Natural Gas)'] / values[0],
-                                  values[11] * GHG_Dict['Engine-Driven Chiller (Natural Gas)'] / values[0],
-                                  values[11] * GHG_Dict['Engine-Driven Chiller (Natural Gas)'] / values[0],
-                                  values[11] * GHG_Dict['Engine-Driven Chiller (Natural Gas)'] / values[0],
-                                  values[11] * GHG_Dict['Engine-Driven Chiller (Natural Gas)'] / values[0],
-                                  values[11] * GHG_Dict['Engine-Driven Chiller (Natural Gas)'] / values[0],
-                                  values[11] * GHG_Dict['Engine-Driven Chiller (Natural Gas)'] / values[0],
-                                  values[11] * GHG_Dict['Engine-Driven Chiller (Natural Gas)'] / values[0],
-                                  values[11] * GHG_Dict['Engine-Driven Chiller (Natural Gas)'] / values[0],
-                                  values[11] * GHG_Dict['Engine-Driven Chiller (Natural Gas)'] / values[0],
-                                  values[11] * GHG_Dict['Engine-Driven Chiller (Natural Gas)'] / values[0],
-                                  values[11] * GHG_Dict['Engine-Driven Chiller (Natural Gas)'] / values[0],
-                                  values[11] * GHG_Dict['Engine-Driven Chiller (Natural Gas)'] / values[0],
-                                  values[11] * GHG_Dict['Engine-Driven Chiller (Natural Gas)'] / values[0],
-                                  values[11] * GHG_Dict['Engine-Driven Chiller (Natural Gas)'] / values[0],
-                                  values[11] * GHG_Dict['Engine-Driven Chiller (Natural Gas)'] / values[0],
-                                  values[11] * GHG_Dict['Engine-Driven Chiller (Natural Gas)'] / values[0],
-                                  values[11] * GHG_Dict['Engine-Driven Chiller (Natural Gas)'] / values[0],
-                                  values[11] * GHG_Dict['Engine-Driven Chiller (Natural Gas)'] / values[0],
-                                  values[11] * GHG_Dict['Engine-Driven Chiller (Natural Gas)'] / values[0],
-                                  values[11] * GHG_Dict['Engine-Driven Chiller (Natural Gas)'] / values[0],
-                                  values[11] * GHG_Dict['Engine-Driven Chiller (Natural Gas)'] / values[0],
-                                  values[11] * GHG_Dict['Engine-Driven Chiller (Natural Gas)'] / values[0]],
-    })
-
-    # Create a DataFrame of CEI for all Fuel Types
-    df_total_cei = pd.DataFrame({
-        'X': ['2025', '2026', '2027', '2028',
-              '2029', '2030', '2031', '2032', '2033', '2034', '2035', '2036',
-              '2037', '2038', '2039', '2040', '2041', '2042', '2043', '2044',
-              '2045', '2046', '2047', '2048', '2049', '2050'],
-        'Building Carbon': [((values[1] * kWh_to_MMBTU * GHG_Dict['Electricity']['2025'] +
-                             values[2] * THERM_to_MMBTU * GHG_Dict['Natural Gas'] +
-                             values[3] * FO1_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 1)'] +
-                             values[4] * FO2_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 2)'] +
-                             values[5] * FO4_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 4)'] +
-                             values[6] * DIESEL_Gal_to_MMBTU * GHG_Dict['Diesel Oil'] +
-                             values[7] * GHG_Dict['District Steam'] +
-                             values[8] * GHG_Dict['District Hot Water'] +
-                             values[9] * GHG_Dict['Electric Driven Chiller'] +
-                             values[10] * GHG_Dict['Absorption Chiller (Natural Gas)'] +
-                             values[11] * GHG_Dict['Engine-Driven Chiller (Natural Gas)']) / values[0]),
-
-                            ((values[1] * kWh_to_MMBTU * GHG_Dict['Electricity']['2026'] +
-                             values[2] * THERM_to_MMBTU * GHG_Dict['Natural Gas'] +
-                             values[3] * FO1_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 1)'] +
-                             values[4] * FO2_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 2)'] +
-                             values[5] * FO4_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 4)'] +
-                             values[6] * DIESEL_Gal_to_MMBTU * GHG_Dict['Diesel Oil'] +
-                             values[7] * GHG_Dict['District Steam'] +
-                             values[8] * GHG_Dict['District Hot Water'] +
-                             values[9] * GHG_Dict['Electric Driven Chiller'] +
-                             values[10] * GHG_Dict['Absorption Chiller (Natural Gas)'] +
-                             values[11] * GHG_Dict['Engine-Driven Chiller (Natural Gas)']) / values[0]),
-
-                            ((values[1] * kWh_to_MMBTU * GHG_Dict['Electricity']['2027'] +
-                             values[2] * THERM_to_MMBTU * GHG_Dict['Natural Gas'] +
-                             values[3] * FO1_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 1)'] +
-                             values[4] * FO2_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 2)'] +
-                             values[5] * FO4_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 4)'] +
-                             values[6] * DIESEL_Gal_to_MMBTU * GHG_Dict['Diesel Oil'] +
-                             values[7] * GHG_Dict['District Steam'] +
-                             values[8] * GHG_Dict['District Hot Water'] +
-                             values[9] * GHG_Dict['Electric Driven Chiller'] +
-                             values[10] * GHG_Dict['Absorption Chiller (Natural Gas)'] +
-                             values[11] * GHG_Dict['Engine-Driven Chiller (Natural Gas)']) / values[0]),
-
-                            ((values[1] * kWh_to_MMBTU * GHG_Dict['Electricity']['2028'] +
-                             values[2] * THERM_to_MMBTU * GHG_Dict['Natural Gas'] +
-                             values[3] * FO1_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 1)'] +
-                             values[4] * FO2_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 2)'] +
-                             values[5] * FO4_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 4)'] +
-                             values[6] * DIESEL_Gal_to_MMBTU * GHG_Dict['Diesel Oil'] +
-                             values[7] * GHG_Dict['District Steam'] +
-                             values[8] * GHG_Dict['District Hot Water'] +
-                             values[9] * GHG_Dict['Electric Driven Chiller'] +
-                             values[10] * GHG_Dict['Absorption Chiller (Natural Gas)'] +
-                             values[11] * GHG_Dict['Engine-Driven Chiller (Natural Gas)']) / values[0]),
-
-                            ((values[1] * kWh_to_MMBTU * GHG_Dict['Electricity']['2029'] +
-                             values[2] * THERM_to_MMBTU * GHG_Dict['Natural Gas'] +
-                             values[3] * FO1_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 1)'] +
-                             values[4] * FO2_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 2)'] +
-                             values[5] * FO4_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 4)'] +
-                             values[6] * DIESEL_Gal_to_MMBTU * GHG_Dict['Diesel Oil'] +
-                             values[7] * GHG_Dict['District Steam'] +
-                             values[8] * GHG_Dict['District Hot Water'] +
-                             values[9] * GHG_Dict['Electric Driven Chiller'] +
-                             values[10] * GHG_Dict['Absorption Chiller (Natural Gas)'] +
-                             values[11] * GHG_Dict['Engine-Driven Chiller (Natural Gas)']) / values[0]),
-
-                            ((values[1] * kWh_to_MMBTU * GHG_Dict['Electricity']['2030'] +
-                             values[2] * THERM_to_MMBTU * GHG_Dict['Natural Gas'] +
-                             values[3] * FO1_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 1)'] +
-                             values[4] * FO2_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 2)'] +
-                             values[5] * FO4_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 4)'] +
-                             values[6] * DIESEL_Gal_to_MMBTU * GHG_Dict['Diesel Oil'] +
-                             values[7] * GHG_Dict['District Steam'] +
-                             values[8] * GHG_Dict['District Hot Water'] +
-                             values[9] * GHG_Dict['Electric Driven Chiller'] +
-                             values[10] * GHG_Dict['Absorption Chiller (Natural Gas)'] +
-                             values[11] * GHG_Dict['Engine-Driven Chiller (Natural Gas)']) / values[0]),
-
-                            ((values[1] * kWh_to_MMBTU * GHG_Dict['Electricity']['2031'] +
-                             values[2] * THERM_to_MMBTU * GHG_Dict['Natural Gas'] +
-                             values[3] * FO1_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 1)'] +
-                             values[4] * FO2_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 2)'] +
-                             values[5] * FO4_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 4)'] +
-                             values[6] * DIESEL_Gal_to_MMBTU * GHG_Dict['Diesel Oil'] +
-                             values[7] * GHG_Dict['District Steam'] +
-                             values[8] * GHG_Dict['District Hot Water'] +
-                             values[9] * GHG_Dict['Electric Driven Chiller'] +
-                             values[10] * GHG_Dict['Absorption Chiller (Natural Gas)'] +
-                             values[11] * GHG_Dict['Engine-Driven Chiller (Natural Gas)']) / values[0]),
-
-                            ((values[1] * kWh_to_MMBTU * GHG_Dict['Electricity']['2032'] +
-                             values[2] * THERM_to_MMBTU * GHG_Dict['Natural Gas'] +
-                             values[3] * FO1_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 1)'] +
-                             values[4] * FO2_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 2)'] +
-                             values[5] * FO4_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 4)'] +
-                             values[6] * DIESEL_Gal_to_MMBTU * GHG_Dict['Diesel Oil'] +
-                             values[7] * GHG_Dict['District Steam'] +
-                             values[8] * GHG_Dict['District Hot Water'] +
-                             values[9] * GHG_Dict['Electric Driven Chiller'] +
-                             values[10] * GHG_Dict['Absorption Chiller (Natural Gas)'] +
-                             values[11] * GHG_Dict['Engine-Driven Chiller (Natural Gas)']) / values[0]),
-
-                            ((values[1] * kWh_to_MMBTU * GHG_Dict['Electricity']['2033'] +
-                             values[2] * THERM_to_MMBTU * GHG_Dict['Natural Gas'] +
-                             values[3] * FO1_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 1)'] +
-                             values[4] * FO2_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 2)'] +
-                             values[5] * FO4_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 4)'] +
-                             values[6] * DIESEL_Gal_to_MMBTU * GHG_Dict['Diesel Oil'] +
-                             values[7] * GHG_Dict['District Steam'] +
-                             values[8] * GHG_Dict['District Hot Water'] +
-                             values[9] * GHG_Dict['Electric Driven Chiller'] +
-                             values[10] * GHG_Dict['Absorption Chiller (Natural Gas)'] +
-                             values[11] * GHG_Dict['Engine-Driven Chiller (Natural Gas)']) / values[0]),
-
-                            ((values[1] * kWh_to_MMBTU * GHG_Dict['Electricity']['2034'] +
-                             values[2] * THERM_to_MMBTU * GHG_Dict['Natural Gas'] +
-                             values[3] * FO1_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 1)'] +
-                             values[4] * FO2_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 2)'] +
-                             values[5] * FO4_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 4)'] +
-                             values[6] * DIESEL_Gal_to_MMBTU * GHG_Dict['Diesel Oil'] +
-                             values[7] * GHG_Dict['District Steam'] +
-                             values[8] * GHG_Dict['District Hot Water'] +
-                             values[9] * GHG_Dict['Electric Driven Chiller'] +
-                             values[10] * GHG_Dict['Absorption Chiller (Natural Gas)'] +
-                             values[11] * GHG_Dict['Engine-Driven Chiller (Natural Gas)']) / values[0]),
-
-                            ((values[1] * kWh_to_MMBTU * GHG_Dict['Electricity']['2035'] +
-                             values[2] * THERM_to_MMBTU * GHG_Dict['Natural Gas'] +
-                             values[3] * FO1_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 1)'] +
-                             values[4] * FO2_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 2)'] +
-                             values[5] * FO4_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 4)'] +
-                             values[6] * DIESEL_Gal_to_MMBTU * GHG_Dict['Diesel Oil'] +
-                             values[7] * GHG_Dict['District Steam'] +
-                             values[8] * GHG_Dict['District Hot Water'] +
-                             values[9] * GHG_Dict['Electric Driven Chiller'] +
-                             values[10] * GHG_Dict['Absorption Chiller (Natural Gas)'] +
-                             values[11] * GHG_Dict['Engine-Driven Chiller (Natural Gas)']) / values[0]),
-
-                            ((values[1] * kWh_to_MMBTU * GHG_Dict['Electricity']['2036'] +
-                             values[2] * THERM_to_MMBTU * GHG_Dict['Natural Gas'] +
-                             values[3] * FO1_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 1)'] +
-                             values[4] * FO2_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 2)'] +
-                             values[5] * FO4_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 4)'] +
-                             values[6] * DIESEL_Gal_to_MMBTU * GHG_Dict['Diesel Oil'] +
-                             values[7] * GHG_Dict['District Steam'] +
-                             values[8] * GHG_Dict['District Hot Water'] +
-                             values[9] * GHG_Dict['Electric Driven Chiller'] +
-                             values[10] * GHG_Dict['Absorption Chiller (Natural Gas)'] +
-                             values[11] * GHG_Dict['Engine-Driven Chiller (Natural Gas)']) / values[0]),
-
-                            ((values[1] * kWh_to_MMBTU * GHG_Dict['Electricity']['2037'] +
-                             values[2] * THERM_to_MMBTU * GHG_Dict['Natural Gas'] +
-                             values[3] * FO1_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 1)'] +
-                             values[4] * FO2_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 2)'] +
-                             values[5] * FO4_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 4)'] +
-                             values[6] * DIESEL_Gal_to_MMBTU * GHG_Dict['Diesel Oil'] +
-                             values[7] * GHG_Dict['District Steam'] +
-                             values[8] * GHG_Dict['District Hot Water'] +
-                             values[9] * GHG_Dict['Electric Driven Chiller'] +
-                             values[10] * GHG_Dict['Absorption Chiller (Natural Gas)'] +
-                             values[11] * GHG_Dict['Engine-Driven Chiller (Natural Gas)']) / values[0]),
-
-                            ((values[1] * kWh_to_MMBTU * GHG_Dict['Electricity']['2038'] +
-                             values[2] * THERM_to_MMBTU * GHG_Dict['Natural Gas'] +
-                             values[3] * FO1_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 1)'] +
-                             values[4] * FO2_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 2)'] +
-                             values[5] * FO4_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 4)'] +
-                             values[6] * DIESEL_Gal_to_MMBTU * GHG_Dict['Diesel Oil'] +
-                             values[7] * GHG_Dict['District Steam'] +
-                             values[8] * GHG_Dict['District Hot Water'] +
-                             values[9] * GHG_Dict['Electric Driven Chiller'] +
-                             values[10] * GHG_Dict['Absorption Chiller (Natural Gas)'] +
-                             values[11] * GHG_Dict['Engine-Driven Chiller (Natural Gas)']) / values[0]),
-
-                            ((values[1] * kWh_to_MMBTU * GHG_Dict['Electricity']['2039'] +
-                             values[2] * THERM_to_MMBTU * GHG_Dict['Natural Gas'] +
-                             values[3] * FO1_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 1)'] +
-                             values[4] * FO2_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 2)'] +
-                             values[5] * FO4_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 4)'] +
-                             values[6] * DIESEL_Gal_to_MMBTU * GHG_Dict['Diesel Oil'] +
-                             values[7] * GHG_Dict['District Steam'] +
-                             values[8] * GHG_Dict['District Hot Water'] +
-                             values[9] * GHG_Dict['Electric Driven Chiller'] +
-                             values[10] * GHG_Dict['Absorption Chiller (Natural Gas)'] +
-                             values[11] * GHG_Dict['Engine-Driven Chiller (Natural Gas)']) / values[0]),
-
-                            ((values[1] * kWh_to_MMBTU * GHG_Dict['Electricity']['2040'] +
-                             values[2] * THERM_to_MMBTU * GHG_Dict['Natural Gas'] +
-                             values[3] * FO1_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 1)'] +
-                             values[4] * FO2_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 2)'] +
-                             values[5] * FO4_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 4)'] +
-                             values[6] * DIESEL_Gal_to_MMBTU * GHG_Dict['Diesel Oil'] +
-                             values[7] * GHG_Dict['District Steam'] +
-                             values[8] * GHG_Dict['District Hot Water'] +
-                             values[9] * GHG_Dict['Electric Driven Chiller'] +
-                             values[10] * GHG_Dict['Absorption Chiller (Natural Gas)'] +
-                             values[11] * GHG_Dict['Engine-Driven Chiller (Natural Gas)']) / values[0]),
-
-                            ((values[1] * kWh_to_MMBTU * GHG_Dict['Electricity']['2041'] +
-                             values[2] * THERM_to_MMBTU * GHG_Dict['Natural Gas'] +
-                             values[3] * FO1_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 1)'] +
-                             values[4] * FO2_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 2)'] +
-                             values[5] * FO4_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 4)'] +
-                             values[6] * DIESEL_Gal_to_MMBTU * GHG_Dict['Diesel Oil'] +
-                             values[7] * GHG_Dict['District Steam'] +
-                             values[8] * GHG_Dict['District Hot Water'] +
-                             values[9] * GHG_Dict['Electric Driven Chiller'] +
-                             values[10] * GHG_Dict['Absorption Chiller (Natural Gas)'] +
-                             values[11] * GHG_Dict['Engine-Driven Chiller (Natural Gas)']) / values[0]),
-
-                            ((values[1] * kWh_to_MMBTU * GHG_Dict['Electricity']['2042'] +
-                             values[2] * THERM_to_MMBTU * GHG_Dict['Natural Gas'] +
-                             values[3] * FO1_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 1)'] +
-                             values[4] * FO2_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 2)'] +
-                             values[5] * FO4_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 4)'] +
-                             values[6] * DIESEL_Gal_to_MMBTU * GHG_Dict['Diesel Oil'] +
-                             values[7] * GHG_Dict['District Steam'] +
-                             values[8] * GHG_Dict['District Hot Water'] +
-                             values[9] * GHG_Dict['Electric Driven Chiller'] +
-                             values[10] * GHG_Dict['Absorption Chiller (Natural Gas)'] +
-                             values[11] * GHG_Dict['Engine-Driven Chiller (Natural Gas)']) / values[0]),
-
-                            ((values[1] * kWh_to_MMBTU * GHG_Dict['Electricity']['2043'] +
-                             values[2] * THERM_to_MMBTU * GHG_Dict['Natural Gas'] +
-                             values[3] * FO1_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 1)'] +
-                             values[4] * FO2_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 2)'] +
-                             values[5] * FO4_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 4)'] +
-                             values[6] * DIESEL_Gal_to_MMBTU * GHG_Dict['Diesel Oil'] +
-                             values[7] * GHG_Dict['District Steam'] +
-                             values[8] * GHG_Dict['District Hot Water'] +
-                             values[9] * GHG_Dict['Electric Driven Chiller'] +
-                             values[10] * GHG_Dict['Absorption Chiller (Natural Gas)'] +
-                             values[11] * GHG_Dict['Engine-Driven Chiller (Natural Gas)']) / values[0]),
-
-                            ((values[1] * kWh_to_MMBTU * GHG_Dict['Electricity']['2044'] +
-                             values[2] * THERM_to_MMBTU * GHG_Dict['Natural Gas'] +
-                             values[3] * FO1_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 1)'] +
-                             values[4] * FO2_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 2)'] +
-                             values[5] * FO4_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 4)'] +
-                             values[6] * DIESEL_Gal_to_MMBTU * GHG_Dict['Diesel Oil'] +
-                             values[7] * GHG_Dict['District Steam'] +
-                             values[8] * GHG_Dict['District Hot Water'] +
-                             values[9] * GHG_Dict['Electric Driven Chiller'] +
-                             values[10] * GHG_Dict['Absorption Chiller (Natural Gas)'] +
-                             values[11] * GHG_Dict['Engine-Driven Chiller (Natural Gas)']) / values[0]),
-
-                            ((values[1] * kWh_to_MMBTU * GHG_Dict['Electricity']['2045'] +
-                             values[2] * THERM_to_MMBTU * GHG_Dict['Natural Gas'] +
-                             values[3] * FO1_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 1)'] +
-                             values[4] * FO2_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 2)'] +
-                             values[5] * FO4_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 4)'] +
-                             values[6] * DIESEL_Gal_to_MMBTU * GHG_Dict['Diesel Oil'] +
-                             values[7] * GHG_Dict['District Steam'] +
-                             values[8] * GHG_Dict['District Hot Water'] +
-                             values[9] * GHG_Dict['Electric Driven Chiller'] +
-                             values[10] * GHG_Dict['Absorption Chiller (Natural Gas)'] +
-                             values[11] * GHG_Dict['Engine-Driven Chiller (Natural Gas)']) / values[0]),
-
-                            ((values[1] * kWh_to_MMBTU * GHG_Dict['Electricity']['2046'] +
-                             values[2] * THERM_to_MMBTU * GHG_Dict['Natural Gas'] +
-                             values[3] * FO1_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 1)'] +
-                             values[4] * FO2_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 2)'] +
-                             values[5] * FO4_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 4)'] +
-                             values[6] * DIESEL_Gal_to_MMBTU * GHG_Dict['Diesel Oil'] +
-                             values[7] * GHG_Dict['District Steam'] +
-                             values[8] * GHG_Dict['District Hot Water'] +
-                             values[9] * GHG_Dict['Electric Driven Chiller'] +
-                             values[10] * GHG_Dict['Absorption Chiller (Natural Gas)'] +
-                             values[11] * GHG_Dict['Engine-Driven Chiller (Natural Gas)']) / values[0]),
-
-                            ((values[1] * kWh_to_MMBTU * GHG_Dict['Electricity']['2047'] +
-                             values[2] * THERM_to_MMBTU * GHG_Dict['Natural Gas'] +
-                             values[3] * FO1_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 1)'] +
-                             values[4] * FO2_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 2)'] +
-                             values[5] * FO4_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 4)'] +
-                             values[6] * DIESEL_Gal_to_MMBTU * GHG_Dict['Diesel Oil'] +
-                             values[7] * GHG_Dict['District Steam'] +
-                             values[8] * GHG_Dict['District Hot Water'] +
-                             values[9] * GHG_Dict['Electric Driven Chiller'] +
-                             values[10] * GHG_Dict['Absorption Chiller (Natural Gas)'] +
-                             values[11] * GHG_Dict['Engine-Driven Chiller (Natural Gas)']) / values[0]),
-
-                            ((values[1] * kWh_to_MMBTU * GHG_Dict['Electricity']['2048'] +
-                             values[2] * THERM_to_MMBTU * GHG_Dict['Natural Gas'] +
-                             values[3] * FO1_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 1)'] +
-                             values[4] * FO2_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 2)'] +
-                             values[5] * FO4_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 4)'] +
-                             values[6] * DIESEL_Gal_to_MMBTU * GHG_Dict['Diesel Oil'] +
-                             values[7] * GHG_Dict['District Steam'] +
-                             values[8] * GHG_Dict['District Hot Water'] +
-                             values[9] * GHG_Dict['Electric Driven Chiller'] +
-                             values[10] * GHG_Dict['Absorption Chiller (Natural Gas)'] +
-                             values[11] * GHG_Dict['Engine-Driven Chiller (Natural Gas)']) / values[0]),
-
-                            ((values[1] * kWh_to_MMBTU * GHG_Dict['Electricity']['2049'] +
-                             values[2] * THERM_to_MMBTU * GHG_Dict['Natural Gas'] +
-                             values[3] * FO1_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 1)'] +
-                             values[4] * FO2_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 2)'] +
-                             values[5] * FO4_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 4)'] +
-                             values[6] * DIESEL_Gal_to_MMBTU * GHG_Dict['Diesel Oil'] +
-                             values[7] * GHG_Dict['District Steam'] +
-                             values[8] * GHG_Dict['District Hot Water'] +
-                             values[9] * GHG_Dict['Electric Driven Chiller'] +
-                             values[10] * GHG_Dict['Absorption Chiller (Natural Gas)'] +
-                             values[11] * GHG_Dict['Engine-Driven Chiller (Natural Gas)']) / values[0]),
-
-                            ((values[1] * kWh_to_MMBTU * GHG_Dict['Electricity']['2050'] +
-                             values[2] * THERM_to_MMBTU * GHG_Dict['Natural Gas'] +
-                             values[3] * FO1_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 1)'] +
-                             values[4] * FO2_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 2)'] +
-                             values[5] * FO4_Gal_to_MMBTU * GHG_Dict['Fuel Oil (No. 4)'] +
-                             values[6] * DIESEL_Gal_to_MMBTU * GHG_Dict['Diesel Oil'] +
-                             values[7] * GHG_Dict['District Steam'] +
-                             values[8] * GHG_Dict['District Hot Water'] +
-                             values[9] * GHG_Dict['Electric Driven Chiller'] +
-                             values[10] * GHG_Dict['Absorption Chiller (Natural Gas)'] +
-                             values[11] * GHG_Dict['Engine-Driven Chiller (Natural Gas)']) / values[0])
-
-        ]
-    })
-
-    # Create a Condition for CEI Penalty
-    condition = df_total_cei['Building Carbon'] > df_1[col_chosen]
-
-    # Create an Empty DataFrame for Cost per Year
-    df_cost = pd.DataFrame()
-
-    # Populate the DataFrame with Cost Penalty using Conditional Statement
-    df_cost['Cost Penalty'] = round(((df_total_cei['Building Carbon'] - df_1[col_chosen]) * CO2_COST * values[0] * condition / 1000), 0)
-
-    # Create a DataFrame for Summary of Results
-    df_summary = pd.DataFrame({
-        'Period': ['2025-2029', '2030-2034', '2035-2039', '2040-2044', '2045-2049', '2050+'],
-        'Building Emissions (kg CO2e/sf/yr)': [round(df_total_cei['Building Carbon'][0], 2), round(df_total_cei['Building Carbon'][5], 2),
-                                               round(df_total_cei['Building Carbon'][10], 2), round(df_total_cei['Building Carbon'][15], 2),
-                                               round(df_total_cei['Building Carbon'][20], 2), round(df_total_cei['Building Carbon'][25], 2)],
-        'BERDO Threshold (kg CO2e/sf/yr)': [df_1[col_chosen][0], df_1[col_chosen][5],
-                                            df_1[col_chosen][10], df_1[col_chosen][15],
-                                            df_1[col_chosen][20], df_1[col_chosen][25]],
-        'Cost Penalty ($/yr)': [df_cost['Cost Penalty'][0], df_cost['Cost Penalty'][5], df_cost['Cost Penalty'][10],
-                                df_cost['Cost Penalty'][15], df_cost['Cost Penalty'][20], df_cost['Cost Penalty'][25]]
-    })
-
-    # Create Line Graph
-    fig1 = px.line(df, x="Year", y=col_chosen, template='YETI', title='<b>Building CEI vs. BERDO Threshold (kg CO2e/sf/yr)</b>')
-    fig1.update_traces(line=dict(width=3, color='#000000'), hovertemplate='<b>Year:</b> %{x}<br><b>Threshold CEI:</b> %{y}</b>')
-
-    # Create Bar Graph
-    fig2 = px.bar(x=df_total_cei['X'], y=df_cost['Cost Penalty'], template='YETI', title='<b>Building Cost Penalty ($)')
-    fig2.update_traces(hovertemplate='<b>Year:</b> %{x}<br><b>Cost Penalty:</b> %{y}')
-
-    # Create bar chart of emissions values
-    fig1.add_trace(go.Bar(x=df_cei['X'], y=[round(val, 2) for val in df_cei['Engine-Driven Chiller']],
-                          name='Engine-Driven Chiller',
-                          marker={'color': '#00951D'},
-                          hovertemplate='<b>Year:</b> %{x}<br><b>CEI:</b> %{y}'))
-    fig1.add_bar(x=df_cei['X'], y=[round(val, 2) for val in df_cei['Gas Absorption Chiller']],
-                 name='Gas Absorption Chiller',
-                 marker={'color': '#0FE312'},
-                 hovertemplate='<b>Year:</b> %{x}<br><b>CEI:</b> %{y}')
-    fig1.add_bar(x=df_cei['X'], y=[round(val, 2) for val in df_cei['Elec-Driven Chiller']],
-                 name='Elec-Driven Chiller',
-                 marker={'color': '#7BF0A4'},
-                 hovertemplate='<b>Year:</b> %{x}<br><b>CEI:</b> %{y}')
-    fig1.add_bar(x=df_cei['X'], y=[round(val, 2) for val in df_cei['District Hot Water']],
-                 name='District Hot Water',
-                 marker={'color': '#0105F5'},
-                 hovertemplate='<b>Year:</b> %{x}<br><b>CEI:</b> %{y}')
-    fig1.add_bar(x=df_cei['X'], y=[round(val, 2) for val in df_cei['District Steam']],
-                 name='District Steam',
-                 marker={'color': '#01A3F5'},
-                 hovertemplate='<b>Year:</b> %{x}<br><b>CEI:</b> %{y}')
-    fig1.add_bar(x=df_cei['X'], y=[round(val, 2) for val in df_cei['Diesel']],
-                 name='Diesel',
-                 marker={'color': '#931E07'},
-                 hovertemplate='<b>Year:</b> %{x}<br><b>CEI:</b> %{y}')
-    fig1.add_bar(x=df_cei['X'], y=[round(val, 2) for val in df_cei['Fuel Oil #4']],
-                 name='Fuel Oil #4',
-                 marker={'color': '#9901F5'},
-                 hovertemplate='<b>Year:</b> %{x}<br><b>CEI:</b> %{y}')
-    fig1.add_bar(x=df_cei['X'], y=[round(val, 2) for val in df_cei['Fuel Oil #2']],
-                 name='Fuel Oil #2',
-                 marker={'color': '#E601F5'},
-                 hovertemplate='<b>Year:</b> %{x}<br><b>CEI:</b> %{y}')
-    fig1.add_bar(x=df_cei['X'], y=[round(val, 2) for val in df_cei['Fuel Oil #1']],
-                 name='Fuel Oil #1',
-                 marker={'color': '#F501A4'},
-                 hovertemplate='<b>Year:</b> %{x}<br><b>CEI:</b> %{y}')
-    fig1.add_bar(x=df_cei['X'], y=[round(val, 2) for val in df_cei['Natural Gas']],
-                 name='Natural Gas',
-                 marker={'color': '#E51212'},
-                 hovertemplate='<b>Year:</b> %{x}<br><b>CEI:</b> %{y}')
-    fig1.add_bar(x=df_cei['X'], y=[round(val, 2) for val in df_cei['Electricity']],
-                 name='Electricity',
-                 marker={'color': '#E4E948'},
-                 hovertemplate='<b>Year:</b> %{x}<br><b>CEI:</b> %{y}')
-
-    # Stack bar chart emissions values
-    fig1.update_layout(barmode='stack',
-                       title={'font': {'size': 12, 'family': 'Helvetica'}},
-                       yaxis_title='CEI (kg CO2e/sf/yr)',
-                       yaxis=dict(tickformat='.2f')
-                       )
-    fig2.update_layout(barmode='stack',
-                       title={'font': {'size': 12, 'family': 'Helvetica'}},
-                       xaxis_title='Year',
-                       yaxis_title='Alternative Compliance Payment ($)',
-                       yaxis=dict(tickprefix="$")
-                       )
-
-    return fig1, fig2, dash_table.DataTable(
+        return no_update, no_update, html.Div("Click Calculate to load graphics.")
+
+    if values[0] == 0:
+        return no_update, no_update, html.Div("Enter the building square footage to load graphics.")
+
+    with callback_phase('compute'):
+        # Calculate CEI per Fuel Type and Year, then CEI for all Fuel Types in the BERDO compliance years
+        cei = calculate_cei(values[1:], values[0], cei_factor_matrix)
+        total_cei = cei[penalty_year_rows].sum(axis=1)
+
+        # Calculate the Cost Penalty for every year the Building Carbon exceeds the threshold
+        thresholds = df_1[col_chosen].to_numpy()[:len(PENALTY_YEARS)]
+        cost_penalty = calculate_penalty(total_cei, thresholds, values[0])
+
+        # Create a DataFrame for Summary of Results
+        summary_rows = [0, 5, 10, 15, 20, 25]
+        df_summary = pd.DataFrame({
+            'Period': ['2025-2029', '2030-2034', '2035-2039', '2040-2044', '2045-2049', '2050+'],
+            'Building Emissions (kg CO2e/sf/yr)': total_cei[summary_rows].round(2),
+            'BERDO Threshold (kg CO2e/sf/yr)': thresholds[summary_rows],
+            'Cost Penalty ($/yr)': cost_penalty[summary_rows]
+        })
+
+    with callback_phase('figure'):
+        # Patch the y-arrays of the prebuilt figures
+        fig1 = patch_cei_figure(df[col_chosen], cei)
+        fig2 = patch_cost_figure(cost_penalty)
+        summary_table = summary_table_component(df_summary)
+
+    return fig1, fig2, summary_table
+
+
+def summary_table_component(df_summary):
+    return dash_table.DataTable(
         columns=[{'name': i, 'id': i} for i in df_summary.columns],
         data=df_summary.to_dict('records'),
         style_table={'height': '500px',
@@ -965,6 +313,134 @@ def update_graph(col_chosen, n_clicks, *input_values):
     )
 
 
+@callback(
+    Output('building-search', 'options'),
+    Input('building-search', 'search_value'),
+    prevent_initial_call=True
+)
+@instrument_callback('update_building_options')
+def update_building_options(search_value):
+    # Keep the current options (and the selected building) while the search box is empty
+    if not search_value:
+        return no_update
+
+    rows = search_buildings(building_index, search_value)
+    return [{'label': building_index['labels'][row], 'value': building_index['berdo_ids'][row]} for row in rows]
+
+
+@callback(
+    Output('my-dropdown-final', 'value'),
+    Output('gsf', 'value'),
+    [Output(f'value{i}', 'value') for i in range(1, 12)],
+    Output('calc_button', 'n_clicks'),
+    Output('building-search-note', 'children'),
+    Input('building-search', 'value'),
+    State('calc_button', 'n_clicks'),
+    prevent_initial_call=True
+)
+@instrument_callback('fill_building_inputs')
+def fill_building_inputs(berdo_id, n_clicks):
+    building = get_building_inputs(building_index, berdo_id)
+    if building is None:
+        return no_update, no_update, *[no_update] * 11, no_update, ''
+
+    note = ''
+    if building['unmapped_usage'] > 0:
+        note = (f"{building['unmapped_usage']:,.0f} kBtu of Fuel Oil #5 & #6, propane, kerosene or district "
+                f"chilled water is not included in the calculation.")
+
+    gsf = f"{building['gsf']:.0f}"
+    usage = [f'{usage:.0f}' for usage in building['usage']]
+
+    # Without a threshold for the property type, fill the usage and leave the property type to the user
+    if building['property_type'] not in df.columns or building['property_type'] not in df_1.columns:
+        note = (f"{building['property_type']} has no BERDO threshold; select a property type and press "
+                f"Calculate. {note}").strip()
+        return no_update, gsf, *usage, no_update, note
+
+    # Fill the inputs and press Calculate so the projection renders right away
+    return building['property_type'], gsf, *usage, n_clicks + 1, note
+
+
+@callback(
+    Output('bulk-upload-key', 'data'),
+    Output('bulk-upload-status', 'children'),
+    Output('bulk-results-table', 'page_current'),
+    Output('bulk-upload', 'contents'),
+    Input('bulk-upload', 'contents'),
+    State('bulk-upload', 'filename'),
+    background=True,
+    running=[
+        (Output('bulk-upload', 'disabled'), True, False),
+        (Output('bulk-cancel-button', 'disabled'), False, True)
+    ],
+    progress=[Output('bulk-progress', 'value'), Output('bulk-progress', 'label')],
+    cancel=[Input('bulk-cancel-button', 'n_clicks')],
+    prevent_initial_call=True
+)
+@instrument_callback('score_upload')
+def score_upload(set_progress, contents, filename):
+    # Cleared contents of an upload that was already scored
+    if contents is None:
+        return no_update, no_update, no_update, no_update
+
+    # Parse the uploaded portfolio, reporting progress as each chunk of the file is read
+    set_progress((0, ''))
+    try:
+        df_attributes, usage = parse_upload(
+            contents, progress=lambda fraction: set_progress((90 * fraction, f'Reading {fraction:.0%}')))
+    except (ValueError, UnicodeDecodeError, pd.errors.ParserError) as error:
+        set_progress((0, ''))
+        return None, html.Div(f"Could not read {filename}: {error}"), 0, None
+
+    # Score every building at once
+    set_progress((90, 'Scoring'))
+    df_results = score_buildings(df_attributes, usage, penalty_factor_matrix, df_1)
+    set_progress((100, f'{len(df_results):,} buildings'))
+    unscored = int(df_results['Total Cost Penalty 2025-2050 ($)'].isna().sum())
+
+    status = f"Scored {len(df_results) - unscored} of {len(df_results)} buildings from {filename}."
+    if unscored:
+        status += f" {unscored} buildings are missing a square footage or a recognized property type."
+
+    # Clear the upload once the results are stored, so the file is not kept in the browser and sent with later requests
+    return store_results(df_results), html.Div(status), 0, None
+
+
+@callback(
+    Output('bulk-results-table', 'data'),
+    Output('bulk-results-table', 'page_count'),
+    Input('bulk-upload-key', 'data'),
+    Input('bulk-results-table', 'page_current'),
+    Input('bulk-results-table', 'page_size'),
+    Input('bulk-results-table', 'sort_by')
+)
+@instrument_callback('update_bulk_table')
+def update_bulk_table(key, page_current, page_size, sort_by):
+    df_results = get_results(key)
+    if df_results is None:
+        return [], 0
+
+    # Only the requested page is sent to the browser
+    page_count = -(-len(df_results) // page_size)
+    return get_results_page(df_results, page_current, page_size, sort_by), page_count
+
+
+@callback(
+    Output('bulk-download', 'data'),
+    Input('bulk-download-button', 'n_clicks'),
+    State('bulk-upload-key', 'data'),
+    prevent_initial_call=True
+)
+@instrument_callback('download_bulk_results')
+def download_bulk_results(n_clicks, key):
+    df_results = get_results(key)
+    if df_results is None:
+        return no_update
+
+    return dcc.send_data_frame(df_results.to_csv, 'berdo-penalty-projection.csv', index=False)
+
+
 # Run the app
 if __name__ == '__main__':
-    app.run(debug=True)
\ No newline at end of file
+    app.run(debug=True)
@@ -0,0 +1,188 @@
+import bisect
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+from addresses import standardize_address_extended
+from emissions_model import kWh_to_MMBTU, THERM_to_MMBTU, FO1_Gal_to_MMBTU, FO2_Gal_to_MMBTU, FO4_Gal_to_MMBTU, \
+    DIESEL_Gal_to_MMBTU
+
+
+# Preprocessed usage columns (kBtu) feeding each app usage input (value1 - value11) and the
+# conversion from MMBtu to the input's units. None of the chiller inputs matches the district
+# chilled water factor of the pipeline, so the chillers are left empty.
+INDEX_USAGE_COLUMNS = [
+    ('Electricity Usage (kBtu)', 1 / kWh_to_MMBTU),
+    ('Natural Gas Usage (kBtu)', 1 / THERM_to_MMBTU),
+    ('Fuel Oil 1 Usage (kBtu)', 1 / FO1_Gal_to_MMBTU),
+    ('Fuel Oil 2 Usage (kBtu)', 1 / FO2_Gal_to_MMBTU),
+    ('Fuel Oil 4 Usage (kBtu)', 1 / FO4_Gal_to_MMBTU),
+    ('Diesel Usage (kBtu)', 1 / DIESEL_Gal_to_MMBTU),
+    ('District Steam Usage (kBtu)', 1),
+    ('District Hot Water Usage (kBtu)', 1),
+    (None, 1),
+    (None, 1),
+    (None, 1),
+]
+
+# Reported fuels that have no matching input in the app
+INDEX_UNMAPPED_COLUMNS = ['Fuel Oil 5 and 6 Usage (kBtu)', 'Propane Usage (kBtu)', 'Kerosene Usage (kBtu)',
+                          'District Chilled Water Usage (kBtu)']
+
+# BERDO property types whose name differs from the app's dropdown options
+INDEX_PROPERTY_TYPE_NAMES = {'Food Sales & Service': 'Food Sales & Services'}
+
+
+def normalize_search_text(text):
+    """
+    Normalizes an address, owner name or search query for trigram matching.
+
+    Parameters:
+    text (str): The text to normalize.
+
+    Returns:
+    str: The lower-cased, standardized text with single spaces.
+    """
+    return ' '.join(standardize_address_extended(str(text)).lower().split())
+
+
+def text_trigrams(text):
+    """
+    Splits normalized text into its set of character trigrams, padding each word with spaces.
+
+    Parameters:
+    text (str): Text returned by normalize_search_text.
+
+    Returns:
+    set: The trigrams of every word in the text.
+    """
+    trigrams = set()
+    for word in text.split():
+        padded = f'  {word} '
+        trigrams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return trigrams
+
+
+def build_building_index(df):
+    """
+    Builds an in-memory lookup index over the preprocessed BERDO emissions data.
+
+    The index holds a hash map from BERDO ID to row, the sorted IDs for prefix searches,
+    trigram posting lists over the normalized building address and owner name, and the
+    usage of every building already converted to the app's input units, so lookups never
+    touch the CSV again.
+
+    Parameters:
+    df (pandas.DataFrame): The preprocessed data from 1-berdo-emissions-data.csv.
+
+    Returns:
+    dict: The index, to be passed to search_buildings and get_building_inputs.
+    """
+    df = df.reset_index(drop=True)
+    berdo_ids = df['BERDO ID'].astype(str).tolist()
+
+    # Usage in input units, with onsite renewable electricity removed as in the emissions calculation
+    usage = np.zeros((len(df), len(INDEX_USAGE_COLUMNS)))
+    for column, (usage_column, conversion) in enumerate(INDEX_USAGE_COLUMNS):
+        if usage_column is not None:
+            usage[:, column] = df[usage_column].fillna(0).to_numpy(dtype=float) / 1000 * conversion
+    usage[:, 0] -= df['Renewable System Electricity Usage Onsite (kBtu)'].fillna(0).to_numpy(dtype=float) \
+        / 1000 / kWh_to_MMBTU
+    usage = np.maximum(usage.round(0), 0)
+
+    addresses = df['Building Address'].fillna('').astype(str)
+    owners = df['Property Owner Name'].fillna('').astype(str)
+    labels = [f'{berdo_id} - {address} ({owner})' for berdo_id, address, owner in zip(berdo_ids, addresses, owners)]
+
+    # Trigram posting lists over the address and owner of each building
+    postings = defaultdict(list)
+    for row, (address, owner) in enumerate(zip(addresses, owners)):
+        for trigram in text_trigrams(normalize_search_text(f'{address} {owner}')):
+            postings[trigram].append(row)
+
+    return {
+        'id_to_row': {berdo_id: row for row, berdo_id in enumerate(berdo_ids)},
+        'sorted_ids': sorted(berdo_ids),
+        'trigrams': {trigram: np.array(rows, dtype=np.int32) for trigram, rows in postings.items()},
+        'labels': labels,
+        'berdo_ids': berdo_ids,
+        'gsf': df['Reported Gross Floor Area (Sq Ft)'].fillna(0).to_numpy(dtype=float),
+        'property_types': df['BERDO Property Type'].replace(INDEX_PROPERTY_TYPE_NAMES).tolist(),
+        'usage': usage,
+        'unmapped_usage': df[INDEX_UNMAPPED_COLUMNS].fillna(0).to_numpy(dtype=float).sum(axis=1),
+    }
+
+
+def search_buildings(index, query, limit=20):
+    """
+    Finds buildings by BERDO ID prefix or by fuzzy match on address and owner name.
+
+    Queries made only of digits are matched as BERDO ID prefixes through a binary search over
+    the sorted IDs. Other queries are ranked by the share of their trigrams found in each
+    building's address and owner name, counted with a single bincount over the posting lists.
+
+    Parameters:
+    index (dict): An index from build_building_index.
+    query (str): The search text.
+    limit (int): The maximum number of matches to return.
+
+    Returns:
+    list: The row numbers of the best matches, best first.
+    """
+    query = (query or '').strip()
+    if not query:
+        return []
+
+    if query.isdigit():
+        sorted_ids = index['sorted_ids']
+        start = bisect.bisect_left(sorted_ids, query)
+        end = bisect.bisect_left(sorted_ids, query + '\x7f', lo=start)
+        return [index['id_to_row'][berdo_id] for berdo_id in sorted_ids[start:min(end, start + limit)]]
+
+    trigrams = [index['trigrams'][trigram] for trigram in text_trigrams(normalize_search_text(query))
+                if trigram in index['trigrams']]
+    if not trigrams:
+        return []
+
+    scores = np.bincount(np.concatenate(trigrams), minlength=len(index['berdo_ids']))
+    limit = min(limit, np.count_nonzero(scores))
+    best = np.argpartition(-scores, limit - 1)[:limit]
+    return best[np.argsort(-scores[best], kind='stable')].tolist()
+
+
+def get_building_inputs(index, berdo_id):
+    """
+    Returns the app inputs stored for a building.
+
+    Parameters:
+    index (dict): An index from build_building_index.
+    berdo_id (str or int): The BERDO ID of the building.
+
+    Returns:
+    dict or None: The property type, GSF, usage inputs and kBtu of unmapped fuels, or None
+                  if the BERDO ID is not in the index.
+    """
+    row = index['id_to_row'].get(str(berdo_id))
+    if row is None:
+        return None
+
+    return {
+        'property_type': index['property_types'][row],
+        'gsf': index['gsf'][row],
+        'usage': index['usage'][row].tolist(),
+        'unmapped_usage': index['unmapped_usage'][row],
+    }
+
+
+def load_building_index(file_path):
+    """
+    Reads the preprocessed BERDO emissions data once and builds its lookup index.
+
+    Parameters:
+    file_path (str): Path to 1-berdo-emissions-data.csv.
+
+    Returns:
+    dict: The index from build_building_index.
+    """
+    return build_building_index(pd.read_csv(file_path))
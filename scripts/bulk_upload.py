@@ -0,0 +1,232 @@
+import base64
+import io
+import uuid
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from emissions_model import PENALTY_YEARS, calculate_total_cei, calculate_penalty
+
+
+# Columns of an uploaded portfolio CSV, the usage columns in the same order as FUEL_TYPES
+BULK_ID_COLUMNS = ['Building Name', 'Property Type', 'Building Square Footage']
+BULK_USAGE_COLUMNS = ['Electricity (kWh)', 'Natural Gas (Therm)', 'Fuel Oil #1 (gal)', 'Fuel Oil #2 (gal)',
+                      'Fuel Oil #4 (gal)', 'Diesel Fuel (gal)', 'District Steam (MMBtu)',
+                      'District Hot Water (MMBtu)', 'Elec-Driven Chiller (MMBtu)', 'Gas Absorp. Chiller (MMBtu)',
+                      'Gas-Driven Chiller (MMBtu)']
+
+# Rows read from the uploaded file at a time
+BULK_CHUNK_SIZE = 10000
+
+# Base64 characters of the upload decoded at a time, a multiple of 4 so every piece decodes on its own
+BULK_DECODE_SIZE = 4 * 64 * 1024
+
+# Number of scored uploads kept in each worker's memory before the oldest is evicted
+BULK_MAX_STORED_UPLOADS = 8
+
+# Seconds a scored upload is kept in the shared results cache
+BULK_RESULTS_EXPIRE = 60 * 60
+
+# Columns shown in the paginated results table, the download has every year
+BULK_TABLE_COLUMNS = ['Building Name', 'Property Type', 'Building Square Footage', 'CEI 2025 (kg CO2e/sf/yr)',
+                      'CEI 2030 (kg CO2e/sf/yr)', 'Cost Penalty 2025 ($)', 'Cost Penalty 2030 ($)',
+                      'Cost Penalty 2050 ($)', 'Total Cost Penalty 2025-2050 ($)']
+
+_stored_results = OrderedDict()
+_results_cache = None
+
+
+def use_results_cache(cache):
+    """
+    Shares scored uploads through a disk cache so results computed in a background job
+    process can be read by every web worker.
+
+    Parameters:
+    cache (diskcache.Cache): The cache to store scored uploads in.
+    """
+    global _results_cache
+    _results_cache = cache
+
+
+class _Base64Stream(io.RawIOBase):
+    # Binary file over the base64 payload of a data URL, decoding BULK_DECODE_SIZE characters at a
+    # time as the CSV parser reads, so the decoded file is never held in memory as a whole
+
+    def __init__(self, content_string):
+        self.content_string = content_string
+        self.position = 0
+        self.pending = b''
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while not self.pending and self.position < len(self.content_string):
+            piece = self.content_string[self.position:self.position + BULK_DECODE_SIZE]
+            self.position += len(piece)
+            self.pending = base64.b64decode(piece)
+        size = min(len(buffer), len(self.pending))
+        buffer[:size] = self.pending[:size]
+        self.pending = self.pending[size:]
+        return size
+
+
+def parse_upload(contents, progress=None):
+    """
+    Parses the contents of a dcc.Upload CSV into building attributes and a usage array.
+
+    The base64 payload is decoded piece by piece while the file is read in chunks of
+    BULK_CHUNK_SIZE rows, keeping only the expected columns and converting usage to a float
+    array chunk by chunk, so neither the decoded file nor the full text table is held in
+    memory. Missing usage columns are treated as zero.
+
+    Parameters:
+    contents (str): The base64 data URL produced by dcc.Upload.
+    progress (callable, optional): Called with the fraction of the file read after each chunk.
+
+    Returns:
+    tuple: (pandas.DataFrame of BULK_ID_COLUMNS, numpy.ndarray of usage with shape (buildings, fuels))
+    """
+    _, content_string = contents.split(',', 1)
+    content_size = max(len(content_string), 1)
+
+    header = pd.read_csv(io.BufferedReader(_Base64Stream(content_string)), nrows=0).columns.str.strip()
+    missing = [column for column in BULK_ID_COLUMNS[1:] if column not in header]
+    if missing:
+        raise ValueError(f"Missing required columns: {', '.join(missing)}")
+    usage_columns = [column for column in BULK_USAGE_COLUMNS if column in header]
+
+    attribute_chunks = []
+    usage_chunks = []
+    stream = _Base64Stream(content_string)
+    for chunk in pd.read_csv(io.BufferedReader(stream), chunksize=BULK_CHUNK_SIZE, skipinitialspace=True,
+                             usecols=lambda column: column.strip() in BULK_ID_COLUMNS + usage_columns):
+        chunk.columns = chunk.columns.str.strip()
+        if 'Building Name' not in chunk.columns:
+            chunk['Building Name'] = chunk.index + 1
+        attributes = chunk[BULK_ID_COLUMNS].copy()
+        attributes['Building Square Footage'] = pd.to_numeric(attributes['Building Square Footage'],
+                                                              errors='coerce')
+        attribute_chunks.append(attributes)
+
+        usage = np.zeros((len(chunk), len(BULK_USAGE_COLUMNS)))
+        for column in usage_columns:
+            usage[:, BULK_USAGE_COLUMNS.index(column)] = pd.to_numeric(chunk[column], errors='coerce').fillna(0)
+        usage_chunks.append(usage)
+
+        if progress is not None:
+            progress(stream.position / content_size)
+
+    if not attribute_chunks:
+        raise ValueError('The uploaded file has no buildings')
+
+    return pd.concat(attribute_chunks, ignore_index=True), np.concatenate(usage_chunks)
+
+
+def score_buildings(df_attributes, usage, factor_matrix, df_thresholds):
+    """
+    Scores every uploaded building against its BERDO threshold in one vectorized pass.
+
+    Parameters:
+    df_attributes (pandas.DataFrame): Building attributes from parse_upload.
+    usage (numpy.ndarray): Usage array from parse_upload.
+    factor_matrix (numpy.ndarray): A (year x fuel) matrix for PENALTY_YEARS from build_factor_matrix.
+    df_thresholds (pandas.DataFrame): Threshold CEI per property type, one row per year in PENALTY_YEARS.
+
+    Returns:
+    pandas.DataFrame: One row per building with its CEI and cost penalty for every year in
+                      PENALTY_YEARS. Buildings without a GSF or with an unknown property type
+                      are kept with empty results.
+    """
+    # Look up each building's threshold row by the position of its property type
+    property_types = [column for column in df_thresholds.columns if column != 'Year']
+    threshold_matrix = df_thresholds[property_types].to_numpy(dtype=float)[:len(PENALTY_YEARS)].T
+    threshold_matrix = np.vstack([threshold_matrix, np.full(len(PENALTY_YEARS), np.nan)])
+    property_type = df_attributes['Property Type'].astype('string').str.strip()
+    type_codes = pd.Categorical(property_type, categories=property_types).codes
+    thresholds = threshold_matrix[type_codes]
+
+    gsf = df_attributes['Building Square Footage'].to_numpy(dtype=float)
+    gsf = np.where(gsf > 0, gsf, np.nan)
+
+    total_cei = calculate_total_cei(usage, gsf, factor_matrix)
+    cost_penalty = calculate_penalty(total_cei, thresholds, gsf)
+
+    df_cei = pd.DataFrame(total_cei.round(2), columns=[f'CEI {year} (kg CO2e/sf/yr)' for year in PENALTY_YEARS])
+    df_penalty = pd.DataFrame(cost_penalty, columns=[f'Cost Penalty {year} ($)' for year in PENALTY_YEARS])
+    df_results = pd.concat([df_attributes.reset_index(drop=True), df_cei, df_penalty], axis=1)
+    df_results['Total Cost Penalty 2025-2050 ($)'] = df_penalty.sum(axis=1, min_count=1)
+
+    return df_results
+
+
+def store_results(df_results):
+    """
+    Keeps scored results on the server and returns the key the browser holds instead of the data.
+
+    Results are kept in this worker's memory and, if use_results_cache was called, in the
+    shared results cache.
+
+    Parameters:
+    df_results (pandas.DataFrame): Results from score_buildings.
+
+    Returns:
+    str: The key to pass to get_results.
+    """
+    key = uuid.uuid4().hex
+    if _results_cache is not None:
+        _results_cache.set(f'bulk-results-{key}', df_results, expire=BULK_RESULTS_EXPIRE)
+    _remember_results(key, df_results)
+    return key
+
+
+def _remember_results(key, df_results):
+    _stored_results[key] = df_results
+    while len(_stored_results) > BULK_MAX_STORED_UPLOADS:
+        _stored_results.popitem(last=False)
+
+
+def get_results(key):
+    """
+    Returns the scored results stored under a key, or None if they expired or were evicted.
+
+    Parameters:
+    key (str): A key returned by store_results.
+
+    Returns:
+    pandas.DataFrame or None: The stored results.
+    """
+    if key is None:
+        return None
+    if key in _stored_results:
+        return _stored_results[key]
+    if _results_cache is None:
+        return None
+
+    df_results = _results_cache.get(f'bulk-results-{key}')
+    if df_results is not None:
+        _remember_results(key, df_results)
+    return df_results
+
+
+def get_results_page(df_results, page_current, page_size, sort_by):
+    """
+    Sorts the results as requested by the DataTable and slices out a single page.
+
+    Parameters:
+    df_results (pandas.DataFrame): Results from score_buildings.
+    page_current (int): The zero-based page index.
+    page_size (int): The number of rows per page.
+    sort_by (list): The DataTable sort_by property, a list of {'column_id', 'direction'} dicts.
+
+    Returns:
+    list: The page's rows as records of BULK_TABLE_COLUMNS.
+    """
+    df_page = df_results[BULK_TABLE_COLUMNS]
+    if sort_by:
+        df_page = df_page.sort_values([sort['column_id'] for sort in sort_by],
+                                      ascending=[sort['direction'] == 'asc' for sort in sort_by],
+                                      kind='stable', na_position='last')
+    start = page_current * page_size
+    return df_page.iloc[start:start + page_size].to_dict('records')
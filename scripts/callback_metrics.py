@@ -0,0 +1,209 @@
+import functools
+import logging
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+import numpy as np
+from flask import Response, g, has_request_context, request
+from plotly.io.json import to_json_plotly
+
+
+# Number of recent calls per callback that percentiles are computed over
+METRICS_WINDOW = 1024
+
+# Quantiles reported on the /metrics endpoint
+METRICS_QUANTILES = [0.5, 0.9, 0.99]
+
+# Phases of a callback request; 'callback' is the wall time of the whole callback function and 'dispatch'
+# the rest of the request: Flask and Dash request parsing, dispatch and serialization of the outputs
+METRICS_PHASES = ['callback', 'compute', 'figure', 'dispatch']
+
+# Queue in the metrics cache of the calls of background callbacks, which run in job processes
+METRICS_CACHE_PREFIX = 'callback-metrics'
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_durations = defaultdict(lambda: deque(maxlen=METRICS_WINDOW))
+_duration_totals = defaultdict(lambda: [0, 0.0])
+_response_bytes = defaultdict(lambda: deque(maxlen=METRICS_WINDOW))
+_response_byte_totals = defaultdict(lambda: [0, 0])
+_metrics_cache = None
+
+
+def use_metrics_cache(cache):
+    """
+    Collects the metrics of background callbacks through a disk cache.
+
+    Background callbacks run in job processes outside any request, so their calls are queued
+    in the cache and added to the metrics of the web process when /metrics is read.
+
+    Parameters:
+    cache (diskcache.Cache): The cache of the background callback manager.
+    """
+    global _metrics_cache
+    _metrics_cache = cache
+
+
+def instrument_callback(name):
+    """
+    Decorates a Dash callback so the time spent in it and its response size are recorded.
+
+    Must be applied below @callback. Phases inside the callback can be timed with
+    callback_phase; the dispatch time and response size are added once Dash has built
+    the response (see init_metrics). Calls of background callbacks record the callback
+    time and the size of their serialized outputs, if use_metrics_cache was called.
+
+    Parameters:
+    name (str): The callback name used as the metric label.
+
+    Returns:
+    callable: The decorator.
+    """
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if has_request_context():
+                g.callback_metrics = {'name': name, 'phases': {}}
+            start = time.perf_counter()
+            if not has_request_context():
+                outputs = function(*args, **kwargs)
+                _queue_background_call(name, time.perf_counter() - start, outputs)
+                return outputs
+            try:
+                return function(*args, **kwargs)
+            finally:
+                g.callback_metrics['phases']['callback'] = time.perf_counter() - start
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def callback_phase(phase):
+    """
+    Times a phase ('compute' or 'figure') of the instrumented callback running in this request.
+
+    Parameters:
+    phase (str): The phase name.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if has_request_context() and 'callback_metrics' in g:
+            phases = g.callback_metrics['phases']
+            phases[phase] = phases.get(phase, 0) + time.perf_counter() - start
+
+
+def _queue_background_call(name, seconds, outputs):
+    if _metrics_cache is not None:
+        _metrics_cache.push((name, {'callback': seconds}, len(to_json_plotly(outputs))), prefix=METRICS_CACHE_PREFIX)
+
+
+def _collect_background_calls():
+    # Records the calls background jobs queued since the last collection
+    while _metrics_cache is not None:
+        _, call = _metrics_cache.pull(prefix=METRICS_CACHE_PREFIX)
+        if call is None:
+            break
+        record_call(*call)
+
+
+def record_call(name, phases, response_bytes):
+    """
+    Records the phase durations and response size of a single callback call.
+
+    Parameters:
+    name (str): The callback name.
+    phases (dict): Seconds spent in each phase of METRICS_PHASES.
+    response_bytes (int): Size of the response body sent to the browser.
+    """
+    with _lock:
+        for phase, seconds in phases.items():
+            _durations[name, phase].append(seconds)
+            totals = _duration_totals[name, phase]
+            totals[0] += 1
+            totals[1] += seconds
+        _response_bytes[name].append(response_bytes)
+        totals = _response_byte_totals[name]
+        totals[0] += 1
+        totals[1] += response_bytes
+
+
+def format_metrics():
+    """
+    Formats the recorded callback metrics in the Prometheus text exposition format.
+
+    Returns:
+    str: Summaries of callback phase durations and response sizes, with quantiles over
+         the last METRICS_WINDOW calls and counts and sums over all calls.
+    """
+    _collect_background_calls()
+    lines = ['# HELP berdo_callback_duration_seconds Time spent in each phase of a Dash callback request.',
+             '# TYPE berdo_callback_duration_seconds summary']
+    with _lock:
+        durations = {key: np.array(values) for key, values in _durations.items()}
+        duration_totals = {key: list(values) for key, values in _duration_totals.items()}
+        response_bytes = {key: np.array(values) for key, values in _response_bytes.items()}
+        response_byte_totals = {key: list(values) for key, values in _response_byte_totals.items()}
+
+    for (name, phase), values in sorted(durations.items()):
+        labels = f'callback="{name}",phase="{phase}"'
+        for quantile, value in zip(METRICS_QUANTILES, np.quantile(values, METRICS_QUANTILES)):
+            lines.append(f'berdo_callback_duration_seconds{{{labels},quantile="{quantile}"}} {value:.6f}')
+        count, total = duration_totals[name, phase]
+        lines.append(f'berdo_callback_duration_seconds_sum{{{labels}}} {total:.6f}')
+        lines.append(f'berdo_callback_duration_seconds_count{{{labels}}} {count}')
+
+    lines += ['# HELP berdo_callback_response_bytes Size of the Dash callback response body.',
+              '# TYPE berdo_callback_response_bytes summary']
+    for name, values in sorted(response_bytes.items()):
+        labels = f'callback="{name}"'
+        for quantile, value in zip(METRICS_QUANTILES, np.quantile(values, METRICS_QUANTILES)):
+            lines.append(f'berdo_callback_response_bytes{{{labels},quantile="{quantile}"}} {value:.0f}')
+        count, total = response_byte_totals[name]
+        lines.append(f'berdo_callback_response_bytes_sum{{{labels}}} {total}')
+        lines.append(f'berdo_callback_response_bytes_count{{{labels}}} {count}')
+
+    return '\n'.join(lines) + '\n'
+
+
+def init_metrics(server, slow_call_ms=None):
+    """
+    Hooks callback metrics into the Flask server behind a Dash app and adds the /metrics endpoint.
+
+    The dispatch phase is the time of the callback request outside the callback function, from
+    parsing the request to serializing the outputs, and the response size is the length of its body.
+
+    Parameters:
+    server (flask.Flask): The Dash app's Flask server.
+    slow_call_ms (float, optional): Log a warning for calls whose request took longer than this.
+    """
+    @server.before_request
+    def start_request_timer():
+        g.request_start = time.perf_counter()
+
+    @server.after_request
+    def record_callback_metrics(response):
+        metrics = g.pop('callback_metrics', None)
+        if metrics is None or 'callback' not in metrics['phases'] or response.direct_passthrough:
+            return response
+
+        phases = metrics['phases']
+        request_seconds = time.perf_counter() - g.request_start
+        phases['dispatch'] = max(request_seconds - phases['callback'], 0)
+        response_bytes = len(response.get_data())
+        record_call(metrics['name'], phases, response_bytes)
+
+        if slow_call_ms is not None and request_seconds * 1000 > slow_call_ms:
+            timings = ', '.join(f'{phase} {phases[phase] * 1000:.1f} ms' for phase in METRICS_PHASES
+                                if phase in phases)
+            logger.warning('Slow callback %s (%s): %.1f ms, %d bytes [%s]', metrics['name'], request.path,
+                           request_seconds * 1000, response_bytes, timings)
+        return response
+
+    @server.route('/metrics')
+    def metrics_endpoint():
+        return Response(format_metrics(), mimetype='text/plain; version=0.0.4')
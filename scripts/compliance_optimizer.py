@@ -0,0 +1,215 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from emissions_model import CO2_COST, ELECTRICITY, NATURAL_GAS
+
+
+# Yearly rate used to discount future costs to the first projected year
+DISCOUNT_RATE = 0.05
+
+
+def make_measure(name, fuel_switches=(), usage_reduction=0.0, renewable_share=0.0, capex_per_sf=0.0,
+                 capex_per_kbtu=0.0, capex_fuel=None, annual_cost_per_kbtu=0.0, annual_cost_fuel=None):
+    """
+    Describes a compliance measure a building can adopt once, in any projected year.
+
+    Its effect lasts from the year of adoption: `usage_reduction` cuts all usage, each fuel
+    switch (from_fuel, to_fuel, share, efficiency_ratio) moves `share` of a fuel's load to
+    another fuel at the given efficiency ratio, and `renewable_share` offsets that share of
+    electricity emissions. Fuels are positions in PIPELINE_FUEL_COLUMNS.
+
+    Its one-time cost is `capex_per_sf` times the GFA plus `capex_per_kbtu` times the reported
+    usage of `capex_fuel`; its yearly cost is `annual_cost_per_kbtu` times the reported usage of
+    `annual_cost_fuel`.
+
+    Parameters:
+    name (str): The measure name.
+
+    Returns:
+    dict: The measure.
+    """
+    return {'name': name, 'fuel_switches': list(fuel_switches), 'usage_reduction': usage_reduction,
+            'renewable_share': renewable_share, 'capex_per_sf': capex_per_sf, 'capex_per_kbtu': capex_per_kbtu,
+            'capex_fuel': capex_fuel, 'annual_cost_per_kbtu': annual_cost_per_kbtu,
+            'annual_cost_fuel': annual_cost_fuel}
+
+
+# Illustrative measures; the costs are planning assumptions to be replaced with project estimates
+DEFAULT_MEASURES = [
+    make_measure('efficiency', usage_reduction=0.15, capex_per_sf=4.0),
+    make_measure('electrification', fuel_switches=[(NATURAL_GAS, ELECTRICITY, 1.0, 3.0)],
+                 capex_per_kbtu=0.45, capex_fuel=NATURAL_GAS),
+    make_measure('renewable offset', renewable_share=1.0, annual_cost_per_kbtu=0.0015, annual_cost_fuel=ELECTRICITY),
+]
+
+
+def build_state_coefficients(measures, factor_matrix):
+    """
+    Folds every combination of measures into (year x fuel) emissions coefficients of reported usage.
+
+    States are bitmasks over `measures`; measures in a state act in list order on the
+    reported usage.
+
+    Parameters:
+    measures (list): Measures from make_measure.
+    factor_matrix (numpy.ndarray): Emissions factors of shape (years, fuels).
+
+    Returns:
+    numpy.ndarray: Array of shape (2 ** len(measures), years, fuels).
+    """
+    fuel_count = factor_matrix.shape[1]
+    coefficients = np.empty((2 ** len(measures),) + factor_matrix.shape)
+    for state in range(2 ** len(measures)):
+        trajectory = np.eye(fuel_count)
+        factors = factor_matrix.copy()
+        for bit, measure in enumerate(measures):
+            if not state >> bit & 1:
+                continue
+            trajectory = trajectory * (1 - measure['usage_reduction'])
+            for from_fuel, to_fuel, share, efficiency_ratio in measure['fuel_switches']:
+                moved = trajectory[from_fuel] * share
+                trajectory[from_fuel] -= moved
+                trajectory[to_fuel] += moved / efficiency_ratio
+            factors[:, ELECTRICITY] *= 1 - measure['renewable_share']
+        coefficients[state] = factors @ trajectory
+    return coefficients
+
+
+def _measure_costs(measures, usage, gfa):
+    capex = np.empty((len(measures), usage.shape[0]))
+    annual = np.empty((len(measures), usage.shape[0]))
+    for index, measure in enumerate(measures):
+        capex[index] = measure['capex_per_sf'] * gfa
+        if measure['capex_fuel'] is not None:
+            capex[index] += measure['capex_per_kbtu'] * usage[:, measure['capex_fuel']]
+        annual[index] = 0
+        if measure['annual_cost_fuel'] is not None:
+            annual[index] = measure['annual_cost_per_kbtu'] * usage[:, measure['annual_cost_fuel']]
+    return capex, annual
+
+
+def solve_compliance_plans(measures, coefficients, usage, gfa, allowance, years, discount_rate=DISCOUNT_RATE):
+    """
+    Finds the least-cost adoption year of each measure for every building by dynamic programming over years.
+
+    The state is the set of adopted measures. Each year a building can add measures (paying
+    their one-time cost) and then pays the yearly cost of its measures plus the alternative
+    compliance payment of CO2_COST per ton above its allowance. All buildings are solved
+    together, the DP being vectorized over the building axis.
+
+    Parameters:
+    measures (list): Measures from make_measure.
+    coefficients (numpy.ndarray): Coefficients from build_state_coefficients.
+    usage (numpy.ndarray): Reported usage in kBtu of shape (buildings, fuels).
+    gfa (numpy.ndarray): Gross floor area of each building.
+    allowance (numpy.ndarray): Allowed emissions in MT CO2e of shape (buildings, years).
+    years (list): The projected years (as integers).
+    discount_rate (float): Yearly discount rate.
+
+    Returns:
+    tuple: (numpy.ndarray of the adoption year index of each measure, -1 if never adopted, with
+            shape (buildings, measures), numpy.ndarray of the plan's discounted cost,
+            numpy.ndarray of the discounted cost of only paying alternative compliance)
+    """
+    state_count = 2 ** len(measures)
+    building_count = usage.shape[0]
+    discount = (1 + discount_rate) ** -np.arange(len(years), dtype=float)
+
+    capex, annual = _measure_costs(measures, usage, gfa)
+    bits = (np.arange(state_count)[:, np.newaxis] >> np.arange(len(measures))) & 1
+    state_capex = bits @ capex
+    state_annual = bits @ annual
+
+    # Yearly cost of every state: alternative compliance payments plus measure running costs
+    emissions = np.einsum('bf,syf->sby', usage, coefficients) / 1e6
+    yearly_cost = np.maximum(np.nan_to_num(emissions - allowance), 0) * CO2_COST + state_annual[:, :, np.newaxis]
+
+    # Predecessor states of each state are its subsets
+    subsets = [[previous for previous in range(state_count) if previous & state == previous]
+               for state in range(state_count)]
+
+    value = (state_capex + yearly_cost[:, :, 0]) * discount[0]
+    choices = np.zeros((len(years), state_count, building_count), dtype=np.int8)
+    for year in range(1, len(years)):
+        new_value = np.empty_like(value)
+        for state in range(state_count):
+            candidates = np.stack([value[previous] + (state_capex[state] - state_capex[previous]) * discount[year]
+                                   for previous in subsets[state]])
+            best = candidates.argmin(axis=0)
+            choices[year, state] = np.asarray(subsets[state])[best]
+            new_value[state] = (candidates[best, np.arange(building_count)]
+                                + yearly_cost[state, :, year] * discount[year])
+        value = new_value
+
+    # Walk back from the cheapest final state to find when each measure was adopted
+    state = value.argmin(axis=0)
+    plan_cost = value[state, np.arange(building_count)]
+    adoption_year = np.full((building_count, len(measures)), -1)
+    for year in range(len(years) - 1, -1, -1):
+        previous = choices[year, state, np.arange(building_count)] if year > 0 else np.zeros_like(state)
+        adoption_year[bits[state] > bits[previous]] = year
+        state = previous
+
+    pay_only_cost = yearly_cost[0] @ discount
+    return adoption_year, plan_cost, pay_only_cost
+
+
+def _solve_chunk(arguments):
+    return solve_compliance_plans(*arguments)
+
+
+def optimize_portfolio(usage, gfa, allowance, factor_matrix, years, measures=DEFAULT_MEASURES,
+                       discount_rate=DISCOUNT_RATE, workers=None, chunk_size=5000):
+    """
+    Solves the least-cost compliance plan of every building, solving identical building profiles once.
+
+    Buildings with the same usage, GFA and allowance share one solution. The unique profiles
+    are split into chunks of `chunk_size`, solved in parallel over a process pool when there
+    is more than one chunk.
+
+    Parameters:
+    usage (numpy.ndarray): Reported usage in kBtu of shape (buildings, fuels).
+    gfa (numpy.ndarray): Gross floor area of each building.
+    allowance (numpy.ndarray): Allowed emissions in MT CO2e of shape (buildings, years).
+    factor_matrix (numpy.ndarray): Emissions factors of shape (years, fuels).
+    years (list): The projected years (as integers).
+    measures (list): Measures from make_measure.
+    discount_rate (float): Yearly discount rate.
+    workers (int, optional): Number of worker processes, defaults to the number of CPUs.
+    chunk_size (int): Number of unique profiles per chunk.
+
+    Returns:
+    pandas.DataFrame: One row per building with the adoption year of each measure (empty if
+                      never adopted), the discounted plan cost, the discounted cost of paying
+                      alternative compliance only and the savings.
+    """
+    coefficients = build_state_coefficients(measures, factor_matrix)
+
+    profiles = np.column_stack([usage, gfa, np.nan_to_num(allowance, nan=-1)])
+    _, first_rows, profile_index = np.unique(profiles, axis=0, return_index=True, return_inverse=True)
+    profile_index = profile_index.ravel()
+
+    chunks = [first_rows[start:start + chunk_size] for start in range(0, len(first_rows), chunk_size)]
+    arguments = [(measures, coefficients, usage[rows], gfa[rows], allowance[rows], years, discount_rate)
+                 for rows in chunks]
+    if len(chunks) > 1:
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+            results = list(executor.map(_solve_chunk, arguments))
+    else:
+        results = [solve_compliance_plans(*chunk_arguments) for chunk_arguments in arguments]
+
+    adoption_year = np.concatenate([result[0] for result in results])[profile_index]
+    plan_cost = np.concatenate([result[1] for result in results])[profile_index]
+    pay_only_cost = np.concatenate([result[2] for result in results])[profile_index]
+
+    # Calendar year each measure is adopted, empty when it never pays off
+    adopted_years = pd.DataFrame(np.asarray(years)[adoption_year],
+                                 columns=[f"{measure['name']} year" for measure in measures]).astype('Int64')
+    df_plans = adopted_years.mask(adoption_year < 0)
+    df_plans['plan_cost'] = plan_cost
+    df_plans['pay_only_cost'] = pay_only_cost
+    df_plans['savings'] = pay_only_cost - plan_cost
+    return df_plans
@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+
+
+# Actions a correction rule can take on the rows it matches
+CORRECTION_ACTIONS = ['drop', 'deduplicate', 'set']
+
+
+def load_corrections(file_path):
+    """
+    Reads the corrections manifest.
+
+    Each row is one rule on the rows of a BERDO ID and data year, optionally narrowed to the rows
+    whose match_column equals match_value. A rule drops its rows, keeps only the first of them
+    (deduplicate) or sets column to value; a rule that sets several columns has one row per column.
+
+    Parameters:
+    file_path (str): Path to 1-corrections.csv.
+
+    Returns:
+    pandas.DataFrame: The manifest with text keys, match values and values.
+    """
+    df_corrections = pd.read_csv(file_path, dtype=str, keep_default_na=False)
+    df_corrections['data_year'] = df_corrections['data_year'].astype(int)
+    unknown_actions = set(df_corrections['action']) - set(CORRECTION_ACTIONS)
+    if unknown_actions:
+        raise ValueError(f'Unknown correction actions: {sorted(unknown_actions)}')
+    return df_corrections
+
+
+def _typed_values(series, values):
+    # Manifest text converted to the dtype of the column it is compared with or written to
+    if pd.api.types.is_numeric_dtype(series):
+        return pd.to_numeric(values)
+    return values
+
+
+def apply_corrections(df, df_corrections):
+    """
+    Applies the corrections manifest to BERDO data with one keyed join.
+
+    The rules are joined to the rows on BERDO ID and data year, so the cost does not grow with
+    the number of rules the way a scan per rule would. All rules are matched against the data as
+    it was before any correction.
+
+    Parameters:
+    df (pandas.DataFrame): BERDO data with 'BERDO ID' and 'Data Year' columns.
+    df_corrections (pandas.DataFrame): The manifest from load_corrections.
+
+    Returns:
+    tuple: (corrected DataFrame, report with the rule_id, action, note and matched rows of every
+           rule for the data years in df).
+    """
+    df_corrections = df_corrections[df_corrections['data_year'].isin(df['Data Year'].unique())]
+
+    # Join the rules to the rows they key on, keeping the row labels of the data
+    df_keys = pd.DataFrame({'berdo_id': df['BERDO ID'].astype(str).str.strip().to_numpy(),
+                            'data_year': df['Data Year'].astype(int).to_numpy(), 'label': df.index})
+    df_matches = df_corrections.merge(df_keys, on=['berdo_id', 'data_year'])
+
+    # Narrow rules with a match column to the rows where it has the match value
+    unmatched = df_matches['match_column'] != ''
+    for match_column, df_rules in df_matches[unmatched].groupby('match_column'):
+        values = df.loc[df_rules['label'], match_column]
+        matched = values.to_numpy() == _typed_values(values, df_rules['match_value']).to_numpy()
+        unmatched.loc[df_rules.index[matched]] = False
+    df_matches = df_matches[~unmatched]
+
+    # Rows to drop, and every row of a deduplicate rule after its first
+    drops = df_matches.loc[df_matches['action'] == 'drop', 'label']
+    duplicates = df_matches[df_matches['action'] == 'deduplicate']
+    drops = pd.concat([drops, duplicates.loc[duplicates.duplicated('rule_id'), 'label']])
+
+    # Field overrides, written one column at a time
+    df = df.copy()
+    for column, df_sets in df_matches[df_matches['action'] == 'set'].groupby('column'):
+        df.loc[df_sets['label'], column] = _typed_values(df[column], df_sets['value']).to_numpy()
+    df = df.drop(index=np.unique(drops.to_numpy()))
+
+    df_report = (df_corrections.drop_duplicates('rule_id')[['rule_id', 'action', 'note']]
+                 .merge(df_matches.drop_duplicates(['rule_id', 'label']).groupby('rule_id').size()
+                        .rename('matched_rows').reset_index(), on='rule_id', how='left')
+                 .fillna({'matched_rows': 0}).astype({'matched_rows': int}))
+    return df, df_report
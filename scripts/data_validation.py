@@ -0,0 +1,165 @@
+import pandas as pd
+
+
+# Columns of the separated BERDO data the rules check
+GFA_COLUMN = 'Reported Gross Floor Area (Sq Ft)'
+SITE_EUI_COLUMN = 'Site EUI (Energy Use Intensity kBtu/ft2)'
+SITE_USAGE_COLUMN = 'Total Site Energy Usage (kBtu)'
+
+# Relative difference allowed between the reported site EUI and total site usage / GFA, which the
+# city rounds to one decimal
+SITE_EUI_TOLERANCE = 0.1
+
+# Columns of the violations table
+VIOLATION_COLUMNS = ['rule_id', 'Data Year', 'BERDO ID', 'column', 'value']
+
+
+def berdo_validation_rules(property_types):
+    """
+    Declares the rules the separated BERDO data is validated against.
+
+    Each rule names a check, the columns it reads and the share of rows allowed to violate it
+    before the pipeline stops (max_share).
+
+    Parameters:
+    property_types (iterable): The property types of 1-property-types.csv.
+
+    Returns:
+    list: The rules as dictionaries.
+    """
+    return [
+        {'rule_id': 'unique_berdo_id', 'check': 'unique', 'columns': ['BERDO ID'], 'max_share': 0.0,
+         'description': 'Each BERDO ID is reported once over both data years'},
+        {'rule_id': 'positive_gfa', 'check': 'positive', 'columns': [GFA_COLUMN], 'max_share': 0.01,
+         'description': 'Gross floor area is reported and larger than 0'},
+        {'rule_id': 'consistent_site_eui', 'check': 'ratio',
+         'columns': [SITE_EUI_COLUMN, SITE_USAGE_COLUMN, GFA_COLUMN], 'tolerance': SITE_EUI_TOLERANCE,
+         'max_share': 0.01,
+         'description': 'Site EUI matches total site usage divided by gross floor area'},
+        {'rule_id': 'known_property_type', 'check': 'known_value', 'columns': ['Largest Property Type'],
+         'values': sorted(set(property_types)), 'max_share': 0.01,
+         'description': 'Largest property type, where reported, maps to a BERDO property type'},
+        {'rule_id': 'building_zip_code', 'check': 'zip_code', 'columns': ['Building Address Zip Code'],
+         'allow_missing': False, 'max_share': 0.01, 'description': 'Building zip code has 5 digits'},
+        {'rule_id': 'parcel_zip_code', 'check': 'zip_code', 'columns': ['Parcel Address Zip Code'],
+         'allow_missing': True, 'max_share': 0.05, 'description': 'Parcel zip code, where reported, has 5 digits'},
+    ]
+
+
+def _check_unique(df, rule):
+    # Every row of a value that occurs more than once
+    return df[rule['columns']].duplicated(keep=False)
+
+
+def _check_positive(df, rule):
+    values = pd.to_numeric(df[rule['columns'][0]], errors='coerce')
+    return ~(values > 0)
+
+
+def _check_ratio(df, rule):
+    # The first column against the second divided by the third, where all three are reported
+    value, numerator, denominator = (pd.to_numeric(df[column], errors='coerce') for column in rule['columns'])
+    reported = value.notna() & numerator.notna() & (denominator > 0)
+    expected = numerator / denominator.where(denominator > 0)
+    return reported & ((value - expected).abs() > rule['tolerance'] * expected.abs())
+
+
+def _check_known_value(df, rule):
+    # Missing, empty and 0 (the cleaned form of an empty cell) are not checked
+    values = df[rule['columns'][0]]
+    checked = values.notna() & ~values.isin(['', 0, '0'])
+    return checked & ~values.isin(rule['values'])
+
+
+def _check_zip_code(df, rule):
+    # Zip codes read as numbers lost their leading zero, so 4 digits are accepted as well
+    values = df[rule['columns'][0]]
+    if pd.api.types.is_numeric_dtype(values):
+        valid = (values == values.round()) & (values >= 1000) & (values <= 99999)
+    else:
+        valid = values.astype(str).str.strip().str.fullmatch(r'(?:\d{5}|[1-9]\d{3})(?:\.0)?').fillna(False)
+    return ~(valid | values.isna()) if rule['allow_missing'] else ~valid
+
+
+# Vectorized checks by name; each returns True for the rows that violate the rule
+RULE_CHECKS = {'unique': _check_unique, 'positive': _check_positive, 'ratio': _check_ratio,
+               'known_value': _check_known_value, 'zip_code': _check_zip_code}
+
+
+def validate_frame(df, rules):
+    """
+    Evaluates rules over whole columns of BERDO data.
+
+    Parameters:
+    df (pandas.DataFrame): BERDO data with 'BERDO ID' and 'Data Year' columns.
+    rules (list): Rules from berdo_validation_rules.
+
+    Returns:
+    pandas.DataFrame: One row per violation with the rule_id, data year, BERDO ID, checked column and value.
+    """
+    violations = []
+    for rule in rules:
+        violated = RULE_CHECKS[rule['check']](df, rule).to_numpy(dtype=bool)
+        if violated.any():
+            column = rule['columns'][0]
+            violations.append(pd.DataFrame({'rule_id': rule['rule_id'],
+                                            'Data Year': df['Data Year'].to_numpy()[violated],
+                                            'BERDO ID': df['BERDO ID'].astype(str).to_numpy()[violated],
+                                            'column': column, 'value': df[column].to_numpy()[violated]}))
+    if not violations:
+        return pd.DataFrame(columns=VIOLATION_COLUMNS)
+    df_violations = pd.concat(violations, axis=0, ignore_index=True)
+    return df_violations.sort_values(['rule_id', 'Data Year', 'BERDO ID'], kind='mergesort').reset_index(drop=True)
+
+
+def summarize_violations(df_violations, rows_checked, rules):
+    """
+    Counts the violations of every rule and compares their share of the rows with the rule's threshold.
+
+    Parameters:
+    df_violations (pandas.DataFrame): Violations from validate_frame.
+    rows_checked (int): Number of rows the rules were evaluated on.
+    rules (list): Rules from berdo_validation_rules.
+
+    Returns:
+    pandas.DataFrame: The rule_id, description, violations, share, max_share and whether the rule failed.
+    """
+    df_summary = pd.DataFrame([{key: rule[key] for key in ['rule_id', 'description', 'max_share']} for rule in rules])
+    counts = df_violations['rule_id'].value_counts()
+    df_summary['violations'] = df_summary['rule_id'].map(counts).fillna(0).astype(int)
+    df_summary['share'] = df_summary['violations'] / rows_checked if rows_checked else 0.0
+    df_summary['failed'] = df_summary['share'] > df_summary['max_share']
+    return df_summary[['rule_id', 'description', 'violations', 'share', 'max_share', 'failed']]
+
+
+def check_validation(df_summary):
+    """
+    Stops the pipeline when any rule has more violations than its threshold allows.
+
+    Parameters:
+    df_summary (pandas.DataFrame): Summary from summarize_violations.
+
+    Raises:
+    ValueError: If a rule failed.
+    """
+    failed = df_summary[df_summary['failed']]
+    if len(failed):
+        details = ', '.join(f"{row.rule_id} ({row.violations} rows, {row.share:.2%} > {row.max_share:.2%})"
+                            for row in failed.itertuples())
+        raise ValueError(f'Data validation failed: {details}')
+
+
+def format_validation_summary(df_summary):
+    """
+    Formats a validation summary as a text table.
+
+    Parameters:
+    df_summary (pandas.DataFrame): Summary from summarize_violations.
+
+    Returns:
+    str: The table.
+    """
+    df_table = df_summary[['rule_id', 'violations', 'share', 'max_share', 'failed']].copy()
+    df_table['share'] = df_table['share'].map('{:.2%}'.format)
+    df_table['max_share'] = df_table['max_share'].map('{:.2%}'.format)
+    return df_table.to_string(index=False)
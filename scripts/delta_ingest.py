@@ -0,0 +1,225 @@
+import bisect
+import os
+
+import numpy as np
+import pandas as pd
+
+
+# State of the previous delta run: raw row hashes and the BERDO IDs script 2 still has to merge
+DELTA_DIRECTORY = '../data-files/delta'
+ROW_HASHES_FILE = '1-raw-row-hashes.csv'
+PENDING_IDS_FILE = '2-pending-berdo-ids.csv'
+
+# Pending entry that stands for every BERDO ID, after a full rebuild
+ALL_BERDO_IDS = '*'
+
+
+def is_delta_mode():
+    """
+    Checks whether the pipeline runs in delta mode, set with BERDO_DELTA.
+
+    Returns:
+    bool: True when only new or changed buildings are processed.
+    """
+    return bool(os.environ.get('BERDO_DELTA'))
+
+
+def berdo_keys(series):
+    """
+    Converts BERDO IDs to the text keys of the delta state, without surrounding whitespace.
+
+    Parameters:
+    series (pandas.Series): BERDO IDs as read, as numbers or as text.
+
+    Returns:
+    pandas.Series: The keys.
+    """
+    return series.astype(str).str.strip()
+
+
+def hash_berdo_rows(df, source, key_column='BERDO ID'):
+    """
+    Hashes the rows of raw data per BERDO ID.
+
+    Rows are hashed with pandas' vectorized hashing and the rows of a BERDO ID reported more
+    than once are combined with their order, so any change to any of them changes the hash.
+
+    Parameters:
+    df (pandas.DataFrame): Raw BERDO data, or another table keyed on BERDO ID.
+    source (str): Label of the data, e.g. the year of the raw file.
+    key_column (str): The BERDO ID column.
+
+    Returns:
+    pandas.DataFrame: One row per BERDO ID with 'source', 'berdo_id' and 'row_hash'.
+    """
+    keys = berdo_keys(df[key_column]).to_numpy()
+    row_hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    occurrence = pd.Series(keys).groupby(keys).cumcount().to_numpy()
+
+    # Mix in the position of the row within its BERDO ID, then combine the rows of each BERDO ID
+    mixed = pd.util.hash_pandas_object(pd.DataFrame({'row': row_hashes, 'occurrence': occurrence}),
+                                       index=False).to_numpy()
+    order = np.argsort(keys, kind='stable')
+    sorted_keys = keys[order]
+    starts = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]]) if len(keys) else np.array([], int)
+    return pd.DataFrame({'source': str(source), 'berdo_id': sorted_keys[starts],
+                         'row_hash': np.bitwise_xor.reduceat(mixed[order], starts) if len(keys)
+                         else np.array([], np.uint64)})
+
+
+def load_row_hashes(delta_directory=DELTA_DIRECTORY):
+    """
+    Reads the row hashes of the previous delta run.
+
+    Parameters:
+    delta_directory (str): Directory of the delta state.
+
+    Returns:
+    pandas.DataFrame or None: The hashes from hash_berdo_rows, or None before the first delta run.
+    """
+    path = os.path.join(delta_directory, ROW_HASHES_FILE)
+    if not os.path.exists(path):
+        return None
+    return pd.read_csv(path, dtype={'source': str, 'berdo_id': str, 'row_hash': np.uint64}, keep_default_na=False)
+
+
+def save_row_hashes(df_row_hashes, delta_directory=DELTA_DIRECTORY):
+    """
+    Stores the row hashes of this run for the next delta run.
+
+    Parameters:
+    df_row_hashes (pandas.DataFrame): Hashes from hash_berdo_rows.
+    delta_directory (str): Directory of the delta state.
+    """
+    os.makedirs(delta_directory, exist_ok=True)
+    df_row_hashes.to_csv(os.path.join(delta_directory, ROW_HASHES_FILE), index=False)
+
+
+def changed_berdo_ids(df_row_hashes, df_previous_hashes):
+    """
+    Finds the BERDO IDs whose rows are new, changed or removed since the previous run.
+
+    Parameters:
+    df_row_hashes (pandas.DataFrame): Hashes of this run.
+    df_previous_hashes (pandas.DataFrame): Hashes of the previous run.
+
+    Returns:
+    set: The changed BERDO ID keys.
+    """
+    df_compare = df_row_hashes.merge(df_previous_hashes, on=['source', 'berdo_id'], how='outer',
+                                     suffixes=('', '_previous'), indicator=True)
+    changed = (df_compare['_merge'] != 'both') | (df_compare['row_hash'] != df_compare['row_hash_previous'])
+    return set(df_compare.loc[changed, 'berdo_id'])
+
+
+def link_corrected_ids(berdo_ids, df_corrections):
+    """
+    Adds the BERDO IDs that corrections move rows between.
+
+    A correction that sets the BERDO ID of a row writes it under another BERDO ID, so the rows
+    of both are replaced together whenever either changes.
+
+    Parameters:
+    berdo_ids (set): Changed BERDO ID keys.
+    df_corrections (pandas.DataFrame): The corrections manifest from corrections.load_corrections.
+
+    Returns:
+    set: The BERDO ID keys including every linked BERDO ID.
+    """
+    links = df_corrections.loc[(df_corrections['action'] == 'set') & (df_corrections['column'] == 'BERDO ID'),
+                               ['berdo_id', 'value']]
+    berdo_ids = set(berdo_ids)
+    for berdo_id, target_id in links.itertuples(index=False):
+        if berdo_id in berdo_ids or target_id.strip() in berdo_ids:
+            berdo_ids.update([berdo_id, target_id.strip()])
+    return berdo_ids
+
+
+def read_pending_ids(delta_directory=DELTA_DIRECTORY):
+    """
+    Reads the BERDO IDs that script 1 changed and script 2 has not merged yet.
+
+    Parameters:
+    delta_directory (str): Directory of the delta state.
+
+    Returns:
+    set or None: The pending BERDO ID keys, or None when everything has to be rebuilt.
+    """
+    path = os.path.join(delta_directory, PENDING_IDS_FILE)
+    if not os.path.exists(path):
+        return set()
+    pending = set(pd.read_csv(path, dtype=str, keep_default_na=False)['berdo_id'])
+    return None if ALL_BERDO_IDS in pending else pending
+
+
+def add_pending_ids(berdo_ids, delta_directory=DELTA_DIRECTORY):
+    """
+    Adds BERDO IDs for script 2 to merge, keeping those of earlier runs it has not merged.
+
+    Parameters:
+    berdo_ids (set or None): Changed BERDO ID keys, or None after a full rebuild.
+    delta_directory (str): Directory of the delta state.
+    """
+    pending = read_pending_ids(delta_directory)
+    pending = {ALL_BERDO_IDS} if berdo_ids is None or pending is None else pending | set(berdo_ids)
+    os.makedirs(delta_directory, exist_ok=True)
+    pd.DataFrame({'berdo_id': sorted(pending)}).to_csv(os.path.join(delta_directory, PENDING_IDS_FILE), index=False)
+
+
+def clear_pending_ids(delta_directory=DELTA_DIRECTORY):
+    """
+    Marks the pending BERDO IDs as merged by script 2.
+
+    Parameters:
+    delta_directory (str): Directory of the delta state.
+    """
+    path = os.path.join(delta_directory, PENDING_IDS_FILE)
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def read_persisted_output(file_path, df_new):
+    """
+    Reads an output of the previous run with the column types of the rows that are merged into it.
+
+    Text columns stay text, so values like zip codes keep their leading zeros, and numbers are
+    read back exactly as they were written.
+
+    Parameters:
+    file_path (str): The output CSV file.
+    df_new (pandas.DataFrame): Rows of the changed BERDO IDs, processed like the full data.
+
+    Returns:
+    pandas.DataFrame: The output of the previous run.
+    """
+    text_columns = {column: str for column in df_new.columns if not pd.api.types.is_numeric_dtype(df_new[column])}
+    return pd.read_csv(file_path, dtype=text_columns, float_precision='round_trip')
+
+
+def merge_delta_rows(df_persisted, df_new, berdo_ids, key_columns):
+    """
+    Replaces the rows of changed BERDO IDs in a persisted output with their new rows.
+
+    Rows of unchanged BERDO IDs keep their order; each new row is inserted before the first
+    kept row with a larger key, which is where a full rebuild sorts it.
+
+    Parameters:
+    df_persisted (pandas.DataFrame): The output of the previous run.
+    df_new (pandas.DataFrame): Rows of the changed BERDO IDs, processed like the full data.
+    berdo_ids (set): The changed BERDO ID keys.
+    key_columns (list): Columns the output is sorted by, ending with 'BERDO ID'.
+
+    Returns:
+    pandas.DataFrame: The merged output.
+    """
+    df_kept = df_persisted[~berdo_keys(df_persisted['BERDO ID']).isin(berdo_ids)]
+    df_new = df_new.sort_values(key_columns, kind='mergesort')
+
+    # Sort positions: kept rows by their order, new rows just before the kept row they precede
+    kept_keys = list(df_kept[key_columns].itertuples(index=False, name=None))
+    positions = [bisect.bisect_right(kept_keys, key) - 0.5
+                 for key in df_new[key_columns].itertuples(index=False, name=None)]
+    order = np.argsort(np.concatenate([np.arange(len(df_kept)), np.array(positions, dtype=float)]), kind='stable')
+
+    df_merged = pd.concat([df_kept, df_new], axis=0, ignore_index=True) if len(df_new) else df_kept
+    return df_merged.iloc[order].reset_index(drop=True)
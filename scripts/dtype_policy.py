@@ -0,0 +1,124 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+
+# Repeated text with few distinct values, stored as categories
+CATEGORY_COLUMNS = ['Property Owner Name', 'Largest Property Type', 'All Property Types', 'BERDO Property Type',
+                    'Building Address Zip Code', 'Parcel Address Zip Code', 'owner_name', 'zip_code',
+                    'primary_property_type', 'all_property_types', 'energy_type']
+
+# Free text, stored as Arrow-backed strings
+STRING_COLUMNS = ['Building Address', 'Parcel Address', 'address']
+
+# Integer ids, stored as int32 when they fit
+ID_COLUMNS = ['BERDO ID', 'building_id', 'usage_id', 'factor_id']
+
+# Years, stored as uint16
+YEAR_COLUMNS = ['Data Year', 'Year', 'year']
+
+# Energy usage, stored as float32 (or int32 when integral) when no precision is lost
+USAGE_COLUMN_SUFFIX = '(kBtu)'
+USAGE_COLUMNS = ['usage']
+
+
+def _downcast_integer(series, dtype):
+    # Only numeric columns without missing values whose values all fit the smaller type are downcast
+    if not pd.api.types.is_numeric_dtype(series) or pd.api.types.is_bool_dtype(series) or series.isna().any():
+        return series
+    values = series.to_numpy()
+    limits = np.iinfo(dtype)
+    if len(values) and (np.any(values != np.round(values)) or values.min() < limits.min or values.max() > limits.max):
+        return series
+    return series.astype(dtype)
+
+
+def _downcast_usage(series):
+    if not pd.api.types.is_float_dtype(series) or series.dtype == np.float32:
+        return _downcast_integer(series, np.int32) if pd.api.types.is_integer_dtype(series) else series
+    values = series.to_numpy()
+    if np.array_equal(values.astype(np.float32).astype(values.dtype), values, equal_nan=True):
+        return series.astype(np.float32)
+    return series
+
+
+def apply_dtype_policy(df):
+    """
+    Converts the columns of a pipeline frame to the compact dtypes of the dtype policy.
+
+    Low-cardinality text becomes categorical, addresses become Arrow-backed strings, ids
+    become int32 and years uint16, and energy usage becomes float32. Numeric columns are only
+    downcast when every value is represented exactly, so written CSVs do not change; ids that
+    are not all integers (e.g. campus BERDO IDs) keep their dtype.
+
+    Parameters:
+    df (pandas.DataFrame): A frame read or written at a stage boundary of scripts 1-3.
+
+    Returns:
+    pandas.DataFrame: A copy of the frame with the compact dtypes.
+    """
+    df = df.copy()
+    for column in df.columns:
+        if column in CATEGORY_COLUMNS:
+            df[column] = df[column].astype('category')
+        elif column in STRING_COLUMNS:
+            df[column] = df[column].astype('string[pyarrow]')
+        elif column in ID_COLUMNS:
+            df[column] = _downcast_integer(df[column], np.int32)
+        elif column in YEAR_COLUMNS:
+            df[column] = _downcast_integer(df[column], np.uint16)
+        elif column in USAGE_COLUMNS or str(column).endswith(USAGE_COLUMN_SUFFIX):
+            df[column] = _downcast_usage(df[column])
+    return df
+
+
+def peak_rss_mb():
+    """
+    Reads the peak resident set size of the current process.
+
+    Returns:
+    float: The peak RSS in MB, or None where the resource module is not available.
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / 1024 ** 2 if sys.platform == 'darwin' else peak / 1024
+
+
+def memory_report(frames):
+    """
+    Summarizes the memory used by pipeline frames, by frame and dtype.
+
+    Parameters:
+    frames (dict): Frame name -> pandas.DataFrame.
+
+    Returns:
+    pandas.DataFrame: One row per frame and dtype with the number of rows, columns and the
+                      deep memory usage in MB.
+    """
+    rows = []
+    for name, df in frames.items():
+        memory = df.memory_usage(deep=True, index=False)
+        for dtype, columns in df.columns.groupby(df.dtypes.astype(str)).items():
+            rows.append({'frame': name, 'dtype': dtype, 'rows': len(df), 'columns': len(columns),
+                         'memory_mb': memory[columns].sum() / 1e6})
+    return pd.DataFrame(rows, columns=['frame', 'dtype', 'rows', 'columns', 'memory_mb'])
+
+
+def print_memory_report(frames):
+    """
+    Prints the memory report of pipeline frames and the peak RSS when BERDO_MEMORY_REPORT is set.
+
+    Parameters:
+    frames (dict): Frame name -> pandas.DataFrame.
+    """
+    if not os.environ.get('BERDO_MEMORY_REPORT'):
+        return
+    df_report = memory_report(frames)
+    print(df_report.to_string(index=False))
+    print(f"Frames: {df_report['memory_mb'].sum():.1f} MB, peak RSS: {peak_rss_mb():.1f} MB")
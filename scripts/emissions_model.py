@@ -0,0 +1,207 @@
+import numpy as np
+
+from factor_registry import select_factors
+
+
+# Cost of Metric Ton CO2 Above Threshold
+CO2_COST = 243
+
+
+# Conversions to mmBtu for Different Fuel Types
+kWh_to_MMBTU = 0.003412
+THERM_to_MMBTU = 0.1
+FO1_Gal_to_MMBTU = 0.135
+FO2_Gal_to_MMBTU = 0.14
+FO4_Gal_to_MMBTU = 0.146
+DIESEL_Gal_to_MMBTU = 0.1387
+
+# Fuel types in the same order as the usage inputs of the app (value1 - value11)
+# Each entry is (display name, factor registry fuel, conversion from input units to MMBtu)
+FUEL_TYPES = [
+    ('Electricity', 'Electricity', kWh_to_MMBTU),
+    ('Natural Gas', 'Natural Gas', THERM_to_MMBTU),
+    ('Fuel Oil #1', 'Fuel Oil #1', FO1_Gal_to_MMBTU),
+    ('Fuel Oil #2', 'Fuel Oil #2', FO2_Gal_to_MMBTU),
+    ('Fuel Oil #4', 'Fuel Oil #4', FO4_Gal_to_MMBTU),
+    ('Diesel', 'Diesel', DIESEL_Gal_to_MMBTU),
+    ('District Steam', 'District Steam', 1),
+    ('District Hot Water', 'District Hot Water', 1),
+    ('Elec-Driven Chiller', 'Electric Driven Chiller', 1),
+    ('Gas Absorption Chiller', 'Absorption Chiller (Natural Gas)', 1),
+    ('Engine-Driven Chiller', 'Engine-Driven Chiller (Natural Gas)', 1),
+]
+
+FUEL_NAMES = [name for name, _, _ in FUEL_TYPES]
+
+# Years shown in the CEI breakdown and years subject to BERDO thresholds
+CEI_YEARS = [str(year) for year in range(2021, 2051)]
+PENALTY_YEARS = [str(year) for year in range(2025, 2051)]
+
+
+def build_factor_matrix(factor_set, years):
+    """
+    Compiles emissions factors into a dense (year x fuel) array of kg CO2e per input unit.
+
+    Each cell is the emissions factor (kg CO2e/MMBtu) of the fuel for that year multiplied
+    by the conversion of the fuel's input unit to MMBtu, so that multiplying a usage vector
+    in input units by the matrix gives kg CO2e per year.
+
+    Parameters:
+    factor_set (dict): A factor set from factor_registry.get_factor_set.
+    years (list): The years to compile, in row order.
+
+    Returns:
+    numpy.ndarray: Array of shape (len(years), len(FUEL_TYPES)).
+    """
+    factors = select_factors(factor_set, [fuel for _, fuel, _ in FUEL_TYPES], years)
+    return factors * np.array([conversion for _, _, conversion in FUEL_TYPES])
+
+
+def calculate_cei(usage, gsf, factor_matrix):
+    """
+    Calculates the carbon emissions intensity (CEI) of each fuel type for each year.
+
+    Works on a single building (usage of shape (fuels,) and a scalar GSF) or on a batch of
+    buildings (usage of shape (buildings, fuels) and GSF of shape (buildings,)) in one pass.
+
+    Parameters:
+    usage (array-like): Fuel usage in the input units of FUEL_TYPES.
+    gsf (float or array-like): Building gross square footage.
+    factor_matrix (numpy.ndarray): A (year x fuel) matrix from build_factor_matrix.
+
+    Returns:
+    numpy.ndarray: CEI in kg CO2e/sf/yr with shape (..., years, fuels).
+    """
+    usage = np.asarray(usage, dtype=float)
+    gsf = np.asarray(gsf, dtype=float)
+    return usage[..., np.newaxis, :] * factor_matrix / gsf[..., np.newaxis, np.newaxis]
+
+
+def calculate_total_cei(usage, gsf, factor_matrix):
+    """
+    Calculates the CEI of all fuel types combined for each year.
+
+    Equivalent to calculate_cei(...).sum(axis=-1) without materializing the per-fuel
+    breakdown, so a batch of many buildings is reduced with a single matrix product.
+
+    Parameters:
+    usage (array-like): Fuel usage in the input units of FUEL_TYPES, shape (fuels,) or (buildings, fuels).
+    gsf (float or array-like): Building gross square footage.
+    factor_matrix (numpy.ndarray): A (year x fuel) matrix from build_factor_matrix.
+
+    Returns:
+    numpy.ndarray: Building CEI in kg CO2e/sf/yr with shape (..., years).
+    """
+    usage = np.asarray(usage, dtype=float)
+    gsf = np.asarray(gsf, dtype=float)
+    return usage @ factor_matrix.T / gsf[..., np.newaxis]
+
+
+def calculate_penalty(total_cei, thresholds, gsf):
+    """
+    Calculates the yearly alternative compliance payment for emissions above the BERDO threshold.
+
+    Parameters:
+    total_cei (array-like): Building CEI (kg CO2e/sf/yr) per year, shape (..., years).
+    thresholds (array-like): BERDO threshold CEI per year, broadcastable to total_cei.
+    gsf (float or array-like): Building gross square footage.
+
+    Returns:
+    numpy.ndarray: Cost penalty in dollars per year, rounded to the nearest dollar.
+    """
+    total_cei = np.asarray(total_cei, dtype=float)
+    gsf = np.asarray(gsf, dtype=float)
+    excess = np.maximum(total_cei - thresholds, 0)
+    return np.round(excess * CO2_COST * gsf[..., np.newaxis] / 1000, 0)
+
+
+# Usage columns of the preprocessed BERDO data (kBtu) and their factor registry fuels
+PIPELINE_FUELS = [
+    ('Electricity Usage (kBtu)', 'Electricity'),
+    ('Natural Gas Usage (kBtu)', 'Natural Gas'),
+    ('Fuel Oil 1 Usage (kBtu)', 'Fuel Oil #1'),
+    ('Fuel Oil 2 Usage (kBtu)', 'Fuel Oil #2'),
+    ('Fuel Oil 4 Usage (kBtu)', 'Fuel Oil #4'),
+    ('Fuel Oil 5 and 6 Usage (kBtu)', 'Fuel Oil #5 & 6'),
+    ('Diesel Usage (kBtu)', 'Diesel'),
+    ('Propane Usage (kBtu)', 'Propane'),
+    ('Kerosene Usage (kBtu)', 'Kerosene'),
+    ('District Chilled Water Usage (kBtu)', 'District Chilled Water'),
+    ('District Steam Usage (kBtu)', 'District Steam'),
+]
+
+PIPELINE_FUEL_COLUMNS = [usage_column for usage_column, _ in PIPELINE_FUELS]
+
+# Positions of the fuels that scenarios and measures act on in PIPELINE_FUELS
+ELECTRICITY = PIPELINE_FUEL_COLUMNS.index('Electricity Usage (kBtu)')
+NATURAL_GAS = PIPELINE_FUEL_COLUMNS.index('Natural Gas Usage (kBtu)')
+
+# Years with BERDO emissions thresholds
+THRESHOLD_YEARS = list(range(2025, 2051))
+
+
+def build_usage_matrix(df):
+    """
+    Builds a dense (building x fuel) array of usage in kBtu from the preprocessed BERDO data.
+
+    Electricity is net of onsite renewable electricity, matching the emissions calculation
+    in the preprocessing script.
+
+    Parameters:
+    df (pandas.DataFrame): The preprocessed data from 1-berdo-emissions-data.csv.
+
+    Returns:
+    numpy.ndarray: Array of shape (len(df), len(PIPELINE_FUELS)) in PIPELINE_FUELS order.
+    """
+    usage = df[PIPELINE_FUEL_COLUMNS].fillna(0).to_numpy(dtype=float)
+    usage[:, 0] -= df['Renewable System Electricity Usage Onsite (kBtu)'].fillna(0).to_numpy(dtype=float)
+    return usage
+
+
+def build_pipeline_factor_matrix(factor_set, years):
+    """
+    Selects a dense (year x fuel) array of emissions factors for the pipeline fuels.
+
+    Parameters:
+    factor_set (dict): A factor set from factor_registry.get_factor_set.
+    years (list): The years (as integers) to compile, in row order.
+
+    Returns:
+    numpy.ndarray: Read-only emissions factors in kg CO2e/MMBtu of shape (len(years), len(PIPELINE_FUELS)).
+    """
+    return select_factors(factor_set, [fuel for _, fuel in PIPELINE_FUELS], years)
+
+
+def build_threshold_matrix(df, df_thresholds, years):
+    """
+    Builds a dense (building x year) array of allowed emissions in metric tons CO2e.
+
+    Each building's allowance is the threshold CEI of its BERDO property type times its
+    reported gross floor area. Buildings whose property type has no thresholds get NaN.
+
+    Parameters:
+    df (pandas.DataFrame): The preprocessed data from 1-berdo-emissions-data.csv.
+    df_thresholds (pandas.DataFrame): 1-thresholds-berdo.csv, one row per year and a column per property type.
+    years (list): The years (as integers) to compile, in column order.
+
+    Returns:
+    numpy.ndarray: Array of shape (len(df), len(years)).
+    """
+    df_thresholds = df_thresholds.set_index(df_thresholds['Year'].astype(int)).drop(columns='Year')
+    threshold_cei = df_thresholds.loc[years].reindex(columns=df['BERDO Property Type']).to_numpy(dtype=float).T
+    gfa = df['Reported Gross Floor Area (Sq Ft)'].fillna(0).to_numpy(dtype=float)
+    return threshold_cei * gfa[:, np.newaxis] / 1000
+
+
+def calculate_emissions(usage, factor_matrix):
+    """
+    Calculates yearly emissions in metric tons CO2e from usage in kBtu.
+
+    Parameters:
+    usage (numpy.ndarray): Usage from build_usage_matrix, shape (buildings, fuels).
+    factor_matrix (numpy.ndarray): Factors from build_pipeline_factor_matrix, shape (years, fuels).
+
+    Returns:
+    numpy.ndarray: Emissions of shape (buildings, years).
+    """
+    return usage @ factor_matrix.T / 1e6
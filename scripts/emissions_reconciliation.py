@@ -0,0 +1,187 @@
+import numpy as np
+import pandas as pd
+
+from emissions_model import CO2_COST, PIPELINE_FUELS
+
+
+# Emissions the city estimated for each building, in the separated BERDO data
+REPORTED_GHG_COLUMN = 'Estimated Total GHG Emissions (kgCO2e)'
+
+# Emissions computed by the preprocessing script for each fuel, in metric tons CO2e
+COMPUTED_GHG_COLUMNS = ['Electricity Emissions (MT CO2e)', 'Natural Gas Emissions (MT CO2e)',
+                        'Fuel Oil #1 Emissions (MT CO2e)', 'Fuel Oil #2 Emissions (MT CO2e)',
+                        'Fuel Oil #4 Emissions (MT CO2e)', 'Fuel Oil #5 & #6 Emissions (MT CO2e)',
+                        'Diesel #2 Emissions (MT CO2e)', 'Propane Emissions (MT CO2e)', 'Kerosene Emissions (MT CO2e)',
+                        'District Chilled Water Emissions (MT CO2e)', 'District Steam Emissions (MT CO2e)']
+
+# Share of a building's site usage from which a fuel counts towards its fuel mix
+FUEL_MIX_SHARE = 0.1
+
+# Modified z-score of the log ratio above which a building is an outlier of its cluster (Iglewicz and Hoaglin)
+OUTLIER_Z_SCORE = 3.5
+
+# Smallest MAD of the log ratio in a cluster, so that clusters of nearly equal ratios (e.g. electricity-only
+# buildings, whose ratio is the ratio of the electricity factors) only flag deviations of roughly 10% and more
+MIN_LOG_RATIO_MAD = 0.02
+
+# Clusters with fewer buildings are compared with all buildings of their data year instead
+MIN_CLUSTER_SIZE = 5
+
+
+def build_reconciliation_frame(df_reported, df_computed):
+    """
+    Joins the city's reported emissions to the computed emissions of the same buildings and years.
+
+    Parameters:
+    df_reported (pandas.DataFrame): The separated data of 2-berdo_reported_2022.csv and 2-berdo_reported_2023.csv.
+    df_computed (pandas.DataFrame): The preprocessed buildings and campuses of 1-preprocessed-emissions-data.
+
+    Returns:
+    pandas.DataFrame: One row per building and data year with BERDO ID, Data Year, property_type,
+                      the usage and computed emissions columns and the reported emissions.
+    """
+    df_reported = pd.DataFrame({'BERDO ID': df_reported['BERDO ID'].astype(str).str.strip(),
+                                'Data Year': df_reported['Data Year'].astype(int),
+                                REPORTED_GHG_COLUMN: df_reported[REPORTED_GHG_COLUMN]})
+    df_computed = df_computed.copy()
+    df_computed['BERDO ID'] = df_computed['BERDO ID'].astype(str).str.strip()
+    df_computed['Data Year'] = df_computed['Data Year'].astype(int)
+
+    # Campuses have no BERDO property type, so they are grouped by their largest property type
+    property_type = df_computed.get('BERDO Property Type', pd.Series(np.nan, index=df_computed.index))
+    df_computed['property_type'] = property_type.fillna(df_computed['Largest Property Type']).astype(str)
+
+    usage_columns = [usage_column for usage_column, _ in PIPELINE_FUELS]
+    columns = ['BERDO ID', 'Data Year', 'property_type', 'Reported Gross Floor Area (Sq Ft)']
+    return df_computed[columns + usage_columns + COMPUTED_GHG_COLUMNS].merge(
+        df_reported, on=['BERDO ID', 'Data Year'], how='left', validate='many_to_one')
+
+
+def label_fuel_mix(usage, fuel_names, min_share=FUEL_MIX_SHARE):
+    """
+    Labels every building with the fuels that make up at least min_share of its site usage.
+
+    Parameters:
+    usage (numpy.ndarray): Site usage of shape (buildings, fuels).
+    fuel_names (list): Name of every fuel column.
+    min_share (float): Share of site usage from which a fuel counts.
+
+    Returns:
+    numpy.ndarray: Labels like 'Electricity + Natural Gas', or 'None' for buildings without usage.
+    """
+    usage = np.clip(np.nan_to_num(usage), 0, None)
+    total = usage.sum(axis=1, keepdims=True)
+    shares = np.divide(usage, total, out=np.zeros_like(usage), where=total > 0)
+
+    # One bit per fuel, so each combination of fuels is one code
+    codes = (shares >= min_share).astype(np.int64) @ (1 << np.arange(usage.shape[1], dtype=np.int64))
+    unique_codes, inverse = np.unique(codes, return_inverse=True)
+    labels = np.array([' + '.join(name for bit, name in enumerate(fuel_names) if code >> bit & 1) or 'None'
+                       for code in unique_codes], dtype=object)
+    return labels[inverse]
+
+
+def robust_z_scores(values, groups, fallback_groups, min_group_size=MIN_CLUSTER_SIZE, min_mad=0.0):
+    """
+    Calculates modified z-scores, 0.6745 * (x - median) / MAD, within groups.
+
+    Groups smaller than min_group_size use the median and MAD of their fallback group, and MADs
+    below min_mad are raised to it.
+
+    Parameters:
+    values (pandas.Series): The values, NaN where a value is not scored.
+    groups (list): Series that define the groups.
+    fallback_groups (list): Series that define the larger groups used instead of small ones.
+    min_group_size (int): Smallest group with its own median and MAD.
+    min_mad (float): Smallest MAD.
+
+    Returns:
+    pandas.Series: The z-scores, NaN where there is no value or no spread.
+    """
+    def group_statistics(keys):
+        median = values.groupby(keys).transform('median')
+        mad = (values - median).abs().groupby(keys).transform('median')
+        return median, mad, values.groupby(keys).transform('count')
+
+    median, mad, size = group_statistics(groups)
+    fallback_median, fallback_mad, _ = group_statistics(fallback_groups)
+    use_fallback = size < min_group_size
+    median = median.where(~use_fallback, fallback_median)
+    mad = mad.where(~use_fallback, fallback_mad).clip(lower=min_mad)
+    return 0.6745 * (values - median) / mad.where(mad > 0)
+
+
+def reconcile_emissions(df_reconciliation, df_thresholds=None):
+    """
+    Compares computed with reported emissions for every building and reporting year in one pass.
+
+    Residuals and log ratios are calculated for all rows at once. Buildings are clustered by
+    data year, fuel mix and property type, and a building is an outlier when the modified
+    z-score of its log ratio within its cluster exceeds OUTLIER_Z_SCORE.
+
+    Parameters:
+    df_reconciliation (pandas.DataFrame): The frame from build_reconciliation_frame.
+    df_thresholds (pandas.DataFrame, optional): 1-thresholds-berdo.csv, to compare the penalties at the first
+                                                thresholds (2025) of both emissions.
+
+    Returns:
+    pandas.DataFrame: One row per building and data year with the computed and reported emissions
+                      (MT CO2e), residual, ratio, fuel mix, z-score and status.
+    """
+    df = df_reconciliation[['BERDO ID', 'Data Year', 'property_type', 'Reported Gross Floor Area (Sq Ft)']].copy()
+    df['computed_mt_co2e'] = df_reconciliation[COMPUTED_GHG_COLUMNS].fillna(0).sum(axis=1)
+    df['reported_mt_co2e'] = df_reconciliation[REPORTED_GHG_COLUMN] / 1000
+    df['residual_mt_co2e'] = df['computed_mt_co2e'] - df['reported_mt_co2e']
+
+    # Ratios only where both sides have emissions
+    both = (df['computed_mt_co2e'] > 0) & (df['reported_mt_co2e'] > 0)
+    df['ratio'] = (df['computed_mt_co2e'] / df['reported_mt_co2e']).where(both)
+    log_ratio = np.log(df['ratio'])
+
+    # Clusters of data year, fuel mix and property type
+    df['fuel_mix'] = label_fuel_mix(df_reconciliation[[usage_column for usage_column, _ in PIPELINE_FUELS]]
+                                    .to_numpy(dtype=float), [fuel for _, fuel in PIPELINE_FUELS])
+    df['z_score'] = robust_z_scores(log_ratio, [df['Data Year'], df['fuel_mix'], df['property_type']],
+                                    [df['Data Year']], min_mad=MIN_LOG_RATIO_MAD)
+
+    df['status'] = np.select(
+        [df['reported_mt_co2e'].isna(), ~(df['reported_mt_co2e'] > 0) | ~(df['computed_mt_co2e'] > 0),
+         df['z_score'] > OUTLIER_Z_SCORE, df['z_score'] < -OUTLIER_Z_SCORE],
+        ['no reported value', 'no emissions', 'outlier high', 'outlier low'], default='reconciled')
+
+    # Penalty at the 2025 thresholds of the computed and of the reported emissions
+    if df_thresholds is not None:
+        thresholds = df_thresholds.set_index(df_thresholds['Year'].astype(int)).drop(columns='Year')
+        threshold_cei = thresholds.reindex(columns=df['property_type']).loc[2025].to_numpy(dtype=float)
+        allowance = threshold_cei * df['Reported Gross Floor Area (Sq Ft)'].fillna(0).to_numpy(dtype=float) / 1000
+        for side in ['computed', 'reported']:
+            excess = np.maximum(df[f'{side}_mt_co2e'].to_numpy(dtype=float) - allowance, 0)
+            df[f'{side}_penalty_2025'] = np.where(np.isnan(allowance), np.nan, excess * CO2_COST)
+    return df.drop(columns='Reported Gross Floor Area (Sq Ft)')
+
+
+def summarize_reconciliation(df, by):
+    """
+    Totals the reconciliation of the buildings with both computed and reported emissions.
+
+    Parameters:
+    df (pandas.DataFrame): The frame from reconcile_emissions.
+    by (list): Columns to group by, e.g. ['Data Year'] or ['Data Year', 'fuel_mix', 'property_type'].
+
+    Returns:
+    pandas.DataFrame: Per group the buildings, outliers, total computed and reported emissions,
+                      their difference in percent, the median ratio and the 2025 penalties if present.
+    """
+    df = df[df['status'].isin(['reconciled', 'outlier high', 'outlier low'])].assign(
+        outlier=lambda df_compared: df_compared['status'] != 'reconciled')
+    penalty_columns = [column for column in ['computed_penalty_2025', 'reported_penalty_2025'] if column in df]
+    df_summary = df.groupby(by).agg(
+        buildings=('BERDO ID', 'size'),
+        outliers=('outlier', 'sum'),
+        computed_mt_co2e=('computed_mt_co2e', 'sum'),
+        reported_mt_co2e=('reported_mt_co2e', 'sum'),
+        median_ratio=('ratio', 'median'),
+        **{column: (column, 'sum') for column in penalty_columns},
+    ).reset_index()
+    df_summary['difference_percent'] = (df_summary['computed_mt_co2e'] / df_summary['reported_mt_co2e'] - 1) * 100
+    return df_summary
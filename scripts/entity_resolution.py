@@ -0,0 +1,283 @@
+import re
+from collections import defaultdict
+from itertools import combinations
+
+import pandas as pd
+
+from building_index import normalize_search_text, text_trigrams
+
+
+# Columns of the raw BERDO data used to link records
+MATCH_COLUMNS = ['BERDO ID', 'Tax Parcel ID', 'Property Owner Name', 'Building Address', 'Building Address Zip Code',
+                 'Parcel Address', 'Parcel Address Zip Code']
+
+# Words skipped when picking the street token of an address block
+STREET_STOPWORDS = {'n', 's', 'e', 'w', 'north', 'south', 'east', 'west', 'one', 'two', 'three', 'four', 'five',
+                    'six', 'seven', 'eight', 'nine', 'ten', 'the', 'and', 'of', 'rear', 'unit', 'ste', 'suite'}
+
+# Blocks with more records than this are skipped rather than compared all-pairs
+MAX_BLOCK_SIZE = 200
+
+# Weights of the pair features in the match score
+MATCH_WEIGHTS = {'address_similarity': 0.4, 'house_number_overlap': 0.2, 'same_parcel': 0.15,
+                 'owner_similarity': 0.15, 'parcel_address_similarity': 0.1}
+
+# Scores at or above which a pair is a match, or needs review. Pairs whose building addresses
+# have no house number in common are neighbours, not matches
+MATCH_THRESHOLD = 0.75
+REVIEW_THRESHOLD = 0.5
+
+
+def normalize_zip_code(value):
+    """
+    Normalizes a zip code read as text ('02116') or as a number (2116.0) to five digits.
+
+    Parameters:
+    value: The zip code cell.
+
+    Returns:
+    str: The five-digit zip code, or '' if the cell has none.
+    """
+    digits = re.sub(r'\D', '', str(value).split('.')[0]) if pd.notna(value) else ''
+    return digits.zfill(5)[:5] if digits and int(digits) else ''
+
+
+def normalize_parcel_id(value):
+    """
+    Normalizes a tax parcel ID read as text ('0401092000') or as a number (401092000.0).
+
+    Parameters:
+    value: The tax parcel ID cell.
+
+    Returns:
+    str: The ten-digit parcel ID, or '' if the cell has none.
+    """
+    digits = re.sub(r'\D', '', str(value).split('.')[0]) if pd.notna(value) else ''
+    return digits.zfill(10) if digits and int(digits) else ''
+
+
+def parse_match_address(address):
+    """
+    Splits an address into the parts used for blocking and scoring.
+
+    Parameters:
+    address (str): A building or parcel address.
+
+    Returns:
+    tuple: (normalized address, set of house numbers, street token). The street token is the
+           first word of the street name, or '' if the address has none.
+    """
+    text = normalize_search_text('' if pd.isna(address) else address)
+    text = ' '.join(re.sub(r'[^a-z0-9 ]', ' ', text).split())
+    house_numbers = set(re.findall(r'\b(\d+)[a-z]?\b', text))
+    street_words = [word for word in text.split() if word.isalpha() and word not in STREET_STOPWORDS]
+    return text, house_numbers, street_words[0] if street_words else ''
+
+
+def build_match_records(frames):
+    """
+    Builds the records to link from BERDO data of one or more years.
+
+    Parameters:
+    frames (dict): Source label (e.g. the data year) -> raw BERDO DataFrame with MATCH_COLUMNS.
+
+    Returns:
+    list: One dict per row with its source, row number, BERDO ID, normalized addresses, zip
+          codes, parcel ID and owner, and the trigrams used for scoring.
+    """
+    records = []
+    for source, df in frames.items():
+        for row, values in enumerate(df[MATCH_COLUMNS].itertuples(index=False)):
+            berdo_id, parcel_id, owner, building_address, building_zip, parcel_address, parcel_zip = values
+            addresses = []
+            for address, zip_code in [(building_address, building_zip), (parcel_address, parcel_zip)]:
+                text, house_numbers, street = parse_match_address(address)
+                addresses.append({'text': text, 'house_numbers': house_numbers, 'street': street,
+                                  'zip_code': normalize_zip_code(zip_code), 'trigrams': text_trigrams(text)})
+            owner = normalize_search_text('' if pd.isna(owner) else owner)
+            records.append({
+                'source': source, 'row': row,
+                'berdo_id': '' if pd.isna(berdo_id) else str(berdo_id).strip(),
+                'parcel_id': normalize_parcel_id(parcel_id),
+                'owner': owner, 'owner_trigrams': text_trigrams(owner),
+                'addresses': addresses,
+            })
+    return records
+
+
+def build_blocking_index(records, max_block_size=MAX_BLOCK_SIZE):
+    """
+    Groups records into blocks of likely matches.
+
+    Every record is filed under the zip code and street token of its building and its parcel
+    address, under its tax parcel ID and under its BERDO ID, so only records that share one of
+    those keys are ever compared. Address blocks with more than max_block_size records, such as
+    a long avenue, are split by the house numbers of the addresses ('address 02115 huntington #360');
+    records whose address has no house number form one more block ('address 02115 huntington #').
+
+    Parameters:
+    records (list): Records from build_match_records.
+    max_block_size (int): Address blocks with more records are split by house number.
+
+    Returns:
+    dict: Block key -> positions of the records in the block.
+    """
+    blocks = defaultdict(set)
+    house_number_blocks = defaultdict(set)
+    for position, record in enumerate(records):
+        for address in record['addresses']:
+            if address['zip_code'] and address['street']:
+                key = f"address {address['zip_code']} {address['street']}"
+                blocks[key].add(position)
+                for house_number in address['house_numbers'] or ['']:
+                    house_number_blocks[key, house_number].add(position)
+        if record['parcel_id']:
+            blocks[f"parcel {record['parcel_id']}"].add(position)
+        if record['berdo_id']:
+            blocks[f"berdo id {record['berdo_id']}"].add(position)
+
+    # Replace the oversized address blocks with their house number blocks
+    oversized = {key for key, positions in blocks.items()
+                 if key.startswith('address ') and len(positions) > max_block_size}
+    for key in oversized:
+        del blocks[key]
+    for (key, house_number), positions in house_number_blocks.items():
+        if key in oversized:
+            blocks[f'{key} #{house_number}'] = positions
+    return {key: sorted(positions) for key, positions in blocks.items() if len(positions) > 1}
+
+
+def candidate_pairs(blocks, max_block_size=MAX_BLOCK_SIZE):
+    """
+    Lists the record pairs that share a block.
+
+    Parameters:
+    blocks (dict): Blocks from build_blocking_index.
+    max_block_size (int): Blocks with more records are skipped; see oversized_blocks.
+
+    Returns:
+    dict: (position, position) -> the first block key the pair shares.
+    """
+    pairs = {}
+    for key, positions in blocks.items():
+        if len(positions) > max_block_size:
+            continue
+        for pair in combinations(positions, 2):
+            pairs.setdefault(pair, key)
+    return pairs
+
+
+def oversized_blocks(blocks, max_block_size=MAX_BLOCK_SIZE):
+    """
+    Lists the blocks candidate_pairs skips, because they stay too large after splitting.
+
+    Parameters:
+    blocks (dict): Blocks from build_blocking_index.
+    max_block_size (int): The largest block that is compared.
+
+    Returns:
+    dict: Block key -> number of records, largest first.
+    """
+    sizes = {key: len(positions) for key, positions in blocks.items() if len(positions) > max_block_size}
+    return dict(sorted(sizes.items(), key=lambda item: -item[1]))
+
+
+def _jaccard(left, right):
+    return len(left & right) / len(left | right) if left and right else 0.0
+
+
+def score_pair(left, right):
+    """
+    Scores how likely two records describe the same property.
+
+    Addresses are compared by their trigrams. The building addresses identify a building; the
+    building address of either record is also compared with the parcel address of the other, for
+    records that reported the parcel address as the building address. Parcel addresses are not
+    compared with each other, since the buildings of a multi-building parcel share one.
+
+    Parameters:
+    left (dict): A record from build_match_records.
+    right (dict): Another record.
+
+    Returns:
+    dict: The features of MATCH_WEIGHTS and their weighted 'score' between 0 and 1.
+    """
+    (left_building, left_parcel), (right_building, right_parcel) = left['addresses'], right['addresses']
+
+    # House numbers of the building addresses; unknown if either has none
+    house_number_overlap = 0.5
+    if left_building['house_numbers'] and right_building['house_numbers']:
+        house_number_overlap = float(bool(left_building['house_numbers'] & right_building['house_numbers']))
+
+    features = {
+        'address_similarity': _jaccard(left_building['trigrams'], right_building['trigrams']),
+        'house_number_overlap': house_number_overlap,
+        'same_parcel': float(bool(left['parcel_id']) and left['parcel_id'] == right['parcel_id']),
+        'owner_similarity': _jaccard(left['owner_trigrams'], right['owner_trigrams']),
+        'parcel_address_similarity': max(_jaccard(left_building['trigrams'], right_parcel['trigrams']),
+                                         _jaccard(left_parcel['trigrams'], right_building['trigrams'])),
+    }
+    features['score'] = sum(MATCH_WEIGHTS[name] * value for name, value in features.items())
+    return features
+
+
+def match_records(frames, max_block_size=MAX_BLOCK_SIZE):
+    """
+    Links BERDO records across years and finds duplicates within a year.
+
+    Candidate pairs come from the blocking index, so the work grows with the block sizes rather
+    than with all pairs of records. Pairs are kept when they score at least REVIEW_THRESHOLD and
+    their building addresses share a house number, or when they share a BERDO ID, so a BERDO ID
+    whose address changed between years shows up as a non-match to review.
+
+    Parameters:
+    frames (dict): Source label (e.g. the data year) -> raw BERDO DataFrame with MATCH_COLUMNS.
+    max_block_size (int): Address blocks with more records are split by house number, other blocks are skipped.
+
+    Returns:
+    pandas.DataFrame: The match table, one row per pair with both records' source, row, BERDO ID
+                      and building address, the pair features, the score, the 'decision'
+                      ('match', 'review' or 'non-match'), the 'relation' ('across years' or
+                      'within year') and the block that paired them, best scores first.
+    """
+    records = build_match_records(frames)
+    rows = []
+    blocks = build_blocking_index(records, max_block_size)
+    for (left_position, right_position), block in candidate_pairs(blocks, max_block_size).items():
+        left, right = records[left_position], records[right_position]
+        features = score_pair(left, right)
+        same_berdo_id = bool(left['berdo_id']) and left['berdo_id'] == right['berdo_id']
+        if (features['score'] < REVIEW_THRESHOLD or not features['house_number_overlap']) and not same_berdo_id:
+            continue
+        rows.append({
+            'left_source': left['source'], 'left_row': left['row'], 'left_berdo_id': left['berdo_id'],
+            'left_address': left['addresses'][0]['text'],
+            'right_source': right['source'], 'right_row': right['row'], 'right_berdo_id': right['berdo_id'],
+            'right_address': right['addresses'][0]['text'],
+            'same_berdo_id': same_berdo_id, **features,
+            'decision': 'non-match' if not features['house_number_overlap']
+            else 'match' if features['score'] >= MATCH_THRESHOLD
+            else 'review' if features['score'] >= REVIEW_THRESHOLD else 'non-match',
+            'relation': 'across years' if left['source'] != right['source'] else 'within year',
+            'block': block,
+        })
+
+    df_matches = pd.DataFrame(rows, columns=[
+        'left_source', 'left_row', 'left_berdo_id', 'left_address', 'right_source', 'right_row', 'right_berdo_id',
+        'right_address', 'same_berdo_id', *MATCH_WEIGHTS, 'score', 'decision', 'relation', 'block'])
+    return df_matches.sort_values(['score', 'left_source', 'left_row', 'right_source', 'right_row'],
+                                  ascending=[False, True, True, True, True]).reset_index(drop=True)
+
+
+def summarize_matches(df_matches):
+    """
+    Counts the pairs of a match table by relation, decision and whether they share a BERDO ID.
+
+    Parameters:
+    df_matches (pandas.DataFrame): A match table from match_records.
+
+    Returns:
+    pandas.DataFrame: One row per relation, decision and same_berdo_id with the number of pairs.
+    """
+    return (df_matches.groupby(['relation', 'decision', 'same_berdo_id']).size()
+            .rename('pairs').reset_index())
@@ -0,0 +1,255 @@
+import os
+import warnings
+
+import numpy as np
+import pandas as pd
+
+
+# Every fuel with an emissions factor, in row order of the compiled factor arrays
+FACTOR_FUELS = [
+    'Electricity', 'Natural Gas', 'Fuel Oil #1', 'Fuel Oil #2', 'Fuel Oil #4', 'Fuel Oil #5 & 6', 'Diesel',
+    'Propane', 'Kerosene', 'District Chilled Water', 'District Steam', 'District Hot Water',
+    'Electric Driven Chiller', 'Absorption Chiller (Natural Gas)', 'Engine-Driven Chiller (Natural Gas)',
+]
+FACTOR_FUEL_INDEX = {fuel: row for row, fuel in enumerate(FACTOR_FUELS)}
+
+# Years covered by every factor set, in column order of the compiled factor arrays
+FACTOR_YEARS = list(range(2015, 2051))
+
+# Emissions factor columns of 1-emissions-factors.csv and of the preprocessed BERDO data
+FACTOR_CSV_COLUMNS = {
+    'Electricity': 'Electricity Emissions',
+    'Natural Gas': 'Natural Gas Emissions',
+    'Fuel Oil #1': 'Fuel Oil #1 Emissions',
+    'Fuel Oil #2': 'Fuel Oil #2 Emissions',
+    'Fuel Oil #4': 'Fuel Oil #4 Emissions',
+    'Fuel Oil #5 & 6': 'Fuel Oil #5 & 6 Emissions',
+    'Diesel': 'Diesel #2 Emissions',
+    'Propane': 'Propane Emissions',
+    'Kerosene': 'Kerosene Emissions',
+    'District Chilled Water': 'District Chilled Water Emissions',
+    'District Steam': 'District Steam Emissions',
+}
+
+# Ordinance factors (kg CO2e/MMBtu) of the fuels the app accepts but 1-emissions-factors.csv does not list
+ORDINANCE_FIXED_FACTORS = {
+    'District Hot Water': 66.4,
+    'Electric Driven Chiller': 52.7,
+    'Absorption Chiller (Natural Gas)': 73.89,
+    'Engine-Driven Chiller (Natural Gas)': 49.31,
+}
+
+DEFAULT_FACTOR_SET = 'berdo ordinance'
+DEFAULT_FACTOR_SET_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data-files',
+                                       '1-emissions-factors.csv')
+
+# Registered factor sets by name, then version
+_factor_sets = {}
+
+
+def _fill_factor_years(fuel, factor, base_row):
+    # Factors of every year of FACTOR_YEARS from a dict of year -> number that may not cover all of them
+    given = {int(year): value for year, value in factor.items() if not pd.isna(value)}
+    missing = [year for year in FACTOR_YEARS if year not in given]
+    if not missing:
+        return [given[year] for year in FACTOR_YEARS]
+    if not given:
+        raise ValueError(f"No emissions factors given for '{fuel}'")
+
+    # Years before the first given year come from the base set, later years hold the last given factor
+    first_year = min(given)
+    earlier = [year for year in missing if year < first_year]
+    if earlier and (base_row is None or np.isnan(base_row[[year - FACTOR_YEARS[0] for year in earlier]]).any()):
+        raise ValueError(f"Emissions factors for '{fuel}' are missing for {earlier[0]}-{earlier[-1]}, "
+                         f"before the first given year {first_year}, and no base factor set covers them")
+    held = [year for year in missing if year > first_year]
+    if held:
+        warnings.warn(f"Emissions factors for '{fuel}' are missing for {', '.join(map(str, held))}; "
+                      f"holding the factor of the last given year flat")
+
+    filled = []
+    for year in FACTOR_YEARS:
+        if year in given:
+            filled.append(given[year])
+        elif year < first_year:
+            filled.append(base_row[year - FACTOR_YEARS[0]])
+        else:
+            filled.append(filled[-1])
+    return filled
+
+
+def compile_factors(factors, base=None):
+    """
+    Compiles emissions factors into a dense (fuel x year) array in FACTOR_FUELS and FACTOR_YEARS order.
+
+    A dict of yearly factors that does not cover FACTOR_YEARS, e.g. a grid forecast for some
+    years only, holds the factor of the last given year flat over the missing years after it,
+    with a warning; years before the first given year are taken from `base`.
+
+    Parameters:
+    factors (dict): Factors (kg CO2e/MMBtu) by fuel name, either a number for every year or a
+                    dict of year -> number.
+    base (numpy.ndarray, optional): Compiled factors used for the fuels not in `factors`.
+
+    Returns:
+    numpy.ndarray: Array of shape (len(FACTOR_FUELS), len(FACTOR_YEARS)), NaN for fuels without a factor.
+
+    Raises:
+    ValueError: If a fuel's factors start after FACTOR_YEARS begins and `base` does not cover the years before.
+    """
+    compiled = np.full((len(FACTOR_FUELS), len(FACTOR_YEARS)), np.nan) if base is None else base.copy()
+    for fuel, factor in factors.items():
+        if isinstance(factor, dict):
+            base_row = None if base is None else base[FACTOR_FUEL_INDEX[fuel]]
+            compiled[FACTOR_FUEL_INDEX[fuel]] = _fill_factor_years(fuel, factor, base_row)
+        else:
+            compiled[FACTOR_FUEL_INDEX[fuel]] = factor
+    return compiled
+
+
+def register_factor_set(name, version, factors, base=None, source=None):
+    """
+    Compiles and registers a named, versioned emissions factor set.
+
+    Parameters:
+    name (str): The factor set name, e.g. 'berdo ordinance' or a client name.
+    version (str): The version of the set.
+    factors (dict): Factors as accepted by compile_factors.
+    base (dict, optional): A registered factor set providing the fuels not in `factors`.
+    source (str, optional): Where the factors come from.
+
+    Returns:
+    dict: The registered factor set.
+    """
+    factor_set = {
+        'name': name,
+        'version': version,
+        'source': source,
+        'factors': compile_factors(factors, None if base is None else base['factors']),
+        'views': {},
+    }
+    factor_set['factors'].flags.writeable = False
+    _factor_sets.setdefault(name, {})[version] = factor_set
+    return factor_set
+
+
+def read_factor_csv(path):
+    """
+    Reads factors in the format of 1-emissions-factors.csv, one row per 'Data Year'.
+
+    Parameters:
+    path (str): Path to the CSV file.
+
+    Returns:
+    dict: Factors by fuel name for the FACTOR_CSV_COLUMNS present in the file.
+    """
+    df_factors = pd.read_csv(path)
+    df_factors = df_factors.set_index(df_factors['Data Year'].astype(int))
+    return {fuel: df_factors[column].to_dict() for fuel, column in FACTOR_CSV_COLUMNS.items()
+            if column in df_factors.columns}
+
+
+def load_factor_csv(path, name, version, base=None):
+    """
+    Registers a factor set read from a CSV file, e.g. an alternative grid forecast or client factors.
+
+    Fuels missing from the file are taken from `base`, by default the ordinance factor set.
+
+    Parameters:
+    path (str): Path to a CSV file in the format of 1-emissions-factors.csv.
+    name (str): The factor set name.
+    version (str): The version of the set.
+    base (dict, optional): A registered factor set providing the missing fuels.
+
+    Returns:
+    dict: The registered factor set.
+    """
+    base = get_factor_set() if base is None else base
+    return register_factor_set(name, version, read_factor_csv(path), base=base, source=path)
+
+
+def _load_default_factor_sets():
+    factors = read_factor_csv(DEFAULT_FACTOR_SET_PATH)
+    factors.update(ORDINANCE_FIXED_FACTORS)
+    register_factor_set(DEFAULT_FACTOR_SET, '1', factors, source=DEFAULT_FACTOR_SET_PATH)
+
+
+def list_factor_sets():
+    """
+    Lists the registered factor sets.
+
+    Returns:
+    list: (name, version, source) tuples.
+    """
+    if not _factor_sets:
+        _load_default_factor_sets()
+    return [(name, version, factor_set['source']) for name, versions in _factor_sets.items()
+            for version, factor_set in versions.items()]
+
+
+def get_factor_set(name=DEFAULT_FACTOR_SET, version=None):
+    """
+    Looks up a registered factor set, loading the ordinance set on first use.
+
+    Parameters:
+    name (str): The factor set name.
+    version (str, optional): The version, defaults to the most recently registered one.
+
+    Returns:
+    dict: The factor set.
+    """
+    if not _factor_sets:
+        _load_default_factor_sets()
+    versions = _factor_sets.get(name)
+    if not versions:
+        raise KeyError(f"Unknown emissions factor set '{name}'")
+    if version is None:
+        version = next(reversed(versions))
+    if version not in versions:
+        raise KeyError(f"Unknown version '{version}' of emissions factor set '{name}'")
+    return versions[version]
+
+
+def select_factors(factor_set, fuels, years):
+    """
+    Selects a (year x fuel) array of emissions factors from a compiled factor set.
+
+    Selections are cached on the factor set, so switching between sets never recompiles.
+
+    Parameters:
+    factor_set (dict): A factor set from get_factor_set.
+    fuels (list): Fuel names from FACTOR_FUELS, in column order.
+    years (list): Years (integers or strings), in row order.
+
+    Returns:
+    numpy.ndarray: Read-only emissions factors in kg CO2e/MMBtu of shape (len(years), len(fuels)).
+    """
+    key = (tuple(fuels), tuple(int(year) for year in years))
+    view = factor_set['views'].get(key)
+    if view is None:
+        outside = [year for year in key[1] if not FACTOR_YEARS[0] <= year <= FACTOR_YEARS[-1]]
+        if outside:
+            raise ValueError(f'Emissions factors cover {FACTOR_YEARS[0]}-{FACTOR_YEARS[-1]}, not {outside}')
+        rows = [FACTOR_FUEL_INDEX[fuel] for fuel in fuels]
+        columns = [year - FACTOR_YEARS[0] for year in key[1]]
+        view = factor_set['factors'][np.ix_(rows, columns)].T.copy()
+        view.flags.writeable = False
+        factor_set['views'][key] = view
+    return view
+
+
+def factor_set_frame(factor_set, years=FACTOR_YEARS):
+    """
+    Formats a factor set like 1-emissions-factors.csv, for merging with BERDO data by 'Data Year'.
+
+    Parameters:
+    factor_set (dict): A factor set from get_factor_set.
+    years (list): The years (as integers) to include.
+
+    Returns:
+    pandas.DataFrame: 'Data Year' and one column per entry of FACTOR_CSV_COLUMNS.
+    """
+    df_factors = pd.DataFrame(select_factors(factor_set, list(FACTOR_CSV_COLUMNS), years),
+                              columns=list(FACTOR_CSV_COLUMNS.values()))
+    df_factors.insert(0, 'Data Year', years)
+    return df_factors
@@ -0,0 +1,118 @@
+import numpy as np
+import plotly.graph_objects as go
+from dash import Patch
+
+from emissions_model import FUEL_NAMES
+
+
+# CEI bar traces in stacking order (bottom to top) with their colors
+CEI_BAR_TRACES = [
+    ('Engine-Driven Chiller', '#00951D'),
+    ('Gas Absorption Chiller', '#0FE312'),
+    ('Elec-Driven Chiller', '#7BF0A4'),
+    ('District Hot Water', '#0105F5'),
+    ('District Steam', '#01A3F5'),
+    ('Diesel', '#931E07'),
+    ('Fuel Oil #4', '#9901F5'),
+    ('Fuel Oil #2', '#E601F5'),
+    ('Fuel Oil #1', '#F501A4'),
+    ('Natural Gas', '#E51212'),
+    ('Electricity', '#E4E948'),
+]
+
+CEI_TITLE = '<b>Building CEI vs. BERDO Threshold (kg CO2e/sf/yr)</b>'
+COST_TITLE = '<b>Building Cost Penalty ($)'
+
+
+def build_cei_figure(threshold_years, cei_years, template='YETI'):
+    """
+    Builds the static skeleton of the CEI vs. BERDO threshold figure.
+
+    The skeleton holds the layout, trace order, colors and hovertemplates. The threshold
+    line is trace 0 and the stacked CEI bars follow in the order of CEI_BAR_TRACES, all
+    with empty y-arrays to be filled in by patch_cei_figure.
+
+    Parameters:
+    threshold_years (list): The x values of the BERDO threshold line.
+    cei_years (list): The x values of the CEI bars.
+    template (str): The plotly template to style the figure with.
+
+    Returns:
+    plotly.graph_objects.Figure: The figure skeleton.
+    """
+    fig = go.Figure()
+    fig.add_scatter(x=list(threshold_years), y=[], mode='lines', name='', showlegend=False,
+                    line=dict(width=3, color='#000000'),
+                    hovertemplate='<b>Year:</b> %{x}<br><b>Threshold CEI:</b> %{y}</b>')
+    for name, color in CEI_BAR_TRACES:
+        fig.add_bar(x=list(cei_years), y=[], name=name, marker={'color': color},
+                    hovertemplate='<b>Year:</b> %{x}<br><b>CEI:</b> %{y}')
+
+    # Stack bar chart emissions values
+    fig.update_layout(template=template,
+                      barmode='stack',
+                      title={'text': CEI_TITLE, 'font': {'size': 12, 'family': 'Helvetica'}},
+                      xaxis_title='Year',
+                      yaxis_title='CEI (kg CO2e/sf/yr)',
+                      yaxis=dict(tickformat='.2f')
+                      )
+    return fig
+
+
+def build_cost_figure(penalty_years, template='YETI'):
+    """
+    Builds the static skeleton of the building cost penalty figure.
+
+    Parameters:
+    penalty_years (list): The x values of the cost penalty bars.
+    template (str): The plotly template to style the figure with.
+
+    Returns:
+    plotly.graph_objects.Figure: The figure skeleton with a single empty bar trace.
+    """
+    fig = go.Figure()
+    fig.add_bar(x=list(penalty_years), y=[], name='', showlegend=False,
+                hovertemplate='<b>Year:</b> %{x}<br><b>Cost Penalty:</b> %{y}')
+
+    fig.update_layout(template=template,
+                      barmode='stack',
+                      title={'text': COST_TITLE, 'font': {'size': 12, 'family': 'Helvetica'}},
+                      xaxis_title='Year',
+                      yaxis_title='Alternative Compliance Payment ($)',
+                      yaxis=dict(tickprefix="$")
+                      )
+    return fig
+
+
+def patch_cei_figure(thresholds, cei):
+    """
+    Creates a partial update that fills the CEI figure skeleton with a building's values.
+
+    Parameters:
+    thresholds (array-like): The BERDO threshold line values.
+    cei (numpy.ndarray): CEI per year and fuel with shape (years, fuels), columns in FUEL_NAMES order.
+
+    Returns:
+    dash.Patch: Patch assigning the y-array of every trace.
+    """
+    cei = np.round(cei, 2)
+    patched_fig = Patch()
+    patched_fig['data'][0]['y'] = np.asarray(thresholds).tolist()
+    for trace_index, (name, _) in enumerate(CEI_BAR_TRACES, start=1):
+        patched_fig['data'][trace_index]['y'] = cei[:, FUEL_NAMES.index(name)].tolist()
+    return patched_fig
+
+
+def patch_cost_figure(penalty):
+    """
+    Creates a partial update that fills the cost penalty figure skeleton.
+
+    Parameters:
+    penalty (array-like): Cost penalty in dollars per year.
+
+    Returns:
+    dash.Patch: Patch assigning the y-array of the bar trace.
+    """
+    patched_fig = Patch()
+    patched_fig['data'][0]['y'] = np.asarray(penalty).tolist()
+    return patched_fig
@@ -0,0 +1,173 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from emissions_model import CO2_COST, ELECTRICITY
+
+
+# Draws and buildings generated from one random stream; usage noise is drawn per tile of
+# MONTE_CARLO_SEED_BLOCK draws x MONTE_CARLO_SEED_BLOCK buildings, so results only depend on the
+# seed, not on the memory budget or the number of workers
+MONTE_CARLO_SEED_BLOCK = 256
+
+# Values of a (draws x buildings x years) batch evaluated at once; small enough to stay in the CPU cache
+MONTE_CARLO_BATCH_SIZE = 2 ** 18
+
+# Inputs sent once to every worker process by _init_worker
+_worker_inputs = {}
+
+
+def _init_worker(inputs):
+    _worker_inputs.update(inputs)
+
+
+def _usage_noise(draw_block, building_block, draws, buildings):
+    # Lognormal usage noise of one tile of draws x buildings, from the tile's own random stream
+    seed_sequence = np.random.SeedSequence(_worker_inputs['seed'], spawn_key=(1, draw_block, building_block))
+    return np.random.default_rng(seed_sequence).lognormal(0, _worker_inputs['usage_sigma'], size=(draws, buildings))
+
+
+def _simulate_buildings(building_blocks):
+    """
+    Simulates every draw for a range of buildings and reduces it to their penalty quantiles.
+
+    Draws are evaluated as (draws, buildings, years) batches of about MONTE_CARLO_BATCH_SIZE
+    values. Each building's usage is scaled by a lognormal noise term with standard
+    deviation `usage_sigma`, shared by all of its fuels and years.
+
+    Parameters:
+    building_blocks (range): The blocks of MONTE_CARLO_SEED_BLOCK buildings to simulate.
+
+    Returns:
+    tuple: (quantiles of the buildings' total penalty of shape (quantiles, buildings),
+            penalty of the buildings together of shape (draws, years))
+    """
+    electricity_paths = _worker_inputs['electricity_paths']
+    draws, year_count = electricity_paths.shape
+    start = building_blocks.start * MONTE_CARLO_SEED_BLOCK
+    stop = min(building_blocks.stop * MONTE_CARLO_SEED_BLOCK, len(_worker_inputs['electricity_usage']))
+    fixed_emissions = _worker_inputs['fixed_emissions'][start:stop]
+    electricity_usage = _worker_inputs['electricity_usage'][start:stop]
+    allowance = _worker_inputs['allowance'][start:stop]
+
+    building_penalty = np.empty((draws, stop - start), dtype=np.float32)
+    portfolio_penalty = np.empty((draws, year_count))
+    batch_draws = max(MONTE_CARLO_BATCH_SIZE // ((stop - start) * year_count), 1)
+    for draw_block, block_start in enumerate(range(0, draws, MONTE_CARLO_SEED_BLOCK)):
+        block_stop = min(block_start + MONTE_CARLO_SEED_BLOCK, draws)
+        usage_noise = np.concatenate([
+            _usage_noise(draw_block, building_block, block_stop - block_start,
+                         min(MONTE_CARLO_SEED_BLOCK, stop - building_block * MONTE_CARLO_SEED_BLOCK))
+            for building_block in building_blocks], axis=1)
+
+        for draw_start in range(block_start, block_stop, batch_draws):
+            draws_batch = slice(draw_start, min(draw_start + batch_draws, block_stop))
+            noise = usage_noise[draw_start - block_start:draws_batch.stop - block_start, :, np.newaxis]
+
+            # (draws, buildings, years): the fixed emissions plus each draw's electricity trajectory, times the noise
+            emissions = electricity_usage[:, np.newaxis] * electricity_paths[draws_batch, np.newaxis, :]
+            emissions /= 1e6
+            emissions += fixed_emissions
+            emissions *= noise
+            emissions -= allowance
+            penalty = np.maximum(np.nan_to_num(emissions, copy=False), 0, out=emissions)
+            penalty *= CO2_COST
+            building_penalty[draws_batch] = penalty.sum(axis=2)
+            portfolio_penalty[draws_batch] = penalty.sum(axis=1)
+
+    return np.quantile(building_penalty, _worker_inputs['quantiles'], axis=0), portfolio_penalty
+
+
+def run_monte_carlo(usage, factor_matrix, allowance, draws=10000, seed=0, grid_sigma=0.03, usage_sigma=0.05,
+                    quantiles=(0.1, 0.5, 0.9), memory_budget_mb=512, workers=None):
+    """
+    Samples grid emissions factor trajectories and usage noise to get penalty ranges.
+
+    The electricity emissions factor follows a multiplicative random walk around its
+    projection, log-step standard deviation `grid_sigma` per year, shared by all buildings.
+    Buildings are split into chunks sized so that the working memory of all workers stays
+    within `memory_budget_mb`, fanned out over a process pool; every worker simulates all
+    draws of its buildings in vectorized batches and returns only their quantiles, so no
+    (draws x buildings) array is ever returned. Non-electricity emissions are computed once.
+
+    Parameters:
+    usage (numpy.ndarray): Reported usage in kBtu of shape (buildings, fuels), from build_usage_matrix.
+    factor_matrix (numpy.ndarray): Projected emissions factors of shape (years, fuels).
+    allowance (numpy.ndarray): Allowed emissions in MT CO2e of shape (buildings, years).
+    draws (int): Number of Monte Carlo draws.
+    seed (int): Seed that makes the draws reproducible.
+    grid_sigma (float): Standard deviation of the yearly log-change of the electricity factor.
+    usage_sigma (float): Standard deviation of the log of each building's usage noise.
+    quantiles (tuple): The quantiles of each building's total 2025-2050 penalty to return.
+    memory_budget_mb (float): Memory budget for the working memory of all workers together.
+    workers (int, optional): Number of worker processes, defaults to the number of CPUs.
+
+    Returns:
+    tuple: (numpy.ndarray of building total 2025-2050 penalty quantiles of shape (quantiles, buildings),
+            numpy.ndarray of portfolio penalties of shape (draws, years))
+    """
+    workers = workers or os.cpu_count()
+    building_count, year_count = allowance.shape
+
+    # Grid factor trajectories of every draw, shared by all buildings
+    grid_steps = np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(0,))).normal(
+        0, grid_sigma, size=(draws, year_count))
+    fixed_factors = factor_matrix.copy()
+    fixed_factors[:, ELECTRICITY] = 0
+    inputs = {
+        'fixed_emissions': usage @ fixed_factors.T / 1e6,
+        'electricity_usage': usage[:, ELECTRICITY].copy(),
+        'electricity_paths': factor_matrix[:, ELECTRICITY] * np.exp(np.cumsum(grid_steps, axis=1)),
+        'allowance': allowance,
+        'seed': seed,
+        'usage_sigma': usage_sigma,
+        'quantiles': quantiles,
+    }
+
+    # Group whole blocks of buildings into chunks that fit each worker's share of the memory budget: per
+    # block the float32 total penalty and float64 usage noise of every draw, besides one batch of draws
+    worker_budget = memory_budget_mb * 2 ** 20 / workers - MONTE_CARLO_BATCH_SIZE * 8 * 2
+    block_bytes = MONTE_CARLO_SEED_BLOCK * (draws * 4 + MONTE_CARLO_SEED_BLOCK * 8)
+    blocks_per_chunk = max(int(worker_budget // block_bytes), 1)
+    block_count = -(-building_count // MONTE_CARLO_SEED_BLOCK)
+    chunks = [range(start, min(start + blocks_per_chunk, block_count))
+              for start in range(0, block_count, blocks_per_chunk)]
+
+    building_quantiles = np.empty((len(quantiles), building_count))
+    portfolio_penalty = np.zeros((draws, year_count))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(inputs,)) as executor:
+        for chunk, (chunk_quantiles, chunk_portfolio) in zip(chunks, executor.map(_simulate_buildings, chunks)):
+            start = chunk.start * MONTE_CARLO_SEED_BLOCK
+            building_quantiles[:, start:start + chunk_quantiles.shape[1]] = chunk_quantiles
+            portfolio_penalty += chunk_portfolio
+
+    return building_quantiles, portfolio_penalty
+
+
+def summarize_penalty_ranges(building_quantiles, portfolio_penalty, berdo_ids, years, quantiles=(0.1, 0.5, 0.9)):
+    """
+    Tabulates the Monte Carlo penalty percentiles per building and for the portfolio.
+
+    Parameters:
+    building_quantiles (numpy.ndarray): Building total quantiles from run_monte_carlo, shape (quantiles, buildings).
+    portfolio_penalty (numpy.ndarray): Portfolio penalties from run_monte_carlo, shape (draws, years).
+    berdo_ids (array-like): The BERDO ID of each building.
+    years (list): The projected years.
+    quantiles (tuple): The quantiles run_monte_carlo was called with.
+
+    Returns:
+    tuple: (pandas.DataFrame of each building's total penalty percentiles,
+            pandas.DataFrame of the portfolio penalty percentiles per year and for all years)
+    """
+    labels = [f'penalty_p{quantile * 100:.0f}' for quantile in quantiles]
+
+    df_buildings = pd.DataFrame(building_quantiles.T, columns=labels)
+    df_buildings.insert(0, 'BERDO ID', np.asarray(berdo_ids))
+
+    portfolio = np.column_stack([portfolio_penalty, portfolio_penalty.sum(axis=1)])
+    df_portfolio = pd.DataFrame(np.quantile(portfolio, quantiles, axis=0).T, columns=labels)
+    df_portfolio.insert(0, 'year', [str(year) for year in years] + ['all'])
+
+    return df_buildings, df_portfolio
@@ -0,0 +1,138 @@
+import os
+
+import pandas as pd
+
+
+# Engines the year-expanded SQL tables of script 3 can be built with
+PIPELINE_BACKENDS = ['pandas', 'duckdb']
+
+# Memory the DuckDB backend may use before spilling to its temp directory
+DUCKDB_MEMORY_LIMIT = '1GB'
+
+
+def get_pipeline_backend():
+    """
+    Reads the pipeline backend from the BERDO_PIPELINE_BACKEND environment variable.
+
+    The backend only applies to the year-expanded tables of script 3; scripts 1 and 2 always
+    run on pandas.
+
+    Returns:
+    str: One of PIPELINE_BACKENDS, 'pandas' when the variable is not set.
+    """
+    backend = os.environ.get('BERDO_PIPELINE_BACKEND', 'pandas')
+    if backend not in PIPELINE_BACKENDS:
+        raise ValueError(f"Unknown pipeline backend '{backend}', expected one of {PIPELINE_BACKENDS}")
+    return backend
+
+
+def connect_duckdb(memory_limit=DUCKDB_MEMORY_LIMIT, temp_directory=None):
+    """
+    Opens an in-process DuckDB connection that works in bounded memory.
+
+    Parameters:
+    memory_limit (str): Memory limit, e.g. '1GB'; larger intermediate results spill to disk.
+    temp_directory (str, optional): Directory for spilled data, defaults to DuckDB's own.
+
+    Returns:
+    duckdb.DuckDBPyConnection: The connection.
+    """
+    import duckdb
+
+    con = duckdb.connect()
+    con.execute(f"SET memory_limit = '{memory_limit}'")
+    con.execute('SET preserve_insertion_order = false')
+    if temp_directory is not None:
+        con.execute(f"SET temp_directory = '{temp_directory}'")
+    return con
+
+
+def _source_sql(con, source, name):
+    # DataFrames are scanned in place; files are scanned lazily so only the referenced columns are read
+    if isinstance(source, pd.DataFrame):
+        con.register(name, source)
+        return name
+    if source.endswith('.parquet'):
+        return f"read_parquet('{source}')"
+    return f"read_csv_auto('{source}', header = true)"
+
+
+def write_usage_tables_duckdb(con, source, df_factors, energy_usage_path, calculated_emissions_path,
+                              start_year=2025, end_year=2050):
+    """
+    Builds the energy usage and calculated emissions SQL tables of script 3 with DuckDB, streaming them to CSV.
+
+    Equivalent to transform_energy_usage followed by the merge with the emissions factors in
+    script 3: rows come out in the same order with the same building, usage and factor ids.
+    The year range and the energy types are pushed down into the unpivoted usage before it is
+    expanded over the years, and the expansion is never materialized in Python.
+
+    Parameters:
+    con (duckdb.DuckDBPyConnection): A connection from connect_duckdb.
+    source (pandas.DataFrame or str): Energy usage with a 'reporting_id' column and one usage
+                                      column per energy type, or a Parquet/CSV file with them.
+    df_factors (pandas.DataFrame): Emissions factors with 'year', 'energy_type' and
+                                   'emissions_kgco2e_per_unit', in factor_id order.
+    energy_usage_path (str): Output CSV of the energy usage table.
+    calculated_emissions_path (str): Output CSV of the calculated emissions table.
+    start_year (int): The first projected year.
+    end_year (int): The last projected year.
+
+    Returns:
+    tuple: (number of energy usage rows, number of calculated emissions rows)
+    """
+    source_sql = _source_sql(con, source, 'energy_usage_source')
+    energy_types = [column for column in con.execute(f'SELECT * FROM {source_sql} LIMIT 0').fetchdf().columns
+                    if column != 'reporting_id']
+    year_count = end_year - start_year + 1
+
+    con.register('emissions_factors_source', df_factors[['year', 'energy_type', 'emissions_kgco2e_per_unit']]
+                 .assign(factor_id=range(1, len(df_factors) + 1)))
+
+    # Building ids follow the sorted reporting ids, like transform_energy_usage
+    con.execute(f"""
+        CREATE OR REPLACE TEMP TABLE buildings AS
+        SELECT reporting_id, {', '.join(f'"{column}"' for column in energy_types)},
+               row_number() OVER (ORDER BY reporting_id) AS building_id
+        FROM {source_sql}
+    """)
+    building_count, distinct_count = con.execute(
+        'SELECT count(*), count(DISTINCT reporting_id) FROM buildings').fetchone()
+    if building_count != distinct_count:
+        raise ValueError('Energy usage has duplicate reporting ids')
+
+    # Unpivoted usage (one row per building and energy type), truncated to integers like the pandas path
+    unpivoted = ' UNION ALL '.join(
+        f"""SELECT building_id, {position} AS type_position, '{column}' AS energy_type,
+                   CAST(trunc("{column}") AS BIGINT) AS usage FROM buildings"""
+        for position, column in enumerate(energy_types))
+    con.execute(f'CREATE OR REPLACE TEMP TABLE usage_long AS {unpivoted}')
+
+    # Row position of each (energy type, building, year) in the expanded table, which is its usage_id
+    usage_id = f'(type_position * {building_count} + building_id - 1) * {year_count} + (year - {start_year}) + 1'
+
+    con.execute(f"""
+        COPY (
+            SELECT building_id, year, energy_type, usage
+            FROM usage_long, range({start_year}, {end_year + 1}) AS years(year)
+            ORDER BY {usage_id}
+        ) TO '{energy_usage_path}' (HEADER, DELIMITER ',')
+    """)
+    con.execute(f"""
+        COPY (
+            SELECT {usage_id} AS usage_id, factor_id,
+                   (usage / 1000) * (emissions_kgco2e_per_unit / 1000) AS emissions_mt_co2e
+            FROM usage_long
+            JOIN (SELECT * FROM emissions_factors_source WHERE year BETWEEN {start_year} AND {end_year}) factors
+            USING (energy_type)
+            ORDER BY usage_id
+        ) TO '{calculated_emissions_path}' (HEADER, DELIMITER ',')
+    """)
+
+    energy_usage_rows = building_count * len(energy_types) * year_count
+    calculated_emissions_rows = con.execute(f"""
+        SELECT count(*) FROM usage_long
+        JOIN (SELECT * FROM emissions_factors_source WHERE year BETWEEN {start_year} AND {end_year}) factors
+        USING (energy_type)
+    """).fetchone()[0]
+    return energy_usage_rows, calculated_emissions_rows
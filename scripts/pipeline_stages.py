@@ -0,0 +1,206 @@
+import cProfile
+import json
+import os
+import pstats
+import re
+import time
+import tracemalloc
+
+import pandas as pd
+
+from dtype_policy import peak_rss_mb
+
+
+# Finished stages of the current process, in the order they ran
+_stage_records = []
+
+# The stage that is currently running
+_open_stage = {}
+
+# Columns of the human-readable stage report
+REPORT_COLUMNS = ['stage', 'wall_s', 'cpu_s', 'rows_in', 'rows_out', 'peak_rss_mb', 'rss_growth_mb', 'rss_delta_mb',
+                  'traced_peak_mb']
+
+# Functions listed when a profiled stage ends
+PROFILE_TOP_FUNCTIONS = 20
+
+
+def current_rss_mb():
+    """
+    Reads the current resident set size of the process.
+
+    Returns:
+    float: The RSS in MB, or None where /proc is not available.
+    """
+    try:
+        with open('/proc/self/statm') as statm:
+            resident_pages = int(statm.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+    return resident_pages * os.sysconf('SC_PAGE_SIZE') / 1024 ** 2
+
+
+def _profile_path(name):
+    # BERDO_PROFILE_OUTPUT, or a file named after the stage in the working directory
+    slug = re.sub(r'[^a-z0-9]+', '-', name.lower()).strip('-')
+    return os.environ.get('BERDO_PROFILE_OUTPUT') or f'profile-{slug}.prof'
+
+
+def start_stage(name, rows_in=None):
+    """
+    Starts timing a logical stage of a pipeline script, ending the stage that is still open.
+
+    Memory allocated by Python is traced per stage when BERDO_TRACEMALLOC is set, and the stage
+    named by BERDO_PROFILE_STAGE is run under cProfile.
+
+    Parameters:
+    name (str): The stage name, unique across scripts 1-3.
+    rows_in (int, optional): Rows the stage starts from.
+    """
+    end_stage()
+    if os.environ.get('BERDO_TRACEMALLOC') and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    if tracemalloc.is_tracing():
+        tracemalloc.reset_peak()
+
+    profiler = None
+    if os.environ.get('BERDO_PROFILE_STAGE') == name:
+        profiler = cProfile.Profile()
+
+    _open_stage.update(name=name, rows_in=rows_in, start=time.perf_counter(), start_cpu=time.process_time(),
+                       start_peak_rss_mb=peak_rss_mb(), start_rss_mb=current_rss_mb(),
+                       start_traced_mb=tracemalloc.get_traced_memory()[0] / 1024 ** 2
+                       if tracemalloc.is_tracing() else None,
+                       profiler=profiler)
+    if profiler is not None:
+        profiler.enable()
+
+
+def end_stage(rows_out=None):
+    """
+    Ends the open stage, if any, and records its times, rows and memory.
+
+    Parameters:
+    rows_out (int, optional): Rows the stage produced.
+    """
+    if not _open_stage:
+        return
+    profiler = _open_stage['profiler']
+    if profiler is not None:
+        profiler.disable()
+
+    wall = time.perf_counter() - _open_stage['start']
+    cpu = time.process_time() - _open_stage['start_cpu']
+    peak, rss = peak_rss_mb(), current_rss_mb()
+    traced_delta = traced_peak = None
+    if tracemalloc.is_tracing() and _open_stage['start_traced_mb'] is not None:
+        traced, traced_peak_bytes = tracemalloc.get_traced_memory()
+        traced_delta = traced / 1024 ** 2 - _open_stage['start_traced_mb']
+        traced_peak = traced_peak_bytes / 1024 ** 2
+
+    _stage_records.append({
+        'stage': _open_stage['name'],
+        'wall_s': wall,
+        'cpu_s': cpu,
+        'rows_in': _open_stage['rows_in'],
+        'rows_out': rows_out,
+        'peak_rss_mb': peak,
+        'rss_growth_mb': None if peak is None else peak - _open_stage['start_peak_rss_mb'],
+        'rss_delta_mb': None if rss is None or _open_stage['start_rss_mb'] is None
+        else rss - _open_stage['start_rss_mb'],
+        'traced_delta_mb': traced_delta,
+        'traced_peak_mb': traced_peak,
+    })
+
+    # Dump the profile of the stage and list its most expensive functions
+    if profiler is not None:
+        profile_path = _profile_path(_open_stage['name'])
+        profiler.dump_stats(profile_path)
+        print(f"Profile of stage '{_open_stage['name']}' written to {profile_path}")
+        pstats.Stats(profiler).sort_stats('cumulative').print_stats(PROFILE_TOP_FUNCTIONS)
+    _open_stage.clear()
+
+
+def stage_records():
+    """
+    Lists the stages recorded in this process.
+
+    Returns:
+    list: One dict per finished stage with 'stage', 'wall_s', 'cpu_s', 'rows_in', 'rows_out',
+          'peak_rss_mb' (the process peak RSS when the stage ended), 'rss_growth_mb' (how much
+          the stage raised that peak), 'rss_delta_mb' (change of the current RSS) and, when
+          tracemalloc is tracing, 'traced_delta_mb' and 'traced_peak_mb'.
+    """
+    return [dict(record) for record in _stage_records]
+
+
+def reset_stage_records():
+    """
+    Forgets all recorded stages and any open stage.
+    """
+    _stage_records.clear()
+    _open_stage.clear()
+
+
+def format_stage_report(records):
+    """
+    Formats stage records as a table.
+
+    Parameters:
+    records (list): Stage records from stage_records.
+
+    Returns:
+    str: The table.
+    """
+    df_report = pd.DataFrame(records).reindex(columns=REPORT_COLUMNS)
+    for column in REPORT_COLUMNS[1:]:
+        df_report[column] = pd.to_numeric(df_report[column]).round(3)
+    for column in ['rows_in', 'rows_out']:
+        df_report[column] = df_report[column].astype('Int64').astype(str).replace('<NA>', '-')
+    return df_report.to_string(index=False, na_rep='-')
+
+
+def write_stage_report(path, records):
+    """
+    Adds stage records to a JSON run report.
+
+    Each pipeline script runs in its own process, so stages already in the report are kept and
+    stages of the same name are replaced; running scripts 1-3 in turn builds the report of the
+    whole run.
+
+    Parameters:
+    path (str): The JSON report.
+    records (list): Stage records from stage_records.
+
+    Returns:
+    dict: The report with 'updated' and the 'stages' in the order they first ran.
+    """
+    stages = []
+    if os.path.exists(path):
+        with open(path) as report_file:
+            stages = json.load(report_file)['stages']
+    positions = {stage['stage']: position for position, stage in enumerate(stages)}
+    for record in records:
+        if record['stage'] in positions:
+            stages[positions[record['stage']]] = record
+        else:
+            stages.append(record)
+
+    report = {'updated': time.strftime('%Y-%m-%dT%H:%M:%S'), 'stages': stages}
+    with open(path, 'w') as report_file:
+        json.dump(report, report_file, indent=2)
+    return report
+
+
+def report_stages():
+    """
+    Writes the stages of this process to the JSON report named by BERDO_STAGE_REPORT, if set, and
+    prints them as a table.
+    """
+    report_path = os.environ.get('BERDO_STAGE_REPORT')
+    if not report_path:
+        return
+    records = stage_records()
+    write_stage_report(report_path, records)
+    print(format_stage_report(records))
+    print(f'Stage report written to {report_path}')
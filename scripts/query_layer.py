@@ -0,0 +1,186 @@
+import os
+
+import duckdb
+
+from emissions_model import CO2_COST
+
+
+# DuckDB database built from the SQL tables of script 3
+QUERY_DATABASE_PATH = '../data-files/2-sql-tables/berdo.duckdb'
+
+# Buildings over their threshold in a year, largest excess first
+OVER_THRESHOLD_SQL = """
+    SELECT b.reporting_id, b.address, b.zip_code, b.owner_name, e.emissions_mt_co2e, e.allowance_mt_co2e,
+           e.emissions_mt_co2e - e.allowance_mt_co2e AS excess_mt_co2e, e.penalty
+    FROM building_emissions e
+    JOIN buildings b USING (building_id)
+    WHERE e.year = $year AND e.penalty > 0
+    ORDER BY excess_mt_co2e DESC
+"""
+
+# The largest emitters of each zip code in a year
+TOP_EMITTERS_BY_ZIP_SQL = """
+    SELECT zip_code, rank, reporting_id, address, owner_name, emissions_mt_co2e
+    FROM (
+        SELECT b.zip_code, b.reporting_id, b.address, b.owner_name, e.emissions_mt_co2e,
+               row_number() OVER (PARTITION BY b.zip_code ORDER BY e.emissions_mt_co2e DESC, b.reporting_id) AS rank
+        FROM building_emissions e
+        JOIN buildings b USING (building_id)
+        WHERE e.year = $year
+    )
+    WHERE rank <= $limit
+    ORDER BY zip_code, rank
+"""
+
+# Alternative compliance payments per owner in a year, or over all years when the year is NULL
+PENALTY_BY_OWNER_SQL = """
+    SELECT b.owner_name, count(DISTINCT b.building_id) AS buildings, sum(e.emissions_mt_co2e) AS emissions_mt_co2e,
+           sum(e.penalty) AS penalty
+    FROM building_emissions e
+    JOIN buildings b USING (building_id)
+    WHERE $year IS NULL OR e.year = $year
+    GROUP BY b.owner_name
+    ORDER BY penalty DESC, b.owner_name
+"""
+
+
+def build_query_database(tables_directory='../data-files/2-sql-tables', database_path=QUERY_DATABASE_PATH):
+    """
+    Loads the SQL tables of script 3 into an indexed DuckDB database.
+
+    Building ids are the row numbers of the buildings table and usage ids the row numbers of
+    the energy usage table, as assigned by script 3. The threshold table holds each building's
+    threshold CEI (kg CO2e/sf), so allowances are the threshold times the GFA / 1000. A
+    building_emissions table with the emissions, allowance and penalty of every building and
+    year is precomputed for the queries.
+
+    Parameters:
+    tables_directory (str): Directory with the CSV files written by script 3.
+    database_path (str): The database file to (re)create.
+
+    Returns:
+    str: The database path.
+    """
+    if os.path.exists(database_path):
+        os.remove(database_path)
+
+    def table_path(file_name):
+        return os.path.join(tables_directory, file_name)
+
+    con = duckdb.connect(database_path)
+    try:
+        con.execute(f"""
+            CREATE TABLE buildings AS
+            SELECT row_number() OVER () AS building_id, *
+            FROM read_csv_auto('{table_path('1-buildings-table.csv')}', header = true)
+        """)
+        con.execute(f"""
+            CREATE TABLE energy_usage AS
+            SELECT row_number() OVER () AS usage_id, *
+            FROM read_csv_auto('{table_path('2-energy-usage-table.csv')}', header = true)
+        """)
+        con.execute(f"""
+            CREATE TABLE emissions_factors AS
+            SELECT row_number() OVER () AS factor_id, *
+            FROM read_csv_auto('{table_path('3-emissions-factors-table.csv')}', header = true)
+        """)
+        con.execute(f"""
+            CREATE TABLE emissions_thresholds AS
+            SELECT * FROM read_csv_auto('{table_path('4-emissions-thresholds-table.csv')}', header = true)
+        """)
+        con.execute(f"""
+            CREATE TABLE calculated_emissions AS
+            SELECT * FROM read_csv_auto('{table_path('5-calculated-emissions-table.csv')}', header = true)
+        """)
+
+        con.execute(f"""
+            CREATE TABLE building_emissions AS
+            SELECT u.building_id, u.year, sum(c.emissions_mt_co2e) AS emissions_mt_co2e,
+                   any_value(t.threshold_mt_co2e * b.property_gfa / 1000) AS allowance_mt_co2e,
+                   greatest(sum(c.emissions_mt_co2e) - any_value(t.threshold_mt_co2e * b.property_gfa / 1000), 0)
+                       * {CO2_COST} AS penalty
+            FROM calculated_emissions c
+            JOIN energy_usage u USING (usage_id)
+            JOIN buildings b USING (building_id)
+            JOIN emissions_thresholds t ON t.building_id = u.building_id AND t.year = u.year
+            GROUP BY u.building_id, u.year
+        """)
+
+        con.execute('CREATE UNIQUE INDEX buildings_building_id ON buildings (building_id)')
+        con.execute('CREATE UNIQUE INDEX energy_usage_usage_id ON energy_usage (usage_id)')
+        con.execute('CREATE INDEX energy_usage_building_year ON energy_usage (building_id, year)')
+        con.execute('CREATE INDEX emissions_factors_year_type ON emissions_factors (year, energy_type)')
+        con.execute('CREATE INDEX emissions_thresholds_building_year ON emissions_thresholds (building_id, year)')
+        con.execute('CREATE UNIQUE INDEX building_emissions_building_year ON building_emissions (building_id, year)')
+        con.execute('CREATE INDEX building_emissions_year ON building_emissions (year)')
+    finally:
+        con.close()
+    return database_path
+
+
+def connect_query_database(database_path=QUERY_DATABASE_PATH):
+    """
+    Opens the query database read-only.
+
+    Parameters:
+    database_path (str): A database from build_query_database.
+
+    Returns:
+    duckdb.DuckDBPyConnection: The connection.
+    """
+    return duckdb.connect(database_path, read_only=True)
+
+
+def _fetch(con, sql, parameters, output):
+    result = con.execute(sql, parameters)
+    if output == 'arrow':
+        return result.fetch_arrow_table()
+    if output == 'numpy':
+        return result.fetchnumpy()
+    raise ValueError(f"Unknown output '{output}', expected 'arrow' or 'numpy'")
+
+
+def buildings_over_threshold(con, year, output='arrow'):
+    """
+    Lists the buildings whose emissions exceed their allowance in a year.
+
+    Parameters:
+    con (duckdb.DuckDBPyConnection): A connection from connect_query_database.
+    year (int): The compliance year.
+    output (str): 'arrow' for a pyarrow.Table or 'numpy' for a dict of numpy arrays.
+
+    Returns:
+    pyarrow.Table or dict: One row per building, largest excess first.
+    """
+    return _fetch(con, OVER_THRESHOLD_SQL, {'year': year}, output)
+
+
+def top_emitters_by_zip(con, year, limit=10, output='arrow'):
+    """
+    Lists the largest emitters of every zip code in a year.
+
+    Parameters:
+    con (duckdb.DuckDBPyConnection): A connection from connect_query_database.
+    year (int): The compliance year.
+    limit (int): Number of buildings per zip code.
+    output (str): 'arrow' for a pyarrow.Table or 'numpy' for a dict of numpy arrays.
+
+    Returns:
+    pyarrow.Table or dict: Up to `limit` rows per zip code, ranked by emissions.
+    """
+    return _fetch(con, TOP_EMITTERS_BY_ZIP_SQL, {'year': year, 'limit': limit}, output)
+
+
+def penalty_by_owner(con, year=None, output='arrow'):
+    """
+    Totals the alternative compliance payments of each property owner.
+
+    Parameters:
+    con (duckdb.DuckDBPyConnection): A connection from connect_query_database.
+    year (int, optional): The compliance year, defaults to all of 2025-2050.
+    output (str): 'arrow' for a pyarrow.Table or 'numpy' for a dict of numpy arrays.
+
+    Returns:
+    pyarrow.Table or dict: One row per owner, largest penalty first.
+    """
+    return _fetch(con, PENALTY_BY_OWNER_SQL, {'year': year}, output)
@@ -0,0 +1,124 @@
+import codecs
+import re
+import types
+import unicodedata
+
+import pandas as pd
+
+
+# Name of the codec the raw BERDO files are read with
+RAW_CODEC = 'berdo-raw'
+
+# Text encodings the raw files have been published in: UTF-8, with stray ISO-8859-1 bytes
+FALLBACK_ENCODING = 'ISO-8859-1'
+
+# UTF-8 text that was decoded as ISO-8859-1 and encoded as UTF-8 again: every byte of the original
+# character became a two-byte sequence starting with 0xC2 or 0xC3
+MOJIBAKE_PATTERN = re.compile(rb'\xc3[\x82-\xb4](?:\xc2[\x80-\xbf]){1,3}')
+
+# Bytes held back at most at the end of a chunk, the length of the longest mojibake sequence
+MAX_PENDING_BYTES = 8
+
+
+def _decode_fallback(error):
+    # Decodes bytes that are not valid UTF-8 as ISO-8859-1
+    return error.object[error.start:error.end].decode(FALLBACK_ENCODING), error.end
+
+
+def _repair_mojibake(match):
+    sequence = match.group()
+    try:
+        return sequence.decode('utf-8').encode(FALLBACK_ENCODING).decode('utf-8').encode('utf-8')
+    except UnicodeError:
+        return sequence
+
+
+def repair_raw_bytes(data):
+    """
+    Repairs a block of raw BERDO bytes and decodes it.
+
+    Double-encoded UTF-8 (e.g. 'ftÂ²' for 'ft²') is restored on the bytes, the
+    rest is decoded as UTF-8 and bytes that are not valid UTF-8 are decoded as ISO-8859-1.
+
+    Parameters:
+    data (bytes): Raw bytes that do not end inside a character.
+
+    Returns:
+    str: The decoded text.
+    """
+    return MOJIBAKE_PATTERN.sub(_repair_mojibake, data).decode('utf-8', errors=RAW_CODEC)
+
+
+def _split_pending(data):
+    # Holds back the trailing run of non-ASCII bytes, which the next chunk may complete or extend
+    # into a mojibake sequence; a longer run is only cut at its last lead byte
+    start = len(data)
+    while start > 0 and data[start - 1] >= 0x80:
+        start -= 1
+    if len(data) - start > MAX_PENDING_BYTES:
+        leads = [position for position in range(len(data) - MAX_PENDING_BYTES, len(data)) if data[position] >= 0xc0]
+        start = leads[-1] if leads else len(data)
+    return data[:start], data[start:]
+
+
+def _make_incremental_decoder(errors='strict'):
+    # Incremental decoder of the raw codec, repairing one chunk of the byte stream at a time
+    state = {'pending': b''}
+
+    def decode(data, final=False):
+        data = state['pending'] + bytes(data)
+        data, state['pending'] = (data, b'') if final else _split_pending(data)
+        return repair_raw_bytes(data)
+
+    def reset():
+        state['pending'] = b''
+
+    return types.SimpleNamespace(decode=decode, reset=reset, getstate=lambda: (state['pending'], 0),
+                                 setstate=lambda new_state: state.update(pending=new_state[0]))
+
+
+def _find_codec(name):
+    if name != RAW_CODEC.replace('-', '_') and name != RAW_CODEC:
+        return None
+    return codecs.CodecInfo(
+        name=RAW_CODEC,
+        encode=codecs.getencoder('utf-8'),
+        decode=lambda data, errors='strict': (repair_raw_bytes(bytes(data)), len(data)),
+        incrementaldecoder=_make_incremental_decoder,
+        incrementalencoder=codecs.getincrementalencoder('utf-8'),
+    )
+
+
+codecs.register_error(RAW_CODEC, _decode_fallback)
+codecs.register(_find_codec)
+
+
+def normalize_header(name):
+    """
+    Normalizes a raw column header so columns can be found by name.
+
+    Line breaks inside quoted multi-line headers are removed, runs of whitespace collapse to
+    one space and compatibility characters are folded ('ft²' becomes 'ft2').
+
+    Parameters:
+    name (str): The header as read.
+
+    Returns:
+    str: The normalized header.
+    """
+    return ' '.join(unicodedata.normalize('NFKC', name).replace('\r', '').replace('\n', '').split())
+
+
+def read_raw_berdo_file(file_path):
+    """
+    Reads a raw BERDO file in one pass, repairing its encoding while the bytes are read.
+
+    Parameters:
+    file_path (str): A raw BERDO file, e.g. 0-berdo-raw-data-2023.csv.
+
+    Returns:
+    pandas.DataFrame: The raw data with normalized headers.
+    """
+    df = pd.read_csv(file_path, encoding=RAW_CODEC, skipinitialspace=True)
+    df.columns = [normalize_header(column) for column in df.columns]
+    return df
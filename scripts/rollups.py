@@ -0,0 +1,175 @@
+import numpy as np
+import pandas as pd
+
+from emissions_model import CO2_COST
+
+
+# Cube dimensions and the column of the preprocessed BERDO data each one groups by
+ROLLUP_DIMENSIONS = {
+    'owner': 'Property Owner Name',
+    'zip_code': 'Building Address Zip Code',
+    'property_type': 'BERDO Property Type',
+}
+
+# Measures of every cube cell
+ROLLUP_METRICS = ['buildings', 'buildings_over_threshold', 'gfa', 'emissions_mt_co2e', 'allowance_mt_co2e', 'penalty']
+ROLLUP_COUNT_METRICS = ['buildings', 'buildings_over_threshold']
+
+
+def _dimension_members(df, column):
+    members = df[column]
+    if column == 'Building Address Zip Code':
+        members = members.fillna(0).astype(int).astype(str).str.zfill(5)
+    return members.fillna('Unknown').astype(str).to_numpy()
+
+
+def build_rollup_cube(df, usage, factor_matrix, allowance, years):
+    """
+    Precomputes (dimension member x year) totals for every dimension in ROLLUP_DIMENSIONS.
+
+    Building-level emissions, allowances and penalties are computed once. Every building is
+    then assigned to one group per dimension, and all groups of all dimensions are reduced
+    together in one sorted pass. Buildings whose property type has no thresholds count with
+    no allowance and no penalty.
+
+    Parameters:
+    df (pandas.DataFrame): The preprocessed data from 1-berdo-emissions-data.csv.
+    usage (numpy.ndarray): Reported usage in kBtu of shape (buildings, fuels), from build_usage_matrix.
+    factor_matrix (numpy.ndarray): Emissions factors of shape (years, fuels).
+    allowance (numpy.ndarray): Allowed emissions in MT CO2e of shape (buildings, years), from build_threshold_matrix.
+    years (list): The projected years (as integers).
+
+    Returns:
+    pandas.DataFrame: The cube in long format, one row per dimension, member and year with the
+                      ROLLUP_METRICS.
+    """
+    building_count, year_count = allowance.shape
+    emissions = usage @ factor_matrix.T / 1e6
+    excess = np.maximum(np.nan_to_num(emissions - allowance), 0)
+    gfa = df['Reported Gross Floor Area (Sq Ft)'].fillna(0).to_numpy(dtype=float)
+
+    # Every metric of every building and year, shape (buildings, metrics, years)
+    values = np.stack([
+        np.ones((building_count, year_count)),
+        (excess > 0).astype(float),
+        np.repeat(gfa[:, np.newaxis], year_count, axis=1),
+        emissions,
+        np.nan_to_num(allowance),
+        excess * CO2_COST,
+    ], axis=1)
+
+    # One group id per (dimension, member); each building belongs to one group per dimension
+    group_dimensions, group_members, group_ids = [], [], []
+    for dimension, column in ROLLUP_DIMENSIONS.items():
+        codes, members = pd.factorize(_dimension_members(df, column), sort=True)
+        group_ids.append(codes + len(group_members))
+        group_dimensions += [dimension] * len(members)
+        group_members += list(members)
+    group_ids = np.concatenate(group_ids)
+
+    # Sort the building rows by group and sum each run of equal group ids
+    order = np.argsort(group_ids, kind='stable')
+    starts = np.flatnonzero(np.r_[True, np.diff(group_ids[order]) != 0])
+    totals = np.add.reduceat(values[order % building_count], starts, axis=0)
+
+    df_cube = pd.DataFrame({
+        'dimension': np.repeat(group_dimensions, year_count),
+        'member': np.repeat(group_members, year_count),
+        'year': np.tile(years, len(group_members)),
+    })
+    for index, metric in enumerate(ROLLUP_METRICS):
+        df_cube[metric] = totals[:, index, :].ravel()
+    df_cube[ROLLUP_COUNT_METRICS] = df_cube[ROLLUP_COUNT_METRICS].astype(int)
+    return df_cube
+
+
+def index_rollup_cube(df_cube):
+    """
+    Indexes a rollup cube for drill-down queries.
+
+    Parameters:
+    df_cube (pandas.DataFrame): A cube from build_rollup_cube, e.g. read back from its CSV.
+
+    Returns:
+    dict: The years, a year -> column index, and per dimension its members, a member -> row
+          index and a (members x years x metrics) array.
+    """
+    years = sorted(df_cube['year'].unique())
+    cube = {'years': years, 'year_index': {year: column for column, year in enumerate(years)}, 'dimensions': {}}
+    for dimension, df_dimension in df_cube.groupby('dimension', sort=False):
+        df_dimension = df_dimension.sort_values(['member', 'year'])
+        members = df_dimension['member'].astype(str).unique()
+        cube['dimensions'][dimension] = {
+            'members': members,
+            'member_index': {member: row for row, member in enumerate(members)},
+            'values': df_dimension[ROLLUP_METRICS].to_numpy(dtype=float).reshape(len(members), len(years),
+                                                                                 len(ROLLUP_METRICS)),
+        }
+    return cube
+
+
+def load_rollup_cube(path):
+    """
+    Reads a persisted rollup cube and indexes it.
+
+    Parameters:
+    path (str): The CSV written from build_rollup_cube.
+
+    Returns:
+    dict: The indexed cube from index_rollup_cube.
+    """
+    return index_rollup_cube(pd.read_csv(path, dtype={'member': str}))
+
+
+def query_rollup(cube, dimension, members=None, years=None, metrics=None):
+    """
+    Reads totals for some members and years of a dimension straight from the cube.
+
+    Parameters:
+    cube (dict): A cube from load_rollup_cube or index_rollup_cube.
+    dimension (str): One of ROLLUP_DIMENSIONS.
+    members (list, optional): Members to return, defaults to all of them.
+    years (list, optional): Years to return, defaults to all of them.
+    metrics (list, optional): Metrics to return, defaults to ROLLUP_METRICS.
+
+    Returns:
+    pandas.DataFrame: One row per member and year.
+    """
+    if dimension not in cube['dimensions']:
+        raise KeyError(f"Unknown rollup dimension '{dimension}'")
+    dimension_cube = cube['dimensions'][dimension]
+    members = dimension_cube['members'] if members is None else [str(member) for member in members]
+    years = cube['years'] if years is None else years
+    metrics = ROLLUP_METRICS if metrics is None else metrics
+
+    rows = [dimension_cube['member_index'][member] for member in members]
+    columns = [cube['year_index'][year] for year in years]
+    values = dimension_cube['values'][np.ix_(rows, columns, [ROLLUP_METRICS.index(metric) for metric in metrics])]
+
+    df_result = pd.DataFrame(values.reshape(-1, len(metrics)), columns=metrics)
+    for metric in ROLLUP_COUNT_METRICS:
+        if metric in metrics:
+            df_result[metric] = df_result[metric].astype(int)
+    df_result.insert(0, 'year', np.tile(years, len(members)))
+    df_result.insert(0, dimension, np.repeat(members, len(years)))
+    return df_result
+
+
+def top_rollup_members(cube, dimension, year, metric='penalty', limit=10):
+    """
+    Ranks the members of a dimension by one metric in a year.
+
+    Parameters:
+    cube (dict): A cube from load_rollup_cube or index_rollup_cube.
+    dimension (str): One of ROLLUP_DIMENSIONS.
+    year (int): The year to rank.
+    metric (str): The metric to rank by.
+    limit (int): Number of members to return.
+
+    Returns:
+    pandas.DataFrame: The top members with all metrics for that year.
+    """
+    dimension_cube = cube['dimensions'][dimension]
+    ranking = dimension_cube['values'][:, cube['year_index'][year], ROLLUP_METRICS.index(metric)]
+    top = np.argsort(-ranking, kind='stable')[:limit]
+    return query_rollup(cube, dimension, members=dimension_cube['members'][top], years=[year])
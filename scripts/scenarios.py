@@ -0,0 +1,201 @@
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from emissions_model import CO2_COST, ELECTRICITY, NATURAL_GAS
+
+
+# Number of scenarios each worker task evaluates
+SCENARIO_BATCH_SIZE = 64
+
+# Arrays shared with the worker processes, attached once per process by _attach_shared_arrays
+_shared_arrays = {}
+
+
+def make_scenario(name, fuel_switches=(), efficiency_rate=0.0, efficiency_start=2025):
+    """
+    Describes a retrofit scenario applied to every building.
+
+    A fuel switch is a tuple (from_fuel, to_fuel, share, year, ramp_years, efficiency_ratio):
+    `share` of the building's `from_fuel` load moves to `to_fuel` by `year`, ramping up linearly
+    over the `ramp_years` before it, and each kBtu of the old fuel becomes `1 / efficiency_ratio`
+    kBtu of the new one (e.g. the COP of a heat pump replacing a gas boiler). Fuels are
+    positions in PIPELINE_FUEL_COLUMNS.
+
+    The efficiency trajectory reduces all usage by `efficiency_rate` per year from `efficiency_start`.
+
+    Parameters:
+    name (str): The scenario name.
+    fuel_switches (iterable): Fuel switch tuples as described above.
+    efficiency_rate (float): Yearly fractional reduction of all usage.
+    efficiency_start (int): First year the efficiency reduction applies to.
+
+    Returns:
+    dict: The scenario.
+    """
+    return {'name': name, 'fuel_switches': list(fuel_switches), 'efficiency_rate': efficiency_rate,
+            'efficiency_start': efficiency_start}
+
+
+def electrification_scenario_grid(shares, years, efficiency_rates, heat_pump_cop=3.0, ramp_years=0):
+    """
+    Creates every combination of gas electrification share, electrification year and efficiency rate.
+
+    Parameters:
+    shares (iterable): Fractions of natural gas load that electrify.
+    years (iterable): Years by which the electrification is complete.
+    efficiency_rates (iterable): Yearly fractional reductions of all usage.
+    heat_pump_cop (float): kBtu of gas load served per kBtu of electricity.
+    ramp_years (int): Years over which each electrification ramps up.
+
+    Returns:
+    list: Scenarios from make_scenario.
+    """
+    return [make_scenario(f'gas {share:.0%} by {year}, efficiency {rate:.1%}/yr',
+                          fuel_switches=[(NATURAL_GAS, ELECTRICITY, share, year, ramp_years, heat_pump_cop)],
+                          efficiency_rate=rate)
+            for share, year, rate in itertools.product(shares, years, efficiency_rates)]
+
+
+def build_usage_trajectory(scenario, years, fuel_count):
+    """
+    Builds the per-year linear map from a building's reported usage to its usage under a scenario.
+
+    Parameters:
+    scenario (dict): A scenario from make_scenario.
+    years (list): The projected years (as integers).
+    fuel_count (int): Number of fuels in the usage arrays.
+
+    Returns:
+    numpy.ndarray: Array T of shape (years, fuels, fuels) where the usage in year y is T[y] @ reported usage.
+    """
+    years = np.asarray(years)
+    trajectory = np.tile(np.eye(fuel_count), (len(years), 1, 1))
+
+    for from_fuel, to_fuel, share, year, ramp_years, efficiency_ratio in scenario['fuel_switches']:
+        if ramp_years > 0:
+            progress = np.clip((years - (year - ramp_years)) / ramp_years, 0, 1)
+        else:
+            progress = (years >= year).astype(float)
+        switched = share * progress
+        moved = trajectory[:, from_fuel, :] * switched[:, np.newaxis]
+        trajectory[:, from_fuel, :] -= moved
+        trajectory[:, to_fuel, :] += moved / efficiency_ratio
+
+    efficiency = (1 - scenario['efficiency_rate']) ** np.maximum(years - scenario['efficiency_start'] + 1, 0)
+    return trajectory * efficiency[:, np.newaxis, np.newaxis]
+
+
+def build_scenario_coefficients(scenarios, factor_matrix, years):
+    """
+    Folds each scenario's usage trajectory into the emissions factors.
+
+    Because the trajectory is linear in the reported usage, the emissions of every building
+    under a scenario are usage @ coefficients.T / 1e6, one matrix product per scenario.
+
+    Parameters:
+    scenarios (list): Scenarios from make_scenario.
+    factor_matrix (numpy.ndarray): Emissions factors of shape (years, fuels).
+    years (list): The projected years (as integers), one per factor_matrix row.
+
+    Returns:
+    numpy.ndarray: Array of shape (scenarios, years, fuels) in kg CO2e/MMBtu of reported usage.
+    """
+    return np.stack([np.einsum('yf,yfg->yg', factor_matrix, build_usage_trajectory(scenario, years,
+                                                                                   factor_matrix.shape[1]))
+                     for scenario in scenarios])
+
+
+def _create_shared_array(array):
+    shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    shared = np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)
+    shared[...] = array
+    return shm, shared
+
+
+def _attach_shared_arrays(specs):
+    for key, (name, shape, dtype) in specs.items():
+        shm = shared_memory.SharedMemory(name=name)
+        _shared_arrays[key] = (shm, np.ndarray(shape, dtype=dtype, buffer=shm.buf))
+
+
+def _evaluate_scenario_batch(start, stop):
+    usage = _shared_arrays['usage'][1]
+    allowance = _shared_arrays['allowance'][1]
+    coefficients = _shared_arrays['coefficients'][1]
+    emissions_out = _shared_arrays['emissions'][1]
+    penalty_out = _shared_arrays['penalty'][1]
+    over_out = _shared_arrays['over_threshold'][1]
+    building_penalty_out = _shared_arrays['building_penalty'][1]
+
+    for scenario in range(start, stop):
+        emissions = usage @ coefficients[scenario].T / 1e6
+        excess = np.maximum(np.nan_to_num(emissions - allowance), 0)
+        penalty = excess * CO2_COST
+        emissions_out[scenario] = emissions.sum(axis=0)
+        penalty_out[scenario] = penalty.sum(axis=0)
+        over_out[scenario] = (excess > 0).sum(axis=0)
+        building_penalty_out[scenario] = penalty.sum(axis=1)
+
+
+def run_scenarios(scenarios, usage, factor_matrix, allowance, years, workers=None):
+    """
+    Evaluates every scenario against every building, fanned out over a process pool.
+
+    The usage, allowance and coefficient arrays are placed in shared memory once and the
+    workers write their results straight into shared output arrays, so only scenario index
+    ranges cross the process boundary.
+
+    Parameters:
+    scenarios (list): Scenarios from make_scenario.
+    usage (numpy.ndarray): Reported usage in kBtu of shape (buildings, fuels), from build_usage_matrix.
+    factor_matrix (numpy.ndarray): Emissions factors of shape (years, fuels).
+    allowance (numpy.ndarray): Allowed emissions in MT CO2e of shape (buildings, years), from build_threshold_matrix.
+    years (list): The projected years (as integers).
+    workers (int, optional): Number of worker processes, defaults to the number of CPUs.
+
+    Returns:
+    tuple: (pandas.DataFrame with the portfolio emissions, penalty and number of buildings over
+           threshold per scenario and year, numpy.ndarray of each building's total penalty per
+           scenario with shape (scenarios, buildings))
+    """
+    coefficients = build_scenario_coefficients(scenarios, factor_matrix, years)
+    scenario_count, building_count = len(scenarios), usage.shape[0]
+    inputs = {
+        'usage': np.ascontiguousarray(usage, dtype=float),
+        'allowance': np.ascontiguousarray(allowance, dtype=float),
+        'coefficients': coefficients,
+        'emissions': np.zeros((scenario_count, len(years))),
+        'penalty': np.zeros((scenario_count, len(years))),
+        'over_threshold': np.zeros((scenario_count, len(years)), dtype=np.int32),
+        'building_penalty': np.zeros((scenario_count, building_count)),
+    }
+
+    shared = {key: _create_shared_array(array) for key, array in inputs.items()}
+    try:
+        specs = {key: (shm.name, array.shape, array.dtype) for key, (shm, array) in shared.items()}
+        batches = [(start, min(start + SCENARIO_BATCH_SIZE, scenario_count))
+                   for start in range(0, scenario_count, SCENARIO_BATCH_SIZE)]
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count(), initializer=_attach_shared_arrays,
+                                 initargs=(specs,)) as executor:
+            for future in [executor.submit(_evaluate_scenario_batch, start, stop) for start, stop in batches]:
+                future.result()
+
+        results = {key: array.copy() for key, (_, array) in shared.items()}
+    finally:
+        for shm, _ in shared.values():
+            shm.close()
+            shm.unlink()
+
+    df_summary = pd.DataFrame({
+        'scenario': np.repeat([scenario['name'] for scenario in scenarios], len(years)),
+        'year': np.tile(years, scenario_count),
+        'emissions_mt_co2e': results['emissions'].ravel(),
+        'penalty': results['penalty'].ravel(),
+        'buildings_over_threshold': results['over_threshold'].ravel(),
+    })
+    return df_summary, results['building_penalty']
@@ -0,0 +1,139 @@
+import numpy as np
+import pandas as pd
+
+from emissions_model import CO2_COST, ELECTRICITY, PIPELINE_FUEL_COLUMNS
+
+
+# Number of buildings evaluated at once, bounding the (inputs x buildings x years) temporaries
+SENSITIVITY_CHUNK_SIZE = 2000
+
+
+def build_sensitivity_inputs(years):
+    """
+    Lists the inputs of the penalty calculation that are perturbed one at a time.
+
+    Each input is relative: perturbing it by s multiplies it by (1 + s). An input scales the
+    emissions factor cells set in its (year x fuel) mask (scaling a fuel's usage scales its
+    whole factor column), the allowance, or the cost per ton.
+
+    Parameters:
+    years (list): The projected years (as integers).
+
+    Returns:
+    tuple: (list of input names, numpy.ndarray of emissions masks of shape (inputs, years, fuels),
+            numpy.ndarray of allowance flags, numpy.ndarray of cost flags)
+    """
+    fuel_count = len(PIPELINE_FUEL_COLUMNS)
+    names, masks, allowance_flags, cost_flags = [], [], [], []
+
+    def add(name, mask=None, allowance=0, cost=0):
+        names.append(name)
+        masks.append(np.zeros((len(years), fuel_count)) if mask is None else mask)
+        allowance_flags.append(allowance)
+        cost_flags.append(cost)
+
+    for fuel, column in enumerate(PIPELINE_FUEL_COLUMNS):
+        mask = np.zeros((len(years), fuel_count))
+        mask[:, fuel] = 1
+        add(column, mask)
+    for index, year in enumerate(years):
+        mask = np.zeros((len(years), fuel_count))
+        mask[index, ELECTRICITY] = 1
+        add(f'Electricity Emissions {year}', mask)
+    add('Reported Gross Floor Area (Sq Ft)', allowance=1)
+    add('Threshold', allowance=1)
+    add('CO2_COST', cost=1)
+
+    return names, np.stack(masks), np.asarray(allowance_flags, dtype=float), np.asarray(cost_flags, dtype=float)
+
+
+def _chunk_sensitivity(usage, allowance, factor_matrix, masks, allowance_flags, cost_flags, relative_step):
+    """
+    Evaluates every perturbation of a chunk of buildings as one batched array computation.
+
+    Returns the per-input low, high and derivative of the chunk's penalty summed over buildings
+    and years, the number of buildings that needed finite differences, and the low and high
+    penalty of the joint adverse and favourable perturbations.
+    """
+    steps = np.array([-relative_step, relative_step])[:, np.newaxis, np.newaxis, np.newaxis]
+    known = ~np.isnan(allowance)
+    allowance = np.nan_to_num(allowance)
+    emissions = usage @ factor_matrix.T / 1e6
+    base_excess = (emissions - allowance) * known
+    base_penalty = np.maximum(base_excess, 0) * CO2_COST
+
+    # Change of emissions and allowance per unit of relative change of each input, shape (inputs, buildings, years)
+    emissions_slope = np.einsum('bf,kyf->kby', usage, factor_matrix * masks) / 1e6
+    slope = (emissions_slope - allowance_flags[:, np.newaxis, np.newaxis] * allowance) * known
+
+    # Both perturbations of every input at once, shape (2, inputs, buildings, years)
+    excess = base_excess + steps * slope
+    penalty = np.maximum(excess, 0) * CO2_COST * (1 + steps * cost_flags[:, np.newaxis, np.newaxis])
+    low, high = penalty.sum(axis=3)
+
+    # Exact derivative wherever no building-year crosses its allowance within the step
+    over = base_excess > 0
+    analytic = CO2_COST * (over * slope).sum(axis=2) + cost_flags[:, np.newaxis] * base_penalty.sum(axis=1)
+    crosses = ((excess > 0) != over).any(axis=(0, 3))
+    derivative = np.where(crosses, (high - low) / (2 * relative_step), analytic)
+
+    # Every input moved at once in the direction that raises (adverse) or lowers (favourable) the penalty
+    electricity_emissions = np.outer(usage[:, ELECTRICITY], factor_matrix[:, ELECTRICITY]) / 1e6
+    joint = []
+    for sign in (-1, 1):
+        scale = 1 + sign * relative_step
+        joint_emissions = emissions * scale + electricity_emissions * scale * (scale - 1)
+        joint_excess = (joint_emissions - allowance * (1 - sign * relative_step) ** 2) * known
+        joint.append((np.maximum(joint_excess, 0) * CO2_COST * scale).sum())
+
+    return (base_penalty.sum(), low.sum(axis=1), high.sum(axis=1), derivative.sum(axis=1), crosses.sum(axis=1),
+            np.array(joint))
+
+
+def penalty_sensitivity(usage, factor_matrix, allowance, years, buildings=None, relative_step=0.1,
+                        chunk_size=SENSITIVITY_CHUNK_SIZE):
+    """
+    Builds tornado chart data for the total 2025-2050 penalty of one building or a portfolio.
+
+    Every input (each fuel's usage, GSF, each year's electricity factor, the threshold and
+    CO2_COST) is moved by -relative_step and +relative_step on its own, and all inputs are
+    moved together in their adverse and favourable directions. The derivative is analytic,
+    the model being linear in each input until an excess crosses zero; buildings where a
+    perturbation crosses the allowance use a central finite difference instead.
+
+    Parameters:
+    usage (numpy.ndarray): Reported usage in kBtu of shape (buildings, fuels), from build_usage_matrix.
+    factor_matrix (numpy.ndarray): Emissions factors of shape (years, fuels).
+    allowance (numpy.ndarray): Allowed emissions in MT CO2e of shape (buildings, years), from build_threshold_matrix.
+    years (list): The projected years (as integers).
+    buildings (array-like, optional): Row positions of the buildings to analyze, defaults to all of them.
+    relative_step (float): Relative perturbation of each input.
+    chunk_size (int): Number of buildings evaluated at once.
+
+    Returns:
+    pandas.DataFrame: One row per input sorted by swing, with the base, low and high penalty, the
+                      swing, the penalty change per 1% change of the input, the elasticity and the
+                      number of buildings that used finite differences.
+    """
+    if buildings is not None:
+        usage, allowance = usage[buildings], allowance[buildings]
+    names, masks, allowance_flags, cost_flags = build_sensitivity_inputs(years)
+
+    totals = None
+    for start in range(0, usage.shape[0], chunk_size):
+        chunk = _chunk_sensitivity(usage[start:start + chunk_size], allowance[start:start + chunk_size],
+                                   factor_matrix, masks, allowance_flags, cost_flags, relative_step)
+        totals = chunk if totals is None else tuple(total + part for total, part in zip(totals, chunk))
+    base, low, high, derivative, finite_difference, joint = totals
+
+    df_tornado = pd.DataFrame({
+        'input': names + ['All inputs'],
+        'base_penalty': base,
+        'low_penalty': np.append(low, joint[0]),
+        'high_penalty': np.append(high, joint[1]),
+        'penalty_per_percent': np.append(derivative / 100, np.nan),
+        'elasticity': np.append(derivative / base if base else np.full(len(names), np.nan), np.nan),
+        'finite_difference_buildings': np.append(finite_difference, 0),
+    })
+    df_tornado['swing'] = (df_tornado['high_penalty'] - df_tornado['low_penalty']).abs()
+    return df_tornado.sort_values('swing', ascending=False, kind='stable').reset_index(drop=True)
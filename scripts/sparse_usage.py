@@ -0,0 +1,172 @@
+import numpy as np
+import pandas as pd
+
+from dtype_policy import apply_dtype_policy
+
+
+def build_sparse_usage(df):
+    """
+    Builds a sparse (COO) representation of the energy usage table of script 3.
+
+    Most buildings report only two or three of the energy types, so only the non-zero
+    (building, energy type, usage) entries are kept. Usage is truncated to integers like the
+    exported energy usage table, and entries that truncate to zero are dropped as well.
+
+    Parameters:
+    df (pandas.DataFrame): Energy usage with a 'reporting_id' column and one usage column per
+                           energy type.
+
+    Returns:
+    dict: The reporting ids, building ids (ranks of the sorted reporting ids) and energy types
+          of the dense table, and the 'row', 'type' and 'usage' arrays of its non-zero entries.
+    """
+    energy_types = [column for column in df.columns if column != 'reporting_id']
+    reporting_ids = df['reporting_id'].to_numpy()
+    if len(np.unique(reporting_ids)) != len(reporting_ids):
+        raise ValueError('Energy usage has duplicate reporting ids')
+
+    # Building ids follow the sorted reporting ids, like transform_energy_usage
+    building_ids = np.empty(len(reporting_ids), dtype=np.int64)
+    building_ids[np.argsort(reporting_ids, kind='stable')] = np.arange(1, len(reporting_ids) + 1)
+
+    # Non-zero entries in (energy type, building) order, the row order of the dense table
+    usage = np.trunc(df[energy_types].to_numpy(dtype=float)).astype(np.int64).T
+    types, rows = np.nonzero(usage)
+
+    return {
+        'reporting_ids': reporting_ids,
+        'building_ids': building_ids,
+        'energy_types': energy_types,
+        'row': rows,
+        'type': types,
+        'usage': usage[types, rows],
+    }
+
+
+def build_factor_lookup(sparse, df_factors, years):
+    """
+    Looks up the emissions factor of every energy type and year of a sparse usage table.
+
+    Parameters:
+    sparse (dict): A sparse usage table from build_sparse_usage.
+    df_factors (pandas.DataFrame): Emissions factors with 'year', 'energy_type' and
+                                   'emissions_kgco2e_per_unit', in factor_id order.
+    years (list): The projected years (as integers).
+
+    Returns:
+    tuple: (factor ids, emissions factors), both of shape (energy types, years); pairs without a
+           factor have id 0 and a NaN factor.
+    """
+    factor_ids = np.zeros((len(sparse['energy_types']), len(years)), dtype=np.int64)
+    factors = np.full(factor_ids.shape, np.nan)
+    type_index = {energy_type: index for index, energy_type in enumerate(sparse['energy_types'])}
+    year_index = {year: index for index, year in enumerate(years)}
+
+    for factor_id, (year, energy_type, factor) in enumerate(
+            df_factors[['year', 'energy_type', 'emissions_kgco2e_per_unit']].itertuples(index=False), start=1):
+        if energy_type in type_index and year in year_index and factor_ids[type_index[energy_type],
+                                                                           year_index[year]] == 0:
+            factor_ids[type_index[energy_type], year_index[year]] = factor_id
+            factors[type_index[energy_type], year_index[year]] = factor
+    return factor_ids, factors
+
+
+def sparse_usage_emissions(sparse, factors):
+    """
+    Calculates the emissions of the non-zero entries of a sparse usage table in every year.
+
+    Parameters:
+    sparse (dict): A sparse usage table from build_sparse_usage.
+    factors (numpy.ndarray): Emissions factors in kg CO2e per unit of shape (energy types, years).
+
+    Returns:
+    numpy.ndarray: Emissions in MT CO2e of shape (non-zero entries, years).
+    """
+    return (sparse['usage'][:, np.newaxis] / 1000) * (factors[sparse['type']] / 1000)
+
+
+def write_dense_energy_usage(sparse, energy_usage_path, start_year=2025, end_year=2050):
+    """
+    Writes the energy usage SQL table of script 3 from a sparse usage table.
+
+    The zero entries are filled in one energy type at a time, so only one block of the table
+    is ever dense. The table is identical to the one built by transform_energy_usage.
+
+    Parameters:
+    sparse (dict): A sparse usage table from build_sparse_usage.
+    energy_usage_path (str): Output CSV of the energy usage table.
+    start_year (int): The first projected year.
+    end_year (int): The last projected year.
+
+    Returns:
+    int: The number of energy usage rows.
+    """
+    years = np.arange(start_year, end_year + 1)
+    building_count, year_count = len(sparse['building_ids']), len(years)
+
+    for position, energy_type in enumerate(sparse['energy_types']):
+        entries = np.flatnonzero(sparse['type'] == position)
+
+        # Dense usage of shape (buildings, years), rows of the block in C order
+        usage = np.zeros((building_count, year_count), dtype=np.int64)
+        usage[sparse['row'][entries]] = sparse['usage'][entries, np.newaxis]
+
+        df_energy_usage = apply_dtype_policy(pd.DataFrame({
+            'building_id': np.repeat(sparse['building_ids'], year_count),
+            'year': np.tile(years, building_count),
+            'energy_type': pd.Categorical.from_codes(np.zeros(building_count * year_count, dtype=np.int8),
+                                                     [energy_type]),
+            'usage': usage.ravel(),
+        }))
+        df_energy_usage.to_csv(energy_usage_path, index=False, mode='w' if position == 0 else 'a',
+                               header=position == 0)
+
+    return len(sparse['energy_types']) * building_count * year_count
+
+
+def write_dense_calculated_emissions(sparse, df_factors, calculated_emissions_path, start_year=2025, end_year=2050):
+    """
+    Writes the calculated emissions SQL table of script 3 from a sparse usage table.
+
+    Emissions are only calculated for the non-zero entries; the zero entries are filled in
+    when the table is made dense for export, one energy type at a time. Usage ids are the row
+    numbers of the energy usage table from write_dense_energy_usage, and the table is identical
+    to the merge of the energy usage table with the emissions factors in script 3.
+
+    Parameters:
+    sparse (dict): A sparse usage table from build_sparse_usage.
+    df_factors (pandas.DataFrame): Emissions factors with 'year', 'energy_type' and
+                                   'emissions_kgco2e_per_unit', in factor_id order.
+    calculated_emissions_path (str): Output CSV of the calculated emissions table.
+    start_year (int): The first projected year.
+    end_year (int): The last projected year.
+
+    Returns:
+    int: The number of calculated emissions rows.
+    """
+    years = np.arange(start_year, end_year + 1)
+    building_count, year_count = len(sparse['building_ids']), len(years)
+    factor_ids, factors = build_factor_lookup(sparse, df_factors, list(years))
+    emissions = sparse_usage_emissions(sparse, factors)
+    calculated_emissions_rows = 0
+
+    for position in range(len(sparse['energy_types'])):
+        entries = np.flatnonzero(sparse['type'] == position)
+
+        # Dense emissions; the rows without a sparse entry have zero usage and so zero emissions
+        dense_emissions = np.zeros((building_count, year_count))
+        dense_emissions[sparse['row'][entries]] = emissions[entries]
+        dense_factor_ids = np.broadcast_to(factor_ids[position], dense_emissions.shape).ravel()
+
+        # Usage rows without an emissions factor drop out, like the inner merge
+        matched = dense_factor_ids > 0
+        df_calculated_emissions = apply_dtype_policy(pd.DataFrame({
+            'usage_id': np.flatnonzero(matched) + position * building_count * year_count + 1,
+            'factor_id': dense_factor_ids[matched],
+            'emissions_mt_co2e': dense_emissions.ravel()[matched],
+        }))
+        df_calculated_emissions.to_csv(calculated_emissions_path, index=False, mode='w' if position == 0 else 'a',
+                                       header=position == 0)
+        calculated_emissions_rows += len(df_calculated_emissions)
+
+    return calculated_emissions_rows
@@ -0,0 +1,236 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from emissions_model import PIPELINE_FUEL_COLUMNS
+
+
+# Columns kept for every building and data year
+HISTORY_COLUMNS = (['BERDO ID', 'Data Year', 'Largest Property Type', 'Reported Gross Floor Area (Sq Ft)',
+                    'Site EUI (Energy Use Intensity kBtu/ft2)', 'Total Site Energy Usage (kBtu)',
+                    'Renewable System Electricity Usage Onsite (kBtu)', 'District Hot Water Usage (kBtu)']
+                   + PIPELINE_FUEL_COLUMNS + ['Estimated Total GHG Emissions (kgCO2e)'])
+
+# Keys of the store
+HISTORY_KEYS = ['BERDO ID', 'Data Year']
+
+# Index of the store: the part file, version and row hash of every key written
+INDEX_FILE = 'index.parquet'
+
+# Rows per row group of a part file; reads of a few buildings skip the row groups whose BERDO IDs do not match
+ROW_GROUP_SIZE = 8192
+
+# Bounds of the yearly change of a building's site EUI used for projections: observed efficiency gains up to 5%
+# a year are extrapolated, and buildings whose usage grew are projected flat, as the pipeline does for all
+MIN_ANNUAL_CHANGE = -0.05
+MAX_ANNUAL_CHANGE = 0.0
+
+
+def _row_hashes(df):
+    return pd.util.hash_pandas_object(df[HISTORY_COLUMNS], index=False).to_numpy()
+
+
+def prepare_history_rows(df, data_year):
+    """
+    Selects the history columns of the rows of one data year that reported usage.
+
+    Parameters:
+    df (pandas.DataFrame): Raw BERDO data of one file, after corrections.
+    data_year (int): The data year of the file.
+
+    Returns:
+    pandas.DataFrame: One row per BERDO ID with the HISTORY_COLUMNS, the first row of any BERDO ID reported twice.
+    """
+    df = df[df['BERDO ID'].notna() & df['Total Site Energy Usage (kBtu)'].notna()]
+    df = df.reindex(columns=HISTORY_COLUMNS).assign(**{'BERDO ID': df['BERDO ID'].astype(str).str.strip(),
+                                                       'Data Year': data_year})
+    numeric_columns = HISTORY_COLUMNS[3:]
+    df[numeric_columns] = df[numeric_columns].apply(pd.to_numeric, errors='coerce').astype(float)
+    return df.drop_duplicates(HISTORY_KEYS).reset_index(drop=True)
+
+
+def load_history_index(store_directory):
+    """
+    Reads the index of a usage history store.
+
+    Parameters:
+    store_directory (str): The store directory.
+
+    Returns:
+    pandas.DataFrame: Every key written, with its 'version', 'part' file and 'row_hash'.
+    """
+    path = os.path.join(store_directory, INDEX_FILE)
+    if not os.path.exists(path):
+        return pd.DataFrame({'BERDO ID': pd.Series(dtype=str), 'Data Year': pd.Series(dtype='int64'),
+                             'version': pd.Series(dtype='int64'), 'part': pd.Series(dtype=str),
+                             'row_hash': pd.Series(dtype='uint64')})
+    return pq.read_table(path).to_pandas()
+
+
+def _latest_entries(df_index):
+    # The last version written of every key
+    return df_index.sort_values('version', kind='stable').drop_duplicates(HISTORY_KEYS, keep='last')
+
+
+def append_history(store_directory, df):
+    """
+    Appends rows to the usage history store, one new part file per data year.
+
+    Part files are never rewritten. Rows equal to the latest stored row of their key are
+    skipped, so appending a republished file only stores the buildings that changed; the
+    new rows supersede the old ones on read.
+
+    Parameters:
+    store_directory (str): The store directory, created if needed.
+    df (pandas.DataFrame): Rows from prepare_history_rows.
+
+    Returns:
+    pandas.DataFrame: Per data year the rows appended and the part file, if any.
+    """
+    df_index = load_history_index(store_directory)
+    df = df.assign(row_hash=_row_hashes(df))
+
+    # Drop the rows the store already holds as the latest version of their key
+    df_latest = _latest_entries(df_index)[HISTORY_KEYS + ['row_hash']]
+    df = df.merge(df_latest, on=HISTORY_KEYS + ['row_hash'], how='left', indicator=True)
+    df = df[df['_merge'] == 'left_only'].drop(columns='_merge')
+
+    version = int(df_index['version'].max()) + 1 if len(df_index) else 1
+    appended, index_entries = [], [df_index]
+    for data_year, df_year in df.groupby('Data Year'):
+        part = os.path.join(f'data_year={data_year}', f'part-{version:05d}.parquet')
+        os.makedirs(os.path.join(store_directory, f'data_year={data_year}'), exist_ok=True)
+
+        # Rows sorted by BERDO ID so every row group covers a narrow range of BERDO IDs
+        df_year = df_year.sort_values('BERDO ID', kind='stable')
+        pq.write_table(pa.Table.from_pandas(df_year[HISTORY_COLUMNS], preserve_index=False),
+                       os.path.join(store_directory, part), row_group_size=ROW_GROUP_SIZE)
+        index_entries.append(df_year[HISTORY_KEYS + ['row_hash']].assign(version=version, part=part))
+        appended.append({'Data Year': data_year, 'rows': len(df_year), 'part': part})
+        version += 1
+
+    if len(index_entries) > 1:
+        df_index = pd.concat(index_entries, axis=0, ignore_index=True)
+        pq.write_table(pa.Table.from_pandas(df_index, preserve_index=False),
+                       os.path.join(store_directory, INDEX_FILE))
+    return pd.DataFrame(appended, columns=['Data Year', 'rows', 'part'])
+
+
+def _read_parts(store_directory, df_entries, filters=None, columns=None):
+    # Reads the part files of the given index entries and keeps the rows of those versions
+    frames = []
+    for (part, version), df_part in df_entries.groupby(['part', 'version']):
+        table = pq.read_table(os.path.join(store_directory, part), filters=filters,
+                              columns=None if columns is None else list(dict.fromkeys(HISTORY_KEYS + columns)))
+        frames.append(table.to_pandas().merge(df_part[HISTORY_KEYS], on=HISTORY_KEYS))
+    if not frames:
+        return pd.DataFrame(columns=HISTORY_COLUMNS if columns is None else columns)
+    return pd.concat(frames, axis=0, ignore_index=True).sort_values(HISTORY_KEYS, kind='stable').reset_index(drop=True)
+
+
+def read_building_history(store_directory, berdo_ids):
+    """
+    Reads every data year of some buildings from the usage history store.
+
+    Only the part files that hold the buildings are opened, and only their row groups
+    whose BERDO ID range contains the buildings are read.
+
+    Parameters:
+    store_directory (str): The store directory.
+    berdo_ids (list): BERDO IDs.
+
+    Returns:
+    pandas.DataFrame: The latest rows of the buildings, sorted by BERDO ID and data year.
+    """
+    berdo_ids = [str(berdo_id).strip() for berdo_id in berdo_ids]
+    df_entries = _latest_entries(load_history_index(store_directory))
+    df_entries = df_entries[df_entries['BERDO ID'].isin(berdo_ids)]
+    return _read_parts(store_directory, df_entries, filters=[('BERDO ID', 'in', berdo_ids)])
+
+
+def read_history_year(store_directory, data_year, columns=None):
+    """
+    Scans one data year of the usage history store.
+
+    Parameters:
+    store_directory (str): The store directory.
+    data_year (int): The data year.
+    columns (list, optional): Columns to read, besides the keys; all by default.
+
+    Returns:
+    pandas.DataFrame: The latest row of every building in the data year.
+    """
+    df_entries = _latest_entries(load_history_index(store_directory))
+    return _read_parts(store_directory, df_entries[df_entries['Data Year'] == data_year], columns=columns)
+
+
+def read_history(store_directory, columns=None):
+    """
+    Reads the latest rows of all data years of the usage history store.
+
+    Parameters:
+    store_directory (str): The store directory.
+    columns (list, optional): Columns to read, besides the keys; all by default.
+
+    Returns:
+    pandas.DataFrame: The rows sorted by BERDO ID and data year.
+    """
+    return _read_parts(store_directory, _latest_entries(load_history_index(store_directory)), columns=columns)
+
+
+def fit_usage_trends(df_history, min_change=MIN_ANNUAL_CHANGE, max_change=MAX_ANNUAL_CHANGE):
+    """
+    Fits the yearly change of every building's site EUI over its reported data years.
+
+    The slope of log(total site usage / GFA) over the data years is fitted by least squares
+    for all buildings at once; buildings with a single data year have no change.
+
+    Parameters:
+    df_history (pandas.DataFrame): Rows from the usage history store.
+    min_change (float): Lower bound of the yearly change, e.g. -0.05 for 5% a year less usage.
+    max_change (float): Upper bound of the yearly change.
+
+    Returns:
+    pandas.DataFrame: Per BERDO ID the 'observed_years', the fitted 'annual_change' and the bounded
+                      'projected_change'.
+    """
+    gfa = df_history['Reported Gross Floor Area (Sq Ft)']
+    site_usage = df_history['Total Site Energy Usage (kBtu)']
+    log_eui = np.log(site_usage.where(site_usage > 0) / gfa.where(gfa > 0))
+    df_fit = pd.DataFrame({'BERDO ID': df_history['BERDO ID'], 'year': df_history['Data Year'].astype(float),
+                           'log_eui': log_eui}).dropna()
+
+    # Least squares slope from per-building sums
+    df_fit['year_log_eui'] = df_fit['year'] * df_fit['log_eui']
+    df_fit['year_squared'] = df_fit['year'] ** 2
+    sums = df_fit.groupby('BERDO ID').agg(n=('year', 'size'), year=('year', 'sum'), log_eui=('log_eui', 'sum'),
+                                          year_log_eui=('year_log_eui', 'sum'), year_squared=('year_squared', 'sum'))
+    denominator = sums['n'] * sums['year_squared'] - sums['year'] ** 2
+    slope = ((sums['n'] * sums['year_log_eui'] - sums['year'] * sums['log_eui'])
+             / denominator.where(denominator > 0)).fillna(0)
+
+    df_trends = pd.DataFrame({'observed_years': sums['n'], 'annual_change': np.expm1(slope)}).reset_index()
+    df_trends['projected_change'] = df_trends['annual_change'].clip(min_change, max_change)
+    return df_trends
+
+
+def project_trend_emissions(usage, factor_matrix, annual_change, last_years, years):
+    """
+    Projects emissions from the last reported usage, changed every year at each building's trend.
+
+    Parameters:
+    usage (numpy.ndarray): Last reported usage in kBtu of shape (buildings, fuels), from build_usage_matrix.
+    factor_matrix (numpy.ndarray): Emissions factors of shape (years, fuels).
+    annual_change (numpy.ndarray): Yearly usage change of every building, from fit_usage_trends.
+    last_years (numpy.ndarray): Data year of every building's last reported usage.
+    years (list): The projected years (as integers).
+
+    Returns:
+    numpy.ndarray: Emissions in metric tons CO2e of shape (buildings, years).
+    """
+    elapsed = np.asarray(years, dtype=float)[np.newaxis, :] - np.asarray(last_years, dtype=float)[:, np.newaxis]
+    growth = (1 + np.asarray(annual_change, dtype=float))[:, np.newaxis] ** elapsed
+    return growth * (usage @ factor_matrix.T) / 1e6
@@ -0,0 +1,8 @@
+import os
+import sys
+
+REPOSITORY_DIRECTORY = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+# The pipeline modules and the harness are imported by their file names, as the scripts import each other
+sys.path.insert(0, os.path.join(REPOSITORY_DIRECTORY, 'benchmarks'))
+sys.path.insert(0, os.path.join(REPOSITORY_DIRECTORY, 'scripts'))
@@ -0,0 +1,75 @@
+import importlib
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+from conftest import REPOSITORY_DIRECTORY
+
+
+# Property types given a threshold in the test threshold files; Technology/Science is left without one
+THRESHOLD_PROPERTY_TYPES = ['Education', 'College/University']
+
+FILL_OUTPUTS = ([('my-dropdown-final', 'value'), ('gsf', 'value')] + [(f'value{i}', 'value') for i in range(1, 12)]
+                + [('calc_button', 'n_clicks'), ('building-search-note', 'children')])
+
+
+@pytest.fixture(scope='module')
+def client(tmp_path_factory):
+    # The app reads its threshold files from the working directory and the preprocessed data from ../data-files
+    root = tmp_path_factory.mktemp('app')
+    data_directory = root / 'data-files' / '1-preprocessed-emissions-data'
+    data_directory.mkdir(parents=True)
+    (data_directory / '1-berdo-emissions-data.csv').symlink_to(
+        os.path.join(REPOSITORY_DIRECTORY, 'data-files', '1-preprocessed-emissions-data', '1-berdo-emissions-data.csv'))
+    scripts_directory = root / 'scripts'
+    scripts_directory.mkdir()
+    thresholds = {property_type: 5.0 for property_type in THRESHOLD_PROPERTY_TYPES}
+    pd.DataFrame({'Year': range(2021, 2051), **thresholds}).to_csv(scripts_directory / 'Thresholds_1.csv', index=False)
+    pd.DataFrame({'Year': range(2025, 2051), **thresholds}).to_csv(scripts_directory / 'Thresholds_comparison.csv',
+                                                                   index=False)
+
+    working_directory = os.getcwd()
+    os.chdir(scripts_directory)
+    try:
+        sys.modules.pop('app', None)
+        app = importlib.import_module('app')
+        yield app.app.server.test_client()
+    finally:
+        os.chdir(working_directory)
+
+
+def fill_building_inputs(client, berdo_id):
+    # Fires fill_building_inputs the way the browser does when a building is selected
+    response = client.post('/_dash-update-component', json={
+        'output': '..' + '...'.join(f'{id}.{property}' for id, property in FILL_OUTPUTS) + '..',
+        'outputs': [{'id': id, 'property': property} for id, property in FILL_OUTPUTS],
+        'inputs': [{'id': 'building-search', 'property': 'value', 'value': berdo_id}],
+        'state': [{'id': 'calc_button', 'property': 'n_clicks', 'value': 2}],
+        'changedPropIds': ['building-search.value'],
+    })
+    assert response.status_code in (200, 204), response.get_data(as_text=True)
+    return response.get_json()['response'] if response.status_code == 200 else {}
+
+
+def test_fill_building_inputs_fills_every_input(client):
+    response = fill_building_inputs(client, '102090')
+    assert response['my-dropdown-final'] == {'value': 'Education'}
+    assert response['gsf'] == {'value': '26400'}
+    assert response['value1'] == {'value': '115245'}
+    assert response['value11'] == {'value': '0'}
+    assert response['calc_button'] == {'n_clicks': 3}
+
+
+def test_fill_building_inputs_leaves_the_property_type_without_a_threshold(client):
+    response = fill_building_inputs(client, '100422')
+    assert 'my-dropdown-final' not in response
+    assert response['value1'] == {'value': '18478480'}
+    assert 'calc_button' not in response
+    assert response['building-search-note']['children'].startswith('Technology/Science has no BERDO threshold')
+
+
+def test_fill_building_inputs_ignores_unknown_buildings(client):
+    response = fill_building_inputs(client, 'unknown')
+    assert list(response) == ['building-search-note']
@@ -0,0 +1,66 @@
+import pandas as pd
+
+from delta_ingest import changed_berdo_ids, hash_berdo_rows, link_corrected_ids, merge_delta_rows
+
+
+def raw_rows(rows):
+    return pd.DataFrame(rows, columns=['BERDO ID', 'Building Address', 'Electricity Usage (kBtu)'])
+
+
+def corrections(rows):
+    return pd.DataFrame(rows, columns=['rule_id', 'berdo_id', 'data_year', 'match_column', 'match_value', 'action',
+                                       'column', 'value', 'note'])
+
+
+def test_changed_berdo_ids_finds_new_changed_and_removed_ids():
+    previous = raw_rows([[100001, '1 Main St', 10.0], [100002, '2 Main St', 20.0], [100003, '3 Main St', 30.0]])
+    current = raw_rows([[100001, '1 Main St', 10.0], [100002, '2 Main St', 25.0], [100004, '4 Main St', 40.0]])
+    assert changed_berdo_ids(hash_berdo_rows(current, '2023'), hash_berdo_rows(previous, '2023')) \
+        == {'100002', '100003', '100004'}
+
+
+def test_changed_berdo_ids_sees_reordered_rows_of_one_id():
+    previous = raw_rows([[100001, '1 Main St', 10.0], [100001, '3 Main St', 30.0], [100002, '2 Main St', 20.0]])
+    current = raw_rows([[100001, '3 Main St', 30.0], [100002, '2 Main St', 20.0], [100001, '1 Main St', 10.0]])
+    assert changed_berdo_ids(hash_berdo_rows(current, '2023'), hash_berdo_rows(previous, '2023')) == {'100001'}
+
+
+def test_changed_berdo_ids_keeps_sources_apart():
+    rows = raw_rows([[100001, '1 Main St', 10.0]])
+    previous = pd.concat([hash_berdo_rows(rows, '2022'), hash_berdo_rows(rows, '2023')])
+    current = pd.concat([hash_berdo_rows(rows, '2022'),
+                         hash_berdo_rows(raw_rows([[100001, '1 Main St', 11.0]]), '2023')])
+    assert changed_berdo_ids(current, previous) == {'100001'}
+    assert changed_berdo_ids(previous, previous) == set()
+
+
+def test_link_corrected_ids_adds_both_ids_of_a_renaming_correction():
+    df_corrections = corrections([
+        ['2', '106337', 2022, 'Building Address', '116-138 Tudor St', 'set', 'BERDO ID', '106338', ''],
+        ['2', '106337', 2022, 'Building Address', '116-138 Tudor St', 'set', 'Property Owner Name', 'OWNER', ''],
+        ['3', '105780', 2022, 'Building Address', '1 Palace Rd', 'drop', '', '', ''],
+    ])
+    assert link_corrected_ids({'106337'}, df_corrections) == {'106337', '106338'}
+    assert link_corrected_ids({'106338'}, df_corrections) == {'106337', '106338'}
+    assert link_corrected_ids({'105780'}, df_corrections) == {'105780'}
+    assert link_corrected_ids(set(), df_corrections) == set()
+
+
+def test_merge_delta_rows_matches_a_full_rebuild():
+    df_persisted = pd.DataFrame({'BERDO ID': [100001, 100002, 100002, 100007], 'value': [1.0, 2.0, 2.5, 7.0]})
+
+    # 100005 is new, 100002 changed and 100007 was removed
+    df_new = pd.DataFrame({'BERDO ID': [100005, 100002, 100002], 'value': [5.0, 2.0, 3.0]})
+    df_merged = merge_delta_rows(df_persisted, df_new, {'100002', '100005', '100007'}, ['BERDO ID'])
+
+    df_current = pd.concat([df_persisted[df_persisted['BERDO ID'] == 100001], df_new])
+    assert df_merged.equals(df_current.sort_values('BERDO ID', kind='stable').reset_index(drop=True))
+
+
+def test_merge_delta_rows_keeps_the_order_of_unchanged_ids():
+    df_persisted = pd.DataFrame({'Data Year': [2021, 2021, 2022], 'BERDO ID': [100003, 100001, 100002],
+                                 'value': [3.0, 1.0, 2.0]})
+    df_new = pd.DataFrame({'Data Year': [2022, 2021], 'BERDO ID': [100004, 100002], 'value': [4.0, 2.5]})
+    df_merged = merge_delta_rows(df_persisted, df_new, {'100004', '100002'}, ['Data Year', 'BERDO ID'])
+    assert df_merged['BERDO ID'].tolist() == [100003, 100001, 100002, 100004]
+    assert df_merged['value'].tolist() == [3.0, 1.0, 2.5, 4.0]
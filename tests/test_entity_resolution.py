@@ -0,0 +1,40 @@
+import pandas as pd
+
+from entity_resolution import MATCH_COLUMNS, build_blocking_index, build_match_records, candidate_pairs, \
+    match_records, oversized_blocks
+
+
+def street_frame(house_numbers, street='Huntington Ave', zip_code='02115'):
+    # One building per house number on a single street, each under its own BERDO ID and parcel
+    return pd.DataFrame([[100000 + index, 400000000 + index, f'OWNER {index}', f'{number} {street}'.strip(),
+                          zip_code, '', '']
+                         for index, number in enumerate(house_numbers)], columns=MATCH_COLUMNS)
+
+
+def test_small_address_blocks_are_kept_whole():
+    blocks = build_blocking_index(build_match_records({2023: street_frame(['1', '3', '5'])}), max_block_size=5)
+    assert blocks['address 02115 huntington'] == [0, 1, 2]
+
+
+def test_oversized_address_blocks_are_split_by_house_number():
+    df = street_frame([str(number) for number in range(1, 11)] + ['360', '360-364', ''])
+    blocks = build_blocking_index(build_match_records({2023: df}), max_block_size=5)
+    assert 'address 02115 huntington' not in blocks
+    assert blocks['address 02115 huntington #360'] == [10, 11]
+    assert not oversized_blocks(blocks, max_block_size=5)
+    assert (10, 11) in candidate_pairs(blocks, max_block_size=5)
+
+
+def test_duplicates_on_a_long_street_are_matched():
+    df = street_frame([str(number) for number in range(1, 11)] + ['360'])
+    df_duplicate = street_frame(['360'])
+    df_duplicate.loc[0, ['BERDO ID', 'Tax Parcel ID', 'Property Owner Name']] = [200000, 400000010, 'OWNER 10']
+    df_matches = match_records({2023: pd.concat([df, df_duplicate], ignore_index=True)}, max_block_size=5)
+    assert df_matches.loc[0, ['left_berdo_id', 'right_berdo_id', 'decision']].tolist() == ['100010', '200000',
+                                                                                          'match']
+
+
+def test_oversized_blocks_lists_the_skipped_blocks():
+    blocks = {'parcel 0401092000': list(range(4)), 'berdo id 100001': [0, 1]}
+    assert oversized_blocks(blocks, max_block_size=3) == {'parcel 0401092000': 4}
+    assert all(3 not in pair for pair in candidate_pairs(blocks, max_block_size=3))
@@ -0,0 +1,15 @@
+import pytest
+
+from factor_registry import FACTOR_YEARS, get_factor_set, select_factors
+
+
+def test_select_factors_selects_years_and_fuels():
+    factors = select_factors(get_factor_set(), ['Electricity', 'Natural Gas'], [2015, '2050'])
+    assert factors.shape == (2, 2)
+    assert factors[0, 1] == factors[1, 1]
+
+
+@pytest.mark.parametrize('year', [2010, FACTOR_YEARS[0] - 1, FACTOR_YEARS[-1] + 1])
+def test_select_factors_rejects_years_without_factors(year):
+    with pytest.raises(ValueError, match='2015-2050'):
+        select_factors(get_factor_set(), ['Electricity'], [2025, year])
@@ -0,0 +1,142 @@
+import os
+import random
+import re
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from addresses import standardize_address_extended
+from emissions_model import PIPELINE_FUELS, PIPELINE_FUEL_COLUMNS, build_usage_matrix, calculate_emissions, \
+    calculate_cei, calculate_total_cei, calculate_penalty
+from equivalence_harness import REPOSITORY_DIRECTORY, load_script_functions, random_address, \
+    random_property_type_row, random_property_types
+from sparse_usage import build_sparse_usage, sparse_usage_emissions
+
+
+# Random inputs per property and their seed
+EXAMPLES = 200
+SEED = 0
+
+# Each pass only removes one period after a street type, and 'Avenue.' becomes 'Ave.' after the 'Ave.' pattern
+# has run, so these addresses change again on a second pass
+KNOWN_NON_IDEMPOTENT_ADDRESS = re.compile(
+    r'\bAvenue\.|\b(Ave|Avenue|Av|St|Street|Hwy|Highway|Rd|Road|Blvd|Boulevard|Bl|Dr|Drive)\.\.', re.IGNORECASE)
+
+cleaning = load_script_functions(os.path.join(REPOSITORY_DIRECTORY, 'scripts', '2-data_preprocessing.py'),
+                                 ['clean_cell', 'clean_largest_property_type'])
+
+
+def random_cases(make_input, seed=SEED):
+    generator = random.Random(seed)
+    return [make_input(generator) for _ in range(EXAMPLES)]
+
+
+def address_cases():
+    # Addresses hitting the known non-idempotence are expected to fail rather than left out
+    known_failure = pytest.mark.xfail(strict=True, reason='standardize_address_extended only removes one period '
+                                                          'after a street type per pass')
+    return [pytest.param(address, marks=known_failure) if KNOWN_NON_IDEMPOTENT_ADDRESS.search(address) else address
+            for address in random_cases(random_address)]
+
+
+def random_usage(seed):
+    # Sparse usage of a few buildings, random factors over some years, onsite renewables and GFAs
+    rng = np.random.default_rng(seed)
+    buildings = int(rng.integers(1, 20))
+    usage = rng.lognormal(12, 3, size=(buildings, len(PIPELINE_FUELS))) \
+        * (rng.random((buildings, len(PIPELINE_FUELS))) < 0.3)
+    factors = rng.uniform(0, 100, size=(int(rng.integers(1, 30)), len(PIPELINE_FUELS)))
+    renewables = rng.uniform(0, 1, size=buildings) * usage[:, 0]
+    return usage, factors, renewables, rng.uniform(1000, 1e6, size=buildings)
+
+
+@pytest.mark.xfail(strict=True, reason='standardize_address_extended only removes one period after a street type '
+                                       'per pass')
+def test_standardize_address_extended_is_idempotent_after_avenue_with_period():
+    once = standardize_address_extended('12 Main Avenue.')
+    assert standardize_address_extended(once) == once
+
+
+@pytest.mark.parametrize('address', address_cases())
+def test_standardize_address_extended_is_idempotent(address):
+    once = standardize_address_extended(address)
+    assert standardize_address_extended(once) == once
+
+
+@pytest.mark.parametrize('address', random_cases(random_address))
+def test_standardize_address_extended_leaves_no_long_street_types(address):
+    assert not re.search(r'\b(Avenue|Street|Highway|Road|Boulevard|Drive|Parkway)\b',
+                         standardize_address_extended(address), flags=re.IGNORECASE)
+
+
+@pytest.mark.parametrize('cell', random_cases(random_property_types))
+def test_clean_cell_drops_parking_and_empty_cells(cell):
+    result = cleaning['clean_cell'](cell)
+    if cell.strip() in (',', 'nan'):
+        assert result == 0
+    elif cell.strip() == 'Parking':
+        assert result == 'Storage'
+    elif not isinstance(result, int) and cell.strip().lower() != 'parking':
+        assert not re.search(r'\bparking\b', result, flags=re.IGNORECASE)
+
+
+@pytest.mark.parametrize('row', random_cases(random_property_type_row))
+def test_clean_largest_property_type_falls_back_to_all_property_types(row):
+    result = cleaning['clean_largest_property_type'](row)
+    largest = row['Largest Property Type']
+    if not (pd.isna(largest) or largest == '' or largest == 0):
+        assert result == largest
+    else:
+        types = [part.strip() for part in str(row['All Property Types']).split(',') if part.strip()]
+        others = [part for part in types if part != 'Multifamily Housing']
+        assert result == (others[0] if others else 'Multifamily Housing')
+
+
+@pytest.mark.parametrize('seed', range(EXAMPLES))
+def test_script_2_emissions_match_emissions_model(seed):
+    usage, factors, renewables, _ = random_usage(seed)
+    df = pd.DataFrame(usage, columns=PIPELINE_FUEL_COLUMNS)
+    df['Renewable System Electricity Usage Onsite (kBtu)'] = renewables
+
+    # Emissions of each fuel the way script 2 calculates them, electricity net of renewables
+    per_fuel = [((df[column] - (renewables if index == 0 else 0)) / 1000).to_numpy()[:, np.newaxis]
+                * factors[:, index] / 1000 for index, column in enumerate(PIPELINE_FUEL_COLUMNS)]
+    assert np.allclose(sum(per_fuel), calculate_emissions(build_usage_matrix(df), factors), rtol=1e-9, atol=1e-9)
+
+
+@pytest.mark.parametrize('seed', range(EXAMPLES))
+def test_sparse_emissions_match_the_dense_formula(seed):
+    usage, factors, _, _ = random_usage(seed)
+    df = pd.DataFrame(np.trunc(usage), columns=PIPELINE_FUEL_COLUMNS)
+    df.insert(0, 'reporting_id', range(len(df)))
+    sparse = build_sparse_usage(df)
+    dense = (np.trunc(usage).T[sparse['type'], sparse['row']][:, np.newaxis] / 1000) \
+        * (factors.T[sparse['type']] / 1000)
+    assert np.array_equal(sparse_usage_emissions(sparse, factors.T), dense)
+
+
+@pytest.mark.parametrize('seed', range(EXAMPLES))
+def test_emissions_are_linear_in_usage(seed):
+    usage, factors, _, _ = random_usage(seed)
+    assert np.allclose(calculate_emissions(2.5 * usage, factors), 2.5 * calculate_emissions(usage, factors),
+                       rtol=1e-9, atol=1e-9)
+
+
+@pytest.mark.parametrize('seed', range(EXAMPLES))
+def test_total_cei_is_the_sum_of_the_fuel_ceis(seed):
+    usage, factors, _, gsf = random_usage(seed)
+    assert np.allclose(calculate_total_cei(usage, gsf, factors), calculate_cei(usage, gsf, factors).sum(axis=-1),
+                       rtol=1e-9, atol=1e-12)
+
+
+@pytest.mark.parametrize('seed', range(EXAMPLES))
+def test_penalties_are_only_charged_above_the_threshold(seed):
+    usage, factors, _, gsf = random_usage(seed)
+    total_cei = calculate_total_cei(usage, gsf, factors)
+    thresholds = np.median(total_cei, axis=0)
+    penalty = calculate_penalty(total_cei, thresholds, gsf)
+    larger_penalty = calculate_penalty(calculate_total_cei(1.5 * usage, gsf, factors), thresholds, gsf)
+    assert np.all(penalty[total_cei <= thresholds] == 0)
+    assert np.all(penalty >= 0)
+    assert np.all(larger_penalty >= penalty)